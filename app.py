@@ -1,21 +1,21 @@
 import streamlit as st
 import pandas as pd
-import folium
-from folium.features import DivIcon
 from streamlit_folium import st_folium
-from branca.element import Element  # 에러 방지를 위해 추가된 직접 주입 모듈
-import random
 import os
-import hashlib
-import json
-
-# [기능 추가] 모바일 제스처 처리를 위한 플러그인 확인
-# 한 손가락 스크롤 / 두 손가락 줌 기능을 담당합니다.
-try:
-    from folium.plugins import GestureHandling
-    gesture_handling_available = True
-except ImportError:
-    gesture_handling_available = False
+import time
+from functools import partial
+
+import metrics
+from dataset_store import DatasetStore
+from ingest import bundle_workbooks, resolve_columns
+from facets import MODEL_GROUPS, expand_models
+from inventory_cube import DIM_NAMES
+from inventory_index import age_cutoff, search_result
+from map_render import (MarkerViewport, build_inventory_map, build_store_records, map_payload_bytes, selection_layer,
+                        store_cities, viewport_bounds)
+from result_export import EXPORT_FORMATS, export_file_name, export_rows, export_summary
+from result_list import page_count, page_slice, row_labels
+from serial_index import SERIAL_MAX_MATCHES
 
 # 1. 화면 설정
 st.set_page_config(layout="wide", page_title="재고 현황 대시보드", initial_sidebar_state="collapsed")
@@ -28,6 +28,24 @@ if 'selected_idx' not in st.session_state: st.session_state['selected_idx'] = No
 if 'clicked_store_name' not in st.session_state: st.session_state['clicked_store_name'] = None
 if 'search_clicked' not in st.session_state: st.session_state['search_clicked'] = False
 
+# ==============================================================================
+# [진단] 실행(rerun)별 단계 소요 시간 측정 → 사이드바 진단 패널 / metrics/metrics.jsonl
+# ==============================================================================
+run_metrics = metrics.RunMetrics()
+profiler = metrics.start_profile() if st.session_state.pop('profile_next_run', False) else None
+
+def finish_run():
+    # 이번 실행 기록을 로그에 남기고 다음 실행의 진단 패널에서 볼 수 있게 보관 (st.rerun 직전마다 호출)
+    # 실행당 한 번만: 끝난 실행의 조각(fragment) 재실행에서 불려도 다시 기록/프로파일 종료하지 않음
+    if run_metrics.finished: return
+    if search_cache is not None:
+        run_metrics.info['search_cache'] = {'hits': search_cache.hits, 'misses': search_cache.misses,
+                                            'entries': len(search_cache), 'bytes': search_cache.nbytes}
+    st.session_state['last_metrics'] = run_metrics.finish()
+    if profiler is not None:
+        text, path = metrics.stop_profile(profiler)
+        st.session_state['last_profile'] = {'text': text, 'path': path}
+
 # ==============================================================================
 # [스타일] UI 디자인 (유지: 고밀도 리스트 뷰 - 한 화면 최대 표시)
 # ==============================================================================
@@ -131,330 +149,372 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==============================================================================
-# 2. 데이터 사전
+# 2. 데이터 사전 / 적재
 # ==============================================================================
-
-MODEL_GROUPS = {
-    "SM-F766 (N0/NK 통합)": ["SM-F766N0", "SM-F766NK"],
-    "SM-S937 (N0/NK 통합)": ["SM-S937N0", "SM-S937NK"]
-}
-
-DISTRICT_CENTERS = {
-    "강남": [37.5172, 127.0473], "서초": [37.4837, 127.0324], "송파": [37.5145, 127.1066], 
-    "강동": [37.5301, 127.1238], "영등포": [37.5264, 126.8962], "마포": [37.5663, 126.9016],
-    "용산": [37.5326, 126.9645], "종로": [37.5729, 126.9791], "중구": [37.5637, 126.9975],
-    "성동": [37.5633, 127.0371], "광진": [37.5385, 127.0823], "동대문": [37.5714, 127.0097],
-    "성북": [37.5891, 127.0182], "강북": [37.6396, 127.0257], "도봉": [37.6688, 127.0471],
-    "노원": [37.6542, 127.0568], "은평": [37.6027, 126.9291], "서대문": [37.5791, 126.9368],
-    "양천": [37.5169, 126.8665], "강서": [37.5509, 126.8495], "구로": [37.4954, 126.8874],
-    "금천": [37.4573, 126.8964], "동작": [37.5124, 126.9393], "관악": [37.4784, 126.9516],
-    "중랑": [37.6065, 127.0927],
-    "수원": [37.2636, 127.0286], "성남": [37.4200, 127.1265], "의정부": [37.7381, 127.0337],
-    "안양": [37.3943, 126.9568], "부천": [37.5034, 126.7660], "광명": [37.4786, 126.8646],
-    "평택": [36.9925, 127.1127], "동두천": [37.9036, 127.0604], "안산": [37.3219, 126.8309],
-    "고양": [37.6584, 126.8320], "과천": [37.4292, 126.9877], "구리": [37.6033, 127.1436],
-    "남양주": [37.6360, 127.2165], "오산": [37.1498, 127.0772], "시흥": [37.3801, 126.8029],
-    "군포": [37.3614, 126.9351], "의왕": [37.3447, 126.9739], "하남": [37.5393, 127.2149],
-    "용인": [37.2410, 127.1775], "파주": [37.7600, 126.7800], "이천": [37.2811, 127.4358],
-    "안성": [37.0080, 127.2797], "김포": [37.6153, 126.7157], "화성": [37.1995, 126.8315],
-    "광주": [37.4294, 127.2550], "양주": [37.7853, 127.0458], "포천": [37.8949, 127.2003],
-    "여주": [37.2983, 127.6370], "연천": [38.0964, 127.0749], "가평": [37.8315, 127.5095],
-    "양평": [37.4912, 127.4876], "인천": [37.4563, 126.7052], 
-    "춘천": [37.8813, 127.7298], "원주": [37.3422, 127.9202], "강릉": [37.7519, 128.8760],
-    "장안": [37.3036, 126.9745], "권선": [37.2575, 126.9715], "팔달": [37.2798, 127.0441], "영통": [37.2511, 127.0709],
-    "수정": [37.4500, 127.1400], "중원": [37.4300, 127.1700], "분당": [37.3827, 127.1189],
-    "만안": [37.4000, 126.9200], "동안": [37.3900, 126.9600],
-    "덕양": [37.6380, 126.8330], "일산동": [37.6600, 126.7700], "일산서": [37.6700, 126.7500],
-    "처인": [37.2300, 127.2000], "기흥": [37.2655, 127.1293], "수지": [37.3223, 127.0975],
-    "일산": [37.6584, 126.8320]
-}
-
-NEIGHBORHOOD_COORDS = {
-    "반추": [37.5156, 126.8950], "반추정보통신": [37.5156, 126.8950],
-    "신도림TM": [37.5087, 126.8905], "테크노": [37.5351, 127.0957], "강변TM": [37.5351, 127.0957],
-    "신원": [37.6744, 126.8653], "화정": [37.6346, 126.8326], "성사": [37.6533, 126.8430],
-    "삼송": [37.6530, 126.8950], "원흥": [37.6500, 126.8730], "배곧": [37.3705, 126.7335],
-    "정왕": [37.3450, 126.7400], "은행": [37.4360, 126.7970], "상동": [37.5050, 126.7530],
-    "중동": [37.5020, 126.7640], "소사": [37.4830, 126.7940], "풍무": [37.6030, 126.7230],
-    "사우": [37.6190, 126.7190], "구래": [37.6450, 126.6280], "철산": [37.4760, 126.8680],
-    "하안": [37.4550, 126.8810], "우만": [37.2913, 127.0396], "동탄": [37.2005, 127.0976],
-    "병점": [37.2070, 127.0330], "봉담": [37.2160, 126.9450], "향남": [37.1320, 126.9210],
-    "장당": [37.0468, 127.0607], "송탄": [37.0820, 127.0570], "안중": [36.9930, 126.9310],
-    "팽성": [36.9580, 127.0520], "공도": [37.0010, 127.1720], "대천": [37.0160, 127.2660],
-    "판교": [37.3956, 127.1112], "야탑": [37.4110, 127.1280], "위례": [37.4787, 127.1458],
-    "죽전": [37.3240, 127.1070], "미사": [37.5640, 127.1940], "경안": [37.4090, 127.2570],
-    "태전": [37.3940, 127.2280], "홍문": [37.2960, 127.6365], "민락": [37.7470, 127.0990],
-    "지행": [37.8935, 127.0545], "옥정": [37.8220, 127.0960], "덕정": [37.8420, 127.0620],
-    "다산": [37.6230, 127.1570], "별내": [37.6440, 127.1150], "호평": [37.6550, 127.2430],
-    "양수": [37.5452, 127.3276], "운정": [37.7160, 126.7450], "문산": [37.8550, 126.7940],
-    "전곡": [38.0260, 127.0660], "원통": [38.1326, 128.2036], "인제": [38.0697, 128.1703],
-    "송도": [37.3947, 126.6393], "청라": [37.5384, 126.6337], "구월": [37.4490, 126.7050],
-    "주안": [37.4650, 126.6800], "검단": [37.5930, 126.6740], "여의도": [37.5219, 126.9242],
-    "잠실": [37.5132, 127.1000], "천호": [37.5436, 127.1255], "홍대": [37.5575, 126.9245],
-    "신촌": [37.5598, 126.9425], "합정": [37.5484, 126.9137], "연신내": [37.6186, 126.9207],
-    "수색": [37.5802, 126.8958], "이태원": [37.5345, 126.9940], "청파": [37.5447, 126.9678],
-    "혜화": [37.5820, 127.0010], "군자": [37.5571, 127.0794], "아차산": [37.5520, 127.0890],
-    "성수": [37.5445, 127.0559], "왕십리": [37.5619, 127.0384], "상봉": [37.5954, 127.0858],
-    "수유": [37.6370, 127.0250], "창동": [37.6530, 127.0470], "서부물류": [37.5113, 126.8373],
-    "장항": [37.6629, 126.7697],"봉일":[37.7436, 126.8069],"광탄":[37.7975,126.8480]
-}
-
-def get_region_category(text):
-    if pd.isna(text): return "기타"
-    text = str(text).strip()
-    for key in ["강변TM", "신도림TM", "동남", "동북", "서남", "서북", "남부", "강원", "인천"]:
-        if key in text: return key
-    return "기타"
-
-def get_city_only(text):
-    if pd.isna(text): return "미분류(서울)"
-    text = str(text)
-    for dong in NEIGHBORHOOD_COORDS.keys():
-        if dong in text: return dong
-    for dist in DISTRICT_CENTERS.keys():
-        if dist in text: return dist
-    return "미분류(서울)"
-
-def get_coordinate_smart_jitter(store_name, base_lat, base_lon):
-    if "반추" in str(store_name): return base_lat, base_lon
-    hash_obj = hashlib.md5(str(store_name).encode())
-    hash_int = int(hash_obj.hexdigest(), 16)
-    random.seed(hash_int) 
-    lat_offset = random.uniform(-0.003, 0.003)
-    lon_offset = random.uniform(-0.003, 0.003)
-    return base_lat + lat_offset, base_lon + lon_offset
-
-def get_coordinate_priority(text, base_lat, base_lon):
-    if pd.isna(text): return base_lat, base_lon
-    text = str(text)
-    for name, coords in NEIGHBORHOOD_COORDS.items():
-        if name in text:
-            return get_coordinate_smart_jitter(text, coords[0], coords[1])
-    for name, coords in DISTRICT_CENTERS.items():
-        if name in text:
-            return get_coordinate_smart_jitter(text, coords[0], coords[1])
-    return get_coordinate_smart_jitter(text, base_lat, base_lon)
-
-def get_real_color(korean_color):
-    if pd.isna(korean_color): return '#3388ff', '#000000'
-    c = str(korean_color).lower()
-    if '블랙' in c or 'black' in c: return '#000000', '#FFFFFF' 
-    elif '화이트' in c or 'white' in c or '실버' in c: return '#FFFFFF', '#000000' 
-    elif '그레이' in c or '티타늄' in c: return '#808080', '#000000' 
-    elif '블루' in c: return '#0000FF', '#FFFFFF' 
-    elif '핑크' in c: return '#FFC0CB', '#000000' 
-    elif '그린' in c: return '#008000', '#FFFFFF' 
-    elif '골드' in c or '옐로우' in c: return '#FFD700', '#000000' 
-    elif '퍼플' in c: return '#800080', '#FFFFFF' 
-    elif '레드' in c: return '#FF0000', '#FFFFFF' 
-    return '#3388ff', '#000000'
-
-@st.cache_data
-def load_data_optimized(file):
-    if isinstance(file, str): df = pd.read_excel(file, dtype=str)
-    else: df = pd.read_excel(file, dtype=str)
-    
-    boyu_col = None
-    for col in df.columns:
-        if '보유처' in str(col):
-            boyu_col = col
-            break
-            
-    if boyu_col:
-        df[boyu_col] = df[boyu_col].astype(str).str.strip()
-        df.loc[df[boyu_col].str.contains("반추", na=False), boyu_col] = "반추정보통신"
-        
-        final_lats = []
-        final_lons = []
-        for _, row in df.iterrows():
-            f_lat, f_lon = get_coordinate_priority(row[boyu_col], 37.5665, 126.9780)
-            final_lats.append(f_lat)
-            final_lons.append(f_lon)
-
-        df['cached_lat'] = final_lats
-        df['cached_lon'] = final_lons
-        clean_names = df[boyu_col].str.replace(r'^[^-\s]*\d[^-\s]*-', '', regex=True)
-        df['cached_region'] = clean_names.apply(get_region_category)
-        df['cached_city'] = clean_names.apply(get_city_only)
-        
-    return df
+# (모델 묶음 MODEL_GROUPS 는 facets.py, 좌표 사전은 geocode.py 에 있습니다)
+
+# [성능 개선] 데이터(DataFrame + 조회 인덱스 + 선택지 + 조회 결과 캐시)는 프로세스 공용 보관소에서 한 묶음으로 관리합니다.
+# - 업로드마다 번호 붙은 버전(원본 + 가공 완료 Parquet + 정보)을 새로 만들고, 현재 버전 표시만 원자적으로 교체
+# - 업로드는 백그라운드에서 새 묶음을 다 만든 뒤 한 번에 교체 (처리 중에도 모든 사용자가 기존 데이터로 조회)
+# - 이전 버전으로 바로 되돌리기 가능 (오래된 버전은 보관 기간이 지나면 정리)
+@st.cache_resource
+def get_dataset_store(snapshot_dir, legacy_file, legacy_meta):
+    return DatasetStore(snapshot_dir, legacy_file, legacy_meta)
+
+# [성능 개선] 지도 마커 데이터는 조회 결과(행 위치 해시)별로 한 번만 만들고, 목록 클릭(선택 변경) 시에는 재사용합니다.
+@st.cache_resource(max_entries=32)
+def load_map_records(file_key, result_key, _df, _positions, _roles):
+    return build_store_records(_df.iloc[_positions], _roles)
+
+# [성능 개선] 화면 영역 모드: 조회 결과별 묶음(지역/시군구) 사전 계산, 지도를 움직일 때는 범위 안 마커만 골라 보냄
+@st.cache_resource(max_entries=32)
+def load_map_viewport(file_key, result_key, _df, _positions, _roles):
+    records = load_map_records(file_key, result_key, _df, _positions, _roles)
+    return MarkerViewport(records, store_cities(_df.iloc[_positions], _roles, records))
+
+def remember_map_view(map_key):
+    # 지도가 돌려준 화면 범위/줌을 조회 결과(map_key)와 함께 보관 (다른 결과의 화면 정보는 쓰지 않음)
+    state = st.session_state.get("inventory_map") or {}
+    st.session_state['map_view'] = {'map_key': map_key, 'bounds': viewport_bounds(state), 'zoom': state.get("zoom")}
+
+def select_list_row(list_key, row_ids, owners):
+    # 결과 목록에서 행을 선택하면 해당 보유처를 지도에서 강조
+    rows = st.session_state[list_key].selection.rows
+    if rows:
+        st.session_state['selected_idx'] = row_ids[rows[0]]
+        st.session_state['clicked_store_name'] = str(owners[rows[0]])
+    else:
+        st.session_state['selected_idx'] = None
+        st.session_state['clicked_store_name'] = None
 
 # =========================================================
 # 메인 UI
 # =========================================================
+SNAPSHOT_DIR = 'inventory_snapshots'
+# 버전 보관소 이전의 고정 경로 (있으면 처음 한 번 첫 버전으로 가져옴)
 DATA_FILE = 'inventory_data.xlsx'
 META_FILE = 'file_info.txt' 
 
+store = get_dataset_store(SNAPSHOT_DIR, DATA_FILE, META_FILE)
+
+# 업로드 처리 상태 (처리 중에는 1초마다 이 부분만 갱신, 끝나면 화면 전체를 새 데이터로 다시 그림)
+def show_upload_status():
+    job = store.job
+    if job is None: return
+    if job.running:
+        st.progress(job.progress, text=f"⏳ {job.name}: {job.stage}")
+    elif job.error:
+        st.error(f"⛔ 저장 실패: 파일을 확인하고 다시 시도해주세요. ({job.error})")
+    else:
+        st.caption(f"✅ {job.name} 반영 완료 ({job.finished - job.started:.1f}초)")
+        if job.delta:
+            d = job.delta
+            st.caption(f"직전 버전 대비: 추가 {d['inserted']} · 삭제 {d['removed']} · 변경 {d['changed']} (보유처 이동 {d['moved']})")
+    if not job.running and st.session_state.get('seen_upload') != job.started:
+        st.session_state['seen_upload'] = job.started
+        finish_run()
+        st.rerun()
+
+upload_progress = st.fragment(run_every=1.0)(show_upload_status)
+
+# 데이터 묶음 (적재 전 st.rerun 으로 끝나는 실행에서도 finish_run 이 참조)
+df = None
+inv_index = None
+facets = None
+search_cache = None
+spatial = None
+serials = None
+cube = None
+dataset = None
+
 # 1. 사이드바: 파일 업로드
 with st.sidebar:
     st.header("📂 데이터 관리")
-    uploaded_file = st.file_uploader("파일 선택", type=["xlsx"])
+    # 지역별 파일 여러 개를 한 번에 올리거나, 시트가 여러 개인 파일을 올려도 모두 합쳐서 반영합니다.
+    uploaded_files = st.file_uploader("파일 선택 (여러 개 가능)", type=["xlsx"], accept_multiple_files=True)
+    if store.busy: upload_progress()
+    else: show_upload_status()
     st.markdown("---")
-    if st.button("🗑️ 데이터 초기화", type="secondary"):
-        if os.path.exists(DATA_FILE): os.remove(DATA_FILE)
-        if os.path.exists(META_FILE): os.remove(META_FILE)
-        st.session_state.clear()
-        st.rerun()
+    if st.button("🗑️ 데이터 초기화", type="secondary", disabled=store.busy, help="업로드를 처리하는 동안에는 초기화할 수 없습니다." if store.busy else None):
+        if store.reset():
+            finish_run()
+            st.session_state.clear()
+            st.rerun()
+        st.warning("⚠️ 업로드를 처리하는 중이라 초기화하지 않았습니다. 완료된 뒤 다시 시도해주세요.")
+
+    # 버전 기록: 보관 중인 업로드 버전으로 되돌리기 (기본 선택은 현재 바로 이전 버전)
+    versions = store.versions()
+    if versions:
+        with st.expander("🕘 버전 기록"):
+            current_version = store.snapshots.current_version()
+            labels = {v.version: f"{v.version} · {v.meta.get('name', '')} · {pd.Timestamp(v.meta.get('created', 0), unit='s', tz='Asia/Seoul'):%m-%d %H:%M}"
+                                 + (" (사용 중)" if v.version == current_version else "") for v in versions}
+            previous_version = store.snapshots.previous_version()
+            options = list(labels)
+            target_version = st.selectbox("버전", options, index=options.index(previous_version) if previous_version in labels else 0,
+                                          format_func=labels.get, key="rollback_version")
+            if st.button("↩️ 이 버전으로 되돌리기", width="stretch", disabled=store.busy or target_version == current_version):
+                if store.rollback(target_version):
+                    finish_run()
+                    st.rerun()
+                else: st.warning("⚠️ 해당 버전을 읽을 수 없습니다.")
+
+    # [진단] 직전 실행의 단계별 소요 시간 / 적재 통계 / 프로파일
+    if st.checkbox("🔧 성능 진단", key="show_diagnostics"):
+        last = st.session_state.get('last_metrics')
+        if last:
+            st.caption(f"직전 실행: {last['total_ms']:.0f} ms ({last['ts']})")
+            st.dataframe(pd.DataFrame(last['stages']), hide_index=True, width="stretch")
+            if last.get('load_stats'): st.json(last['load_stats'], expanded=False)
+            if last.get('search_cache'): st.json(last['search_cache'], expanded=False)
+        if st.button("⏱️ 다음 실행 프로파일링", type="secondary"):
+            st.session_state['profile_next_run'] = True
+            finish_run()
+            st.rerun()
+        if st.session_state.get('last_profile'):
+            prof = st.session_state['last_profile']
+            with st.expander(f"프로파일 결과 {os.path.basename(prof['path']) if prof['path'] else ''}"):
+                st.code(prof['text'])
 
 # 새로고침 무한 루프 방지를 위한 업로드 기록 세션 추가
 if 'last_uploaded' not in st.session_state: 
     st.session_state['last_uploaded'] = None
 
-if uploaded_file:
+if uploaded_files:
     # 파일 이름과 크기로 고유 식별자 생성 (동일 파일 중복 실행 방지)
-    current_file_id = f"{uploaded_file.name}_{uploaded_file.size}"
+    current_file_id = "|".join(f"{f.name}_{f.size}" for f in uploaded_files)
     
     # 이전에 업로드한 파일과 다를 때만(새 파일일 때만) 실행
     if st.session_state['last_uploaded'] != current_file_id:
-        try:
-            with open(DATA_FILE, "wb") as f: f.write(uploaded_file.getbuffer())
-            with open(META_FILE, "w", encoding="utf-8") as f: f.write(uploaded_file.name)
-            
-            st.session_state['last_uploaded'] = current_file_id  # 현재 파일 처리 완료 기록
-            st.success("저장 완료")
-            st.cache_data.clear()
+        # [성능 개선] 백그라운드에서 처리, 완료되면 데이터 묶음을 한 번에 교체 (직전 데이터와의 변경 건수도 함께 안내)
+        # 여러 파일은 하나의 묶음 파일로 저장 (적재 시 파일/시트별로 여러 프로세스에서 동시에 파싱)
+        if len(uploaded_files) == 1:
+            upload_data, upload_name = uploaded_files[0].getbuffer(), uploaded_files[0].name
+        else:
+            upload_data = bundle_workbooks([(f.name, f.getbuffer()) for f in uploaded_files])
+            upload_name = f"{uploaded_files[0].name} 외 {len(uploaded_files) - 1}개"
+        if store.submit(upload_data, upload_name):
+            st.session_state['last_uploaded'] = current_file_id  # 현재 파일 처리 시작 기록
+            finish_run()
             st.rerun()
-        except Exception as e:
-            st.error(f"⛔ 저장 실패: 파일을 닫고 다시 시도해주세요. ({e})")
+        else:
+            st.sidebar.warning("⏳ 다른 파일을 처리 중입니다. 완료 후 다시 올려주세요.")
 
-df = None
-if os.path.exists(DATA_FILE):
-    try: 
-        df = load_data_optimized(DATA_FILE)
-    except Exception as e:
-        st.error(f"데이터 로드 오류: {e}")
+try:
+    with run_metrics.stage("ingest") as s:
+        # 이번 실행 동안에는 이 묶음(버전)만 사용
+        dataset = store.get()
+        s['rows'] = len(dataset.df) if dataset is not None else 0
+    if dataset is not None:
+        data_key, df, inv_index, facets, search_cache = dataset.key, dataset.df, dataset.index, dataset.facets, dataset.search_cache
+        spatial, serials, cube = dataset.spatial, dataset.serials, dataset.cube
+        run_metrics.info['load_stats'] = df.attrs.get('load_stats')
+        run_metrics.info['version'] = dataset.key
+except Exception as e:
+    st.error(f"데이터 로드 오류: {e}")
 
 # 2. 메인 화면: 상태바
-if os.path.exists(META_FILE):
-    with open(META_FILE, "r", encoding="utf-8") as f: f_name = f.read()
-    st.markdown(f"<div class='file-status-bar'><span>✅ 저장 완료</span><span>📂 사용 중: <b>{f_name}</b></span></div>", unsafe_allow_html=True)
+if dataset is not None:
+    f_name = dataset.meta.get('name', '')
+    busy_txt = f"<span>⏳ 새 파일 처리 중 (<b>{store.job.name}</b>)</span>" if store.busy else ""
+    st.markdown(f"<div class='file-status-bar'><span>✅ 저장 완료</span><span>📂 사용 중: <b>{f_name}</b> ({dataset.key})</span>{busy_txt}</div>", unsafe_allow_html=True)
 else:
     st.markdown("<div class='file-status-bar' style='background-color:#fff3e0; color:#ef6c00;'><span>⚠️ <b>파일 없음</b>: 사이드바(>)에서 파일 업로드</span></div>", unsafe_allow_html=True)
 
 if df is not None:
-    # 컬럼 매핑
-    col_map = {}
-    for col in df.columns:
-        c = str(col).replace('▼', '').strip()
-        if '보유처' in c: col_map['보유처'] = col
-        elif '모델명' in c: col_map['모델명'] = col
-        elif '색상' in c: col_map['색상'] = col
-        elif any(k in c for k in ['재고', '상태', '등급']): col_map['status'] = col
-        elif '일련번호' in c: col_map['일련번호'] = col  # <-- [추가된 부분] 일련번호 매핑
-
-    target_col = None
-    if len(df.columns) >= 14: target_col = df.columns[13]
-    if target_col is None:
-        for col in df.columns:
-            c = str(col).replace('▼', '').strip()
-            if any(k in c for k in ['출고', '날짜']): target_col = col; break
-
-    real_boyu = col_map.get('보유처')
-    real_model = col_map.get('모델명', df.columns[0])
-    real_color = col_map.get('색상', None)
-    real_status = col_map.get('status', None)
-    real_target = target_col
-    real_serial = col_map.get('일련번호', None)  # <-- [추가된 부분] 일련번호 매핑
+    # 컬럼 매핑 (적재 시 헤더 기준으로 정해 둔 역할을 사용. 필요한 컬럼만 읽으므로 위치 규칙은 적재 단계에서 처리)
+    col_roles = df.attrs.get('col_roles') or resolve_columns(df.columns)
+
+    real_boyu = col_roles.get('보유처')
+    real_model = col_roles.get('모델명') or df.columns[0]
+    real_color = col_roles.get('색상')
+    real_status = col_roles.get('status')
+    real_target = col_roles.get('target')
+    real_serial = col_roles.get('일련번호')  # <-- [추가된 부분] 일련번호 매핑
 
     # 3. 검색창
     st.markdown('<div class="search-container">', unsafe_allow_html=True)
     c_model, c_color = st.columns(2)
     
     with c_model:
-        raw_models = df[real_model].unique().tolist()
-        display_options = []
-        grouped_items = []
-        for label, items in MODEL_GROUPS.items():
-            if any(i in raw_models for i in items):
-                display_options.append(label)
-                grouped_items.extend(items)
-        for m in raw_models:
-            if m not in grouped_items: display_options.append(str(m))
-        display_options.sort()
+        # [성능 개선] 선택지/수량은 데이터당 한 번 계산된 facet 에서 조회
+        with run_metrics.stage("facets:model"):
+            display_options, model_counts = facets.model_options()
         
-        selected_models_display = st.multiselect("모델", display_options, placeholder="선택하세요")
+        selected_models_display = st.multiselect("모델", display_options, placeholder="선택하세요",
+                                                 format_func=lambda o: f"{o} ({model_counts.get(o, 0)})")
         
-        selected_models = []
-        for opt in selected_models_display:
-            if opt in MODEL_GROUPS: selected_models.extend(MODEL_GROUPS[opt])
-            else: selected_models.append(opt)
+        selected_models = expand_models(selected_models_display, MODEL_GROUPS)
 
     with c_color:
         if real_color:
             color_placeholder = "선택하세요"
+            with run_metrics.stage("facets:color"):
+                sorted_colors, color_counts = facets.colors_for(selected_models)
             if selected_models:
-                filtered_df = df[df[real_model].isin(selected_models)]
-                sorted_colors = sorted(filtered_df[real_color].dropna().unique().tolist())
                 color_placeholder = f"💡 {selected_models_display[0]} 등 선택하신 모델의 색상을 선택해주세요. (미선택 시 전체 조회)"
-            else:
-                sorted_colors = sorted(df[real_color].dropna().unique().tolist())
             
             av_c = ["전체"] + sorted_colors
-            selected_colors = st.multiselect("색상", av_c, placeholder=color_placeholder)
+            selected_colors = st.multiselect("색상", av_c, placeholder=color_placeholder,
+                                             format_func=lambda o: o if o == "전체" else f"{o} ({color_counts.get(o, 0)})")
         else:
             st.write("-")
 
-    c_region, c_owner = st.columns(2)
+    c_region, c_owner, c_age = st.columns([2, 2, 1])
     with c_region:
         reg_ord = ["전체", "사무실", "동남", "동북", "서남", "서북", "남부", "강원", "인천", "강변TM", "신도림TM"]
-        selected_regions = st.multiselect("지역", reg_ord, default=["사무실"], placeholder="전체")
+        # [성능 개선] 지역별 수량은 적재 시 만든 집계 큐브에서 조회 (선택한 모델/색상 기준)
+        with run_metrics.stage("facets:region"):
+            region_counts = cube.counts_by("region", {"model": selected_models, "color": selected_colors if real_color else None})
+        # 수량이 바뀌면 선택지 표시도 바뀌므로 key 로 위젯을 고정 (없으면 모델/색상을 바꿀 때마다 선택이 초기화됨)
+        selected_regions = st.multiselect("지역", reg_ord, default=["사무실"], placeholder="전체", key="search_regions",
+                                          format_func=lambda o: o if o == "전체" else f"{o} ({region_counts.get(o, 0)})")
     with c_owner:
-        owner_df = df.copy()
-        if selected_models:
-            owner_df = owner_df[owner_df[real_model].isin(selected_models)]
-        
-        if real_color and selected_colors and "전체" not in selected_colors:
-            owner_df = owner_df[owner_df[real_color].isin(selected_colors)]
-            
-        all_owners = sorted(owner_df[real_boyu].unique().tolist())
-        selected_owners = st.multiselect("보유처", ["전체"] + all_owners, placeholder="미선택 시 전체")
+        # [성능 개선] 데이터 복사/필터 없이 facet 에서 보유처 후보 조회
+        with run_metrics.stage("facets:owner"):
+            all_owners, owner_counts = facets.owners_for(selected_models, selected_colors if real_color else None)
+        selected_owners = st.multiselect("보유처", ["전체"] + all_owners, placeholder="미선택 시 전체", key="search_owners",
+                                         format_func=lambda o: o if o == "전체" else f"{o} ({owner_counts.get(o, 0)})")
+    with c_age:
+        # [성능 개선] 출고일은 적재 시 날짜로 파싱해 두고, 경과일 조건은 인덱스의 일 단위 정수 배열 비교로 처리
+        min_age = st.number_input("출고 후 경과일 (이상)", min_value=0, max_value=3650, value=0, step=30, key="min_age_days",
+                                  disabled=not inv_index.dated.any(), help="0: 조건 없음. 출고일을 모르는 재고(사무실 포함)는 제외됩니다.")
 
     if st.button("🚀 조회하기", use_container_width=True):
         is_specific_owner = selected_owners and "전체" not in selected_owners
         
-        if not selected_models and not is_specific_owner:
-            st.warning("⚠️ 모델을 선택하거나, 특정 보유처를 선택해주세요.")
+        if not selected_models and not is_specific_owner and not min_age:
+            st.warning("⚠️ 모델을 선택하거나, 특정 보유처 또는 출고 후 경과일을 선택해주세요.")
         else:
             st.session_state['search_clicked'] = True
+
+            # 사무실(반추) 재고는 출고일이 없어 경과일 조건에 걸리지 않으므로 경과일 조회에서는 지역에서 뺌
+            # (기본값 "사무실" 만 선택된 상태면 전체 지역에서 조회)
+            search_regions = selected_regions
+            aging = None
+            if min_age:
+                search_regions = [r for r in selected_regions if r != "사무실"]
+                aging = {'min_age': min_age, 'office_dropped': len(search_regions) != len(selected_regions),
+                         'widened': bool(selected_regions) and not search_regions}
+                if aging['widened']: search_regions = ["전체"]
+
+            # [성능 개선] 인덱스 비트맵 교집합으로 행 위치를 구하고(보유처 오름차순), 도매는 지도에서 제외
+            # 같은 조건의 결과는 공용 캐시에서 재사용
+            with run_metrics.stage("search") as s:
+                result = search_cache.search(
+                    models=selected_models,
+                    colors=selected_colors if real_color else None,
+                    owners=selected_owners,
+                    regions=search_regions,
+                    shipped_by=age_cutoff(min_age) if min_age else None,
+                )
+                s['rows'] = len(result.positions)
             
-            temp_df = df.copy()
-            
-            if selected_models:
-                temp_df = temp_df[temp_df[real_model].isin(selected_models)]
-            
-            if selected_colors and "전체" not in selected_colors:
-                temp_df = temp_df[temp_df[real_color].isin(selected_colors)]
-                
-            if selected_owners and "전체" not in selected_owners:
-                temp_df = temp_df[temp_df[real_boyu].isin(selected_owners)]
-            
-            if selected_regions and "전체" not in selected_regions:
-                if "사무실" in selected_regions:
-                    office_mask = temp_df[real_boyu].astype(str).str.contains("반추", na=False)
-                    other_regions = [r for r in selected_regions if r != "사무실"]
-                    if other_regions:
-                        region_mask = temp_df['cached_region'].isin(other_regions)
-                        temp_df = temp_df[office_mask | region_mask]
-                    else:
-                        temp_df = temp_df[office_mask]
-                else:
-                    temp_df = temp_df[temp_df['cached_region'].isin(selected_regions)]
-            
-            temp_df = temp_df.sort_values(by=real_boyu, ascending=True)
-            map_filtered_df = temp_df[~temp_df[real_boyu].astype(str).str.startswith('도매-', na=False)]
-            
-            st.session_state['filtered_data'] = {'list': temp_df, 'map': map_filtered_df}
+            # [성능 개선] 세션에는 DataFrame 사본 대신 공용 데이터의 행 위치(읽기 전용 배열)만 보관
+            st.session_state['filtered_data'] = {'result': result, 'data_key': data_key, 'aging': aging}
+            st.session_state['result_page'] = 1
             st.session_state['selected_idx'] = None
             st.session_state['clicked_store_name'] = None
+            finish_run()
             st.rerun()
 
+    # [성능 개선] 일련번호 조회: 적재 시 만든 일련번호 인덱스로 전체/앞자리/뒷자리 일치를 바로 찾음 (행 전체를 훑지 않음)
+    # 찾은 기기의 보유처를 선택 상태로 두어 지도에서 바로 강조
+    if serials is not None and len(serials):
+        c_serial, c_serial_btn = st.columns([4, 1], vertical_alignment="bottom")
+        serial_query = c_serial.text_input("일련번호", placeholder="일련번호 전체 또는 앞자리/뒷자리", key="serial_query")
+        if c_serial_btn.button("🔎 번호 조회", width="stretch", disabled=not serial_query.strip()):
+            with run_metrics.stage("serial") as s:
+                match = serials.lookup(serial_query)
+                s['rows'] = match.total
+                s['kind'] = match.kind
+            if match.kind is None:
+                st.warning(f"⚠️ 일련번호 '{serial_query.strip()}' 에 해당하는 기기가 없습니다.")
+            else:
+                # 강조할 보유처: 지도에 표시되는(도매 제외) 첫 번째 기기
+                on_map = match.positions[~inv_index.is_wholesale[match.positions]]
+                first = int(on_map[0] if len(on_map) else match.positions[0])
+                st.session_state['filtered_data'] = {
+                    'result': search_result(inv_index, match.positions), 'data_key': data_key,
+                    'serial': {'query': serial_query.strip(), 'kind': match.kind, 'total': match.total},
+                }
+                st.session_state['result_page'] = 1
+                st.session_state['selected_idx'] = df.index[first]
+                st.session_state['clicked_store_name'] = str(df[real_boyu].iat[first]) if real_boyu else None
+                finish_run()
+                st.rerun()
+
+    # [성능 개선] 주변 재고: 적재 시 만든 보유처 공간 인덱스(격자)로 반경/가까운 보유처 조회 (행 전체를 훑지 않음)
+    # 위에서 고른 모델/색상을 가진 보유처만 대상 (지역/보유처 조건은 적용하지 않음)
+    if spatial is not None and spatial.n_located:
+        with st.expander("📍 주변 재고 찾기", expanded=st.session_state.get('nearby_open', False)):
+            near_base = st.radio("기준 위치", ["보유처", "지도 클릭 위치"], horizontal=True, key="nearby_base")
+            center = None
+            if near_base == "보유처":
+                center_store = st.selectbox("기준 보유처", spatial.located_names(), index=None, placeholder="보유처 선택", key="nearby_store")
+                if center_store is not None: center, center_label = spatial.store_point(center_store), center_store
+            else:
+                center = st.session_state.get('nearby_point')
+                if center is None: st.info("조회 결과 지도에서 기준 위치를 클릭하세요.")
+                else:
+                    center_label = "지도 클릭 위치"
+                    st.caption(f"기준: {center[0]:.5f}, {center[1]:.5f}")
+            c_radius, c_count = st.columns(2)
+            radius_km = c_radius.number_input("반경 (km)", min_value=0.1, max_value=500.0, value=5.0, step=1.0, key="nearby_radius")
+            n_near = c_count.number_input("가까운 보유처 수 (0: 반경 안 전체)", min_value=0, max_value=500, value=10, step=1, key="nearby_count")
+
+            if st.button("📍 주변 조회", width="stretch", disabled=center is None):
+                with run_metrics.stage("nearby") as s:
+                    base = search_cache.search(models=selected_models, colors=selected_colors if real_color else None)
+                    held = spatial.stores_holding(base.positions)
+                    if n_near: store_codes, dists = spatial.nearest(center[0], center[1], int(n_near), allowed=held, max_km=radius_km)
+                    else: store_codes, dists = spatial.within(center[0], center[1], radius_km, allowed=held)
+                    result = search_result(inv_index, spatial.rows_of_stores(base.positions, store_codes))
+                    s['rows'] = len(result.positions)
+                    s['stores'] = len(store_codes)
+                st.session_state['filtered_data'] = {
+                    'result': result, 'data_key': data_key,
+                    'nearby': {
+                        'center': center, 'label': center_label, 'radius_km': radius_km,
+                        'distances': {inv_index.owner.categories[c]: float(d) for c, d in zip(store_codes, dists)},
+                    },
+                }
+                st.session_state['nearby_open'] = True
+                st.session_state['result_page'] = 1
+                st.session_state['selected_idx'] = None
+                st.session_state['clicked_store_name'] = None
+                finish_run()
+                st.rerun()
+
+    # [성능 개선] 재고 요약표: 적재 시 만든 집계 큐브(값이 있는 조합별 수량)만 더해서 표시 (행을 다시 훑지 않음)
+    with st.expander("📊 재고 요약표", expanded=st.session_state.get('pivot_open', False)):
+        dims = ["region", "model_group", "model", "color", "status", "city", "owner"]
+        c_rows, c_cols, c_scope = st.columns([2, 2, 2], vertical_alignment="bottom")
+        pivot_rows = c_rows.selectbox("행", dims, index=0, format_func=DIM_NAMES.get, key="pivot_rows")
+        pivot_cols = c_cols.selectbox("열", [None] + dims, index=2, format_func=lambda d: "없음" if d is None else DIM_NAMES[d], key="pivot_cols")
+        if pivot_cols == pivot_rows: pivot_cols = None
+        pivot_scoped = c_scope.toggle("검색 조건 적용 (모델/색상/지역/보유처)", key="pivot_scoped")
+        where = {"model": selected_models, "color": selected_colors if real_color else None,
+                 "region": selected_regions, "owner": selected_owners} if pivot_scoped else None
+        with run_metrics.stage("pivot") as s:
+            pivot_df = cube.pivot(pivot_rows, pivot_cols, where)
+            s['cells'] = pivot_df.size
+        if len(pivot_df): st.dataframe(pivot_df, width="stretch", height=min(38 + 35 * len(pivot_df), 500))
+        else: st.info("조건에 맞는 재고가 없습니다.")
+
     st.markdown('</div>', unsafe_allow_html=True)
 
     # 4. 결과 출력
+    # 다른 파일 기준의 조회 결과(행 위치)는 현재 데이터와 맞지 않으므로 버림
+    if st.session_state['filtered_data'] is not None and st.session_state['filtered_data'].get('data_key') != data_key:
+        st.session_state['filtered_data'] = None
+
     if st.session_state['filtered_data'] is not None:
-        data = st.session_state['filtered_data']
-        list_df = data['list']
-        map_df = data['map']
+        result = st.session_state['filtered_data']['result']
+        nearby = st.session_state['filtered_data'].get('nearby')
+        serial = st.session_state['filtered_data'].get('serial')
+        aging = st.session_state['filtered_data'].get('aging')
+        n_results = len(result.positions)
 
         st.markdown("""
             <style>
@@ -465,177 +525,115 @@ if df is not None:
             </style>
         """, unsafe_allow_html=True)
 
-        st.markdown(f"<h3 style='margin: 0px; padding: 0px; padding-top: 5px;'>검색 총수량 ({len(list_df)}건)</h3>", unsafe_allow_html=True)
+        st.markdown(f"<h3 style='margin: 0px; padding: 0px; padding-top: 5px;'>검색 총수량 ({n_results}건)</h3>", unsafe_allow_html=True)
+        if nearby:
+            st.caption(f"📍 {nearby['label']} 기준 {nearby['radius_km']:g}km 이내 · 보유처 {len(nearby['distances'])}곳 (가까운 순)")
+        if serial:
+            kind_txt = {"exact": "일치", "prefix": "앞자리 일치", "suffix": "뒷자리 일치"}[serial['kind']]
+            more_txt = f" · 처음 {SERIAL_MAX_MATCHES}건만 표시 (전체 {serial['total']}건)" if serial['total'] > n_results else ""
+            st.caption(f"🔎 일련번호 '{serial['query']}' {kind_txt} (번호순){more_txt}")
+        if aging:
+            office_txt = ""
+            if aging['widened']: office_txt = " · 출고일이 없는 사무실 재고 대신 전체 지역에서 조회"
+            elif aging['office_dropped']: office_txt = " · 출고일이 없는 사무실 재고는 제외"
+            st.caption(f"⏳ 출고 후 {aging['min_age']}일 이상{office_txt}")
         st.markdown("<hr style='margin: 0px; padding: 0px; border: 0px; border-top: 1px solid #e0e0e0;'>", unsafe_allow_html=True)
 
-        if not list_df.empty:
+        if n_results:
             map_col, list_col = st.columns([6, 4])
 
             # 왼쪽: 지도 뷰
             with map_col:
                 clicked_name = st.session_state['clicked_store_name']
                 
-                if not map_df.empty:
-                    min_lat = map_df['cached_lat'].min()
-                    max_lat = map_df['cached_lat'].max()
-                    min_lon = map_df['cached_lon'].min()
-                    max_lon = map_df['cached_lon'].max()
-
-                    c_lat = (min_lat + max_lat) / 2
-                    c_lon = (min_lon + max_lon) / 2
-                    
-                    m = folium.Map(location=[c_lat, c_lon], zoom_start=10)
-                    m.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]], max_zoom=12)
-                    
-                    if gesture_handling_available:
-                        try: GestureHandling().add_to(m)
-                        except: pass
-                    
-                    groups = map_df.groupby(['cached_lat', 'cached_lon', real_boyu])
-
-                    for (lat, lon, name), g in groups:
-                        u_cols = g[real_color].unique()
-                        
-                        is_office = "반추" in str(name)
-                        
-                        if len(u_cols) == 1:
-                            c_name = u_cols[0]
-                            hex_c, _ = get_real_color(c_name)
-                            if hex_c.upper() == '#FFFFFF': bg_c, ic_c = "rgba(0,0,0,0.4)", "white"
-                            else: bg_c, ic_c = "rgba(255,255,255,0.8)", hex_c
-                        else: bg_c, ic_c = "rgba(128,0,128,0.8)", "white"
-
-                        z = 1000 if st.session_state['clicked_store_name'] == name else 1
-                        if st.session_state['clicked_store_name'] == name: bg_c, ic_c = "rgba(255,0,0,0.85)", "white"
-
-                        icon_shape = "fa-mobile"
-                        border_style = "border-radius: 50%;"
-                        if is_office:
-                            icon_shape = "fa-star"
-                            bg_c = "rgba(255, 255, 0, 0.9)"
-                            ic_c = "red"
-                            border_style = "border-radius: 10%; border: 2px solid red;"
-
-                        t_rows = ""
-                        td_style = "border:1px solid #000; padding:5px; text-align:center;"
-                        
-                        agg_cols = [real_model]
-                        if real_color: agg_cols.append(real_color)
-                        if real_status: agg_cols.append(real_status)
-                        if real_target: agg_cols.append(real_target)
-                        
-                        summary_g = g.groupby(agg_cols, dropna=False).size().reset_index(name='count')
-                        
-                        for _, r in summary_g.iterrows():
-                            cn = r[real_color] if real_color and pd.notna(r[real_color]) else "-"
-                            stt = r[real_status] if real_status and pd.notna(r[real_status]) else "-"
-                            
-                            # [수정] 반추정보통신인 경우 팝업창 출고일 미표기(-) 처리
-                            if "반추" in str(name):
-                                tgt = "-"
-                            else:
-                                tgt = r[real_target] if real_target and pd.notna(r[real_target]) else "-"
-                                
-                            qty = r['count']
-                            
-                            t_rows += f"<tr><td style='{td_style}'>{r[real_model]}</td><td style='{td_style}'>{cn}</td><td style='{td_style}'>{stt}</td><td style='{td_style}'>{tgt}</td><td style='{td_style}'>{qty}</td></tr>"
-
-                        region_txt = g['cached_region'].iloc[0]
-                        popup_title = f"{region_txt} - {name}"
-
-                        popup_html = f"""
-                        <div style='width:100%; min-width:280px; font-family:sans-serif;'>
-                            <div style='font-size:14px; font-weight:bold; color:#000; margin-bottom:10px; text-align:center; border-bottom:1px solid #ddd; padding-bottom:5px;'>
-                                {popup_title}
-                            </div>
-                            
-                            <table style='width:100%; border-collapse:collapse; font-size:11px;'>
-                                <thead>
-                                    <tr style='background-color:#f0f0f0;'>
-                                        <th style='border:1px solid #000; padding:5px; text-align:center; white-space:nowrap;'>모델</th>
-                                        <th style='border:1px solid #000; padding:5px; text-align:center; white-space:nowrap;'>색상</th>
-                                        <th style='border:1px solid #000; padding:5px; text-align:center; white-space:nowrap;'>상태</th>
-                                        <th style='border:1px solid #000; padding:5px; text-align:center; white-space:nowrap;'>출고일</th>
-                                        <th style='border:1px solid #000; padding:5px; text-align:center; white-space:nowrap;'>수량</th>
-                                    </tr>
-                                </thead>
-                                <tbody>
-                                    {t_rows}
-                                </tbody>
-                            </table>
-                            
-                            <div style='text-align:right; font-size:11px; font-weight:bold; margin-top:10px;'>
-                                총: {len(g)}대
-                            </div>
-                        </div>
-                        """
-                        
-                        icon_html = f"""
-                        <div style="
-                            background-color: {bg_c};
-                            color: {ic_c};
-                            width: 24px;
-                            height: 24px;
-                            {border_style}
-                            display: flex;
-                            justify-content: center;
-                            align-items: center;
-                            font-size: 12px;
-                            box-shadow: 1px 1px 3px rgba(0,0,0,0.3);">
-                            <i class="fa {icon_shape}"></i>
-                        </div>
-                        """
-                        
-                        folium.Marker(
-                            location=[lat, lon],
-                            icon=folium.DivIcon(html=icon_html),
-                            popup=folium.Popup(popup_html, max_width=400),
-                            z_index_offset=z
-                        ).add_to(m)
-
-                    st_folium(m, width="100%", height=450, returned_objects=[])
+                # [성능 개선] 보유처 마커를 하나의 JSON 레이어로 묶어 브라우저에서 그림 (많으면 클러스터)
+                # 지도 본체는 선택과 무관하게 같은 스크립트가 되므로, 목록 클릭 시에는 강조 레이어만 교체됩니다.
+                with run_metrics.stage("map_records") as s:
+                    records = load_map_records(data_key, result.map_key, df, result.map_positions, col_roles) if len(result.map_positions) else None
+                    s['rows'] = len(records[1]) if records else 0
+                if records and records[1]:
+                    # 화면 영역 모드: 지도를 움직일 때마다 보이는 범위만 (줌이 낮으면 지역/시군구 묶음으로) 다시 받음
+                    viewport_mode = st.toggle("🗺️ 보이는 영역만 불러오기", key="map_viewport",
+                                              help="전국 조회처럼 보유처가 많을 때 지도를 가볍게 유지합니다. 확대하면 개별 보유처가 표시됩니다.")
+                    with run_metrics.stage("map_build") as s:
+                        m = build_inventory_map(records, markers=not viewport_mode)
+                        layers = [selection_layer(records, clicked_name, nearby)]
+                        if viewport_mode:
+                            view = st.session_state.get('map_view') or {}
+                            if view.get('map_key') != result.map_key: view = {}
+                            vp_layer, vp_stats = load_map_viewport(data_key, result.map_key, df, result.map_positions, col_roles).layer(view.get('bounds'), view.get('zoom'))
+                            layers.insert(0, vp_layer)
+                            s.update(vp_stats)
+
+                    # 주변 조회 기준을 지도 클릭으로 고를 때만 클릭 위치를 돌려받음 (그 외에는 지도 조작으로 재실행되지 않음)
+                    pick_point = st.session_state.get('nearby_base') == "지도 클릭 위치"
+                    returned = (["last_clicked"] if pick_point else []) + (["bounds", "zoom"] if viewport_mode else [])
+                    with run_metrics.stage("map_send") as s:
+                        map_state = st_folium(m, width="100%", height=450, returned_objects=returned,
+                                              feature_group_to_add=layers, key="inventory_map",
+                                              on_change=partial(remember_map_view, result.map_key) if viewport_mode else None)
+                        # 지도 HTML 전체가 아닌 마커 데이터(JSON) 크기 (HTML 을 다시 렌더링하지 않도록, st_folium 이 붙인 레이어 포함)
+                        s['payload_bytes'] = map_payload_bytes(m)
+                    clicked_point = (map_state or {}).get("last_clicked") if pick_point else None
+                    if clicked_point:
+                        point = (round(clicked_point["lat"], 6), round(clicked_point["lng"], 6))
+                        if point != st.session_state.get('nearby_point'):
+                            st.session_state['nearby_point'] = point
+                            st.session_state['nearby_open'] = True
+                            finish_run()
+                            st.rerun()
 
                 else:
                     st.info("지도 데이터 없음")
 
             # 오른쪽: 리스트 뷰
             with list_col:
-                sort_order = st.radio("목록 정렬", ["내림차순", "오름차순"], index=0, horizontal=True, label_visibility="collapsed", key="result_sort")
-                is_ascending = True if sort_order == "오름차순" else False
-                list_df = list_df.sort_values(by=real_boyu, ascending=is_ascending)
-
-                with st.container(height=500):
-                    st.markdown("""<style>
-                        div[data-testid="stVerticalBlock"] > div[style*="flex-direction: column;"] > div[data-testid="stVerticalBlock"] {
-                            gap: 1px !important; 
-                        }
-                    </style>""", unsafe_allow_html=True)
-                    
-                    for idx, row in list_df.head(100).iterrows():
-                        nm = str(row[real_boyu])
-                        r_mod = row[real_model] if pd.notna(row[real_model]) else '-'
-                        r_col = row[real_color] if real_color and pd.notna(row[real_color]) else '-'
-                        r_stat = row[real_status] if real_status and pd.notna(row[real_status]) else '-'
-                        
-                        # [수정] 반추정보통신인 경우 리스트 출고일 미표기(-) 처리
-                        if "반추" in nm:
-                            r_tgt = "-"
+                with run_metrics.stage("list") as s:
+                    if nearby:
+                        # 주변 조회 결과는 가까운 보유처 순서 그대로
+                        sort_order = "가까운순"
+                        list_positions = result.positions
+                    elif serial:
+                        # 일련번호 조회 결과는 번호순 그대로
+                        sort_order = "번호순"
+                        list_positions = result.positions
+                    else:
+                        sort_order = st.radio("목록 정렬", ["내림차순", "오름차순", "오래된순"], index=0, horizontal=True, label_visibility="collapsed", key="result_sort")
+                        if sort_order == "오래된순":
+                            list_positions = inv_index.order_by_shipped(result.positions)
                         else:
-                            r_tgt = row[real_target] if real_target and pd.notna(row[real_target]) else '-'
-                            
-                        r_serial = str(row[real_serial]) if real_serial and pd.notna(row[real_serial]) else '-'  # <-- [추가된 부분] 일련번호 할당
-                        
-                        # <-- [수정된 부분] 데이터 상세 문자열에 일련번호 추가
-                        det = f"{r_mod} | {r_col} | {r_stat} | {r_tgt} | {r_serial}"
-                        
-                        is_selected = st.session_state['clicked_store_name'] == str(row[real_boyu])
-                        prefix = "✅ " if is_selected else ""
-                        button_label = f"{prefix}{nm}  :  {det}"
-                        
-                        if st.button(button_label, key=f"btn_{idx}", use_container_width=True):
-                            st.session_state['selected_idx'] = idx
-                            st.session_state['clicked_store_name'] = str(row[real_boyu])
-                            st.rerun()
+                            is_ascending = True if sort_order == "오름차순" else False
+                            list_positions = inv_index.order_by_owner(result.positions, ascending=is_ascending)
+
+                    # [성능 개선] 행마다 버튼을 만들지 않고 페이지 단위 표 하나로 표시 (전체 결과 열람 가능)
+                    # 현재 페이지 행만 공용 데이터에서 꺼내 표시
+                    n_pages = page_count(n_results)
+                    st.session_state['result_page'] = min(max(int(st.session_state.get('result_page', 1)), 1), n_pages)
+                    page = st.number_input(f"페이지 (1~{n_pages})", min_value=1, max_value=n_pages, step=1, key="result_page")
+                    rows = page_slice(n_results, page)
+                    page_df = df.iloc[list_positions[rows]]
+                    st.caption(f"{rows.start + 1}~{rows.stop} / {n_results}건")
+
+                    list_key = f"result_list_{result.list_key[:12]}_{sort_order}_{page}"
+                    st.dataframe(
+                        pd.DataFrame({"목록": row_labels(page_df, col_roles, clicked_name, nearby['distances'] if nearby else None).to_numpy()}),
+                        hide_index=True, width="stretch", height=500,
+                        on_select=partial(select_list_row, list_key, page_df.index.tolist(), page_df[real_boyu].tolist()),
+                        selection_mode="single-row", key=list_key,
+                    )
+                    s['rows'] = len(page_df)
+
+                # [성능 개선] 결과 내보내기: 누를 때 별도 스레드에서 공용 데이터의 결과 행만 묶음 단위로 파일에 씀
+                # (이번 실행의 데이터 묶음/행 순서를 그대로 쓰므로 그 사이 새 버전이 올라와도 화면과 같은 결과)
+                c_fmt, c_down = st.columns([3, 2], vertical_alignment="center")
+                export_fmt = c_fmt.radio("내보내기 형식", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0],
+                                         horizontal=True, label_visibility="collapsed", key="export_format")
+                c_down.download_button(f"⬇️ 전체 {n_results}건 받기", data=partial(export_rows, df, list_positions, export_fmt),
+                                       file_name=export_file_name(f"재고조회_{time.strftime('%Y%m%d_%H%M')}", export_fmt),
+                                       mime=EXPORT_FORMATS[export_fmt][2], on_click="ignore", key="export_download", width="stretch",
+                                       help=export_summary(df))
 
         else:
-            st.warning("조건에 맞는 결과가 없습니다.")
\ No newline at end of file
+            st.warning("조건에 맞는 결과가 없습니다.")
+
+finish_run()
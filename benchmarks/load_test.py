@@ -0,0 +1,356 @@
+"""동시 접속 부하 테스트 (app.py 를 브라우저 없이 실행)
+
+Streamlit AppTest 로 app.py 세션 N 개를 한 프로세스에서 동시에 돌립니다.
+실제 서버처럼 세션마다 스크립트가 별도 스레드에서 실행되고, 공용 데이터(cache_resource)는 모든 세션이 함께 씁니다.
+(AppTest 는 한 세션용이므로 컴파일된 스크립트와 Runtime 을 서버처럼 세션 간에 공유하도록 맞춤)
+세션마다 아래 흐름을 --flows 번 반복하며 단계별 재실행(rerun) 시간을 잽니다.
+- open     : 첫 화면
+- models   : 모델 1~2개 선택
+- regions  : 지역 선택 (사무실 / 권역 1~2개 / 전체)
+- search   : 🚀 조회하기
+- row      : 결과 목록 행 클릭 (선택 콜백과 같은 세션 상태를 넣고 재실행)
+- sort     : 목록 정렬(result_sort) 변경
+
+합성 재고 파일(synth_inventory.py)을 크기별로 만들어 각 크기마다 빈 버전 보관소에서 시작합니다.
+(첫 세션의 첫 화면이 적재를 맡으므로 cold_load 로 따로 기록하고, 이후 세션은 적재된 데이터를 공유)
+
+단계별로 재실행 시간 p50/p95/p99, 단계가 끝났을 때의 최대 RSS, 지도 마커 데이터 크기(map_send payload_bytes, 지도 HTML 전체가 아닌 마커 JSON)를 보고합니다.
+결과는 JSON 으로 저장해 커밋 간 비교합니다.
+
+사용법:
+    python benchmarks/load_test.py --rows 10000 --sessions 8 --flows 3
+    python benchmarks/load_test.py --rows 1000 100000 --sessions 20 --think-ms 200
+    python benchmarks/load_test.py --rows 10000 --compare benchmarks/results/이전결과.json
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import sys
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit import config  # noqa: E402
+from streamlit.testing.v1 import AppTest, app_test  # noqa: E402
+
+from run_benchmarks import RESULTS_DIR, git_commit, synth_file  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+STEPS = ["open", "models", "regions", "search", "row", "sort"]
+REGION_CHOICES = [["사무실"], ["동남"], ["서남", "서북"], ["인천", "강원"], ["전체"]]
+SORT_CHOICES = ["오름차순", "오래된순", "내림차순"]
+PERCENTILES = (50, 95, 99)
+RSS_SAMPLE_SECONDS = 0.05
+# 선택지 표시의 수량 꼬리표 "모델 (123)" -> 실제 값 "모델"
+_COUNT_SUFFIX = re.compile(r" \(\d+\)$")
+
+
+# AppTest 는 실행마다 새 ScriptCache 로 app.py 를 다시 컴파일하지만, 실제 서버는 모든 세션이 컴파일된 스크립트 하나를 공유합니다.
+# 서버와 같게 (또 동시에 컴파일하다 나는 ast 오류 없이) 프로세스 공용 캐시 하나로 돌림
+_SHARED_SCRIPTS = ScriptCache()
+_compile_script = ScriptCache.get_bytecode
+ScriptCache.get_bytecode = lambda self, script_path: _compile_script(_SHARED_SCRIPTS, script_path)
+
+# AppTest 는 한 번에 한 세션만 실행한다고 보고 실행이 끝나면 전역 Runtime 을 지웁니다.
+# 동시 세션에서는 다른 세션이 아직 실행 중이므로, 지워진 뒤에도 마지막 Runtime 을 계속 쓰게 함
+_last_runtime = [None]
+
+
+def _runtime_instance(cls):
+    runtime = cls._instance
+    if runtime is not None: _last_runtime[0] = runtime
+    elif _last_runtime[0] is not None: return _last_runtime[0]
+    else: raise RuntimeError("Runtime hasn't been created!")
+    return runtime
+
+
+Runtime.instance = classmethod(_runtime_instance)
+Runtime.exists = classmethod(lambda cls: cls._instance is not None or _last_runtime[0] is not None)
+
+# AppTest 는 실행마다 설정(global.appTest)을 잠시 바꿨다 되돌리는데, 동시에 실행하면 다른 세션 실행 도중에 되돌려짐
+# → 프로세스 전체에 한 번 켜 두고 실행마다 바꾸지 않음
+config.set_option("global.appTest", True)
+app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+class RssSampler:
+    # 백그라운드에서 RSS 를 주기적으로 읽어 최댓값 보관 (ru_maxrss 는 프로세스 전체 기간 최댓값이라 크기별로 못 나눔)
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+# ==============================================================================
+# 세션 한 개의 흐름
+# ==============================================================================
+def _widget(at, kind, label):
+    found = [w for w in getattr(at, kind) if w.label == label]
+    return found[0] if found else None
+
+
+def _options(widget):
+    return [_COUNT_SUFFIX.sub("", o) for o in widget.options if o != "전체"]
+
+
+def _map_bytes(record):
+    return next((s.get("payload_bytes") for s in (record or {}).get("stages", []) if s["stage"] == "map_send"), None)
+
+
+def _list_owners(at):
+    # 결과 목록 표의 보유처 ("[✅ ]보유처[ (거리)]  :  ...")
+    for frame in at.dataframe:
+        value = frame.value
+        if list(value.columns) == ["목록"]:
+            return [str(v).split("  :  ")[0].removeprefix("✅ ").split(" (")[0] for v in value["목록"]]
+    return []
+
+
+class Session:
+    def __init__(self, sid, rnd, timeout, think):
+        self.sid = sid
+        self.rnd = rnd
+        self.timeout = timeout
+        self.think = think
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.samples = []   # (단계, 초, 지도 bytes, 오류)
+
+    def step(self, name, action=None):
+        if self.think: time.sleep(self.rnd.uniform(0, 2 * self.think))
+        error = None
+        t = time.perf_counter()
+        try:
+            if action is None: self.at.run()
+            else: action()
+            if self.at.exception: error = self.at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        dt = time.perf_counter() - t
+        record = None
+        try: record = self.at.session_state["last_metrics"]
+        except (KeyError, AttributeError): pass
+        self.samples.append((name, dt, _map_bytes(record), error, rss_mb()))
+        return error is None
+
+    def flow(self, first):
+        at, rnd = self.at, self.rnd
+        if first and not self.step("open"): return
+        models = _widget(at, "multiselect", "모델")
+        if models is None: return
+        pick = rnd.sample(_options(models), k=min(len(_options(models)), rnd.choice([1, 2])))
+        if not self.step("models", lambda: models.set_value(pick).run()): return
+        regions = _widget(at, "multiselect", "지역")
+        if not self.step("regions", lambda: regions.set_value(rnd.choice(REGION_CHOICES)).run()): return
+        button = next(b for b in at.button if "조회하기" in b.label)
+        if not self.step("search", lambda: button.click().run()): return
+        owners = _list_owners(at)
+        if owners:
+            # st.dataframe 행 선택은 AppTest 로 누를 수 없으므로, 선택 콜백(select_list_row)이 넣는 상태를 그대로 넣고 재실행
+            def click_row():
+                at.session_state["clicked_store_name"] = rnd.choice(owners)
+                at.run()
+            if not self.step("row", click_row): return
+        sort = [r for r in at.radio if r.key == "result_sort"]
+        if sort: self.step("sort", lambda: sort[0].set_value(rnd.choice(SORT_CHOICES)).run())
+
+
+def run_session(session, flows, barrier):
+    barrier.wait()
+    for i in range(flows): session.flow(first=(i == 0))
+
+
+# ==============================================================================
+# 크기별 실행
+# ==============================================================================
+def prepare_app_dir(workdir, data_path, n_rows):
+    # 크기마다 빈 보관소에서 시작 (첫 접속이 inventory_data.xlsx 를 첫 버전으로 가져옴)
+    app_dir = os.path.join(workdir, f"app-{n_rows}")
+    shutil.rmtree(app_dir, ignore_errors=True)
+    os.makedirs(app_dir)
+    shutil.copyfile(data_path, os.path.join(app_dir, "inventory_data.xlsx"))
+    return app_dir
+
+
+def summarize(samples):
+    by_step = defaultdict(list)
+    for name, dt, map_bytes, error, rss in samples: by_step[name].append((dt, map_bytes, error, rss))
+    out = {}
+    for name in STEPS + sorted(set(by_step) - set(STEPS)):
+        rows = by_step.get(name)
+        if not rows: continue
+        ok = [dt for dt, _, error, _ in rows if error is None]
+        sizes = [b for _, b, error, _ in rows if b is not None and error is None]
+        out[name] = {
+            "n": len(rows),
+            "errors": len(rows) - len(ok),
+            **{f"p{p}_ms": round(float(np.percentile(ok, p)) * 1000, 1) if ok else None for p in PERCENTILES},
+            "max_ms": round(max(ok) * 1000, 1) if ok else None,
+            "peak_rss_mb": round(max(rss for *_, rss in rows), 1),
+            "map_bytes_p50": int(np.percentile(sizes, 50)) if sizes else None,
+            "map_bytes_max": max(sizes) if sizes else None,
+        }
+    return out
+
+
+def run_size(data_path, n_rows, args):
+    app_dir = prepare_app_dir(args.workdir, data_path, n_rows)
+    cwd = os.getcwd()
+    os.chdir(app_dir)
+    # 공용 데이터 보관소/지도 캐시는 프로세스 전역이므로 크기마다 비움 (보관소 경로가 같은 상대 경로)
+    st.cache_resource.clear()
+    try:
+        with RssSampler() as sampler:
+            rss_before = rss_mb()
+            # 첫 접속: 적재 + 인덱스 생성 포함
+            warm = Session(-1, random.Random(args.seed), args.timeout, 0)
+            t = time.perf_counter()
+            warm.at.run()
+            cold = time.perf_counter() - t
+            if warm.at.exception: raise RuntimeError(f"app.py 실행 실패: {warm.at.exception[0].message}")
+            rss_loaded = rss_mb()
+
+            sessions = [Session(i, random.Random(args.seed * 1000 + i), args.timeout, args.think_ms / 1000)
+                        for i in range(args.sessions)]
+            barrier = threading.Barrier(len(sessions))
+            threads = [threading.Thread(target=run_session, args=(s, args.flows, barrier), name=f"session-{s.sid}")
+                       for s in sessions]
+            t = time.perf_counter()
+            for th in threads: th.start()
+            for th in threads: th.join()
+            wall = time.perf_counter() - t
+        samples = [x for s in sessions for x in s.samples]
+        errors = sorted({x[3] for x in samples if x[3]})
+        return {
+            "sessions": args.sessions,
+            "flows": args.flows,
+            "cold_load_ms": round(cold * 1000, 1),
+            "wall_s": round(wall, 2),
+            "reruns": len(samples),
+            "reruns_per_s": round(len(samples) / wall, 1) if wall else None,
+            "rss_before_mb": round(rss_before, 1),
+            "rss_loaded_mb": round(rss_loaded, 1),
+            "peak_rss_mb": round(sampler.peak, 1),
+            "steps": summarize(samples),
+            "errors": errors[:20],
+        }
+    finally:
+        os.chdir(cwd)
+        if not args.keep: shutil.rmtree(app_dir, ignore_errors=True)
+
+
+def print_result(n_rows, res):
+    print(f"[{n_rows} rows] sessions={res['sessions']} flows={res['flows']} cold_load={res['cold_load_ms']:.0f}ms "
+          f"reruns={res['reruns']} ({res['reruns_per_s']}/s) rss={res['rss_before_mb']:.0f}->{res['rss_loaded_mb']:.0f}MB "
+          f"peak={res['peak_rss_mb']:.0f}MB")
+    print(f"  {'step':<8} {'n':>4} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'rss MB':>7} {'map bytes':>10}")
+    for name, s in res["steps"].items():
+        ms = ["-" if s[k] is None else f"{s[k]:.0f}" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")]
+        size = "-" if s["map_bytes_max"] is None else f"{s['map_bytes_max']:,}"
+        print(f"  {name:<8} {s['n']:>4} {s['errors']:>4} {ms[0]:>8} {ms[1]:>8} {ms[2]:>8} {ms[3]:>8} {s['peak_rss_mb']:>7.0f} {size:>10}")
+    for e in res["errors"]: print(f"  ! {e}")
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\n비교 기준: {baseline_path} ({base['meta'].get('commit')})")
+    for size, res in current["results"].items():
+        old = base["results"].get(size)
+        if old is None: continue
+        print(f"[{size} rows]")
+        for step, s in res["steps"].items():
+            prev = old["steps"].get(step)
+            if not prev or prev.get("p95_ms") is None or s.get("p95_ms") is None: continue
+            ratio = s["p95_ms"] / prev["p95_ms"] if prev["p95_ms"] else float("nan")
+            print(f"  {step:<8} p95 {prev['p95_ms']:8.0f} ms -> {s['p95_ms']:8.0f} ms  (x{ratio:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="재고 대시보드 동시 접속 부하 테스트")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000], help="합성 재고 행 수 (여러 개면 크기별로 실행)")
+    parser.add_argument("--sessions", type=int, default=8, help="동시 세션 수")
+    parser.add_argument("--flows", type=int, default=3, help="세션마다 흐름 반복 횟수")
+    parser.add_argument("--think-ms", type=float, default=0, help="단계 사이 평균 대기 (0 이면 쉬지 않고 재실행)")
+    parser.add_argument("--timeout", type=float, default=300, help="재실행 한 번의 최대 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(ROOT, "benchmarks", ".data"))
+    parser.add_argument("--keep", action="store_true", help="크기별 앱 작업 폴더(버전 보관소/지표 로그)를 남김")
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    args.workdir = os.path.abspath(args.workdir)
+    commit = git_commit()
+    out = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "streamlit": st.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "sessions": args.sessions,
+            "flows": args.flows,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for n in args.rows:
+        res = run_size(synth_file(args.workdir, n, args.seed), n, args)
+        out["results"][str(n)] = res
+        print_result(n, res)
+    out["meta"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"load-{stamp}-{commit}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"saved: {output}")
+
+    if args.compare:
+        compare(out, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""단계별 성능 측정 (Streamlit 없이 실행)
+
+합성 재고 파일(synth_inventory.py)을 크기별로 만들고, 앱의 처리 단계를 따로따로 잽니다.
+- parse        : xlsx 파싱 (필요 컬럼만 스트리밍)
+- parse_pandas : pd.read_excel 경로 (--with-pandas 일 때만, 느림)
+- geocode      : 보유처 좌표 계산
+- classify     : 지역/시군구 분류
+- ingest_serial / ingest_parallel : 같은 행을 --sheets 개 시트로 나눈 파일의 전체 적재 (한 프로세스 / 프로세스 풀)
+- index        : 조회 인덱스 + 검색 선택지(facet) 생성
+- search       : 대표 조회 조건 묶음 (캐시 없이) / search_cached: 같은 조건 재조회
+- aging        : 전체 재고 중 출고 후 90일 이상 조회 + 오래된순 정렬
+- spatial_index / nearby : 보유처 공간 인덱스 생성 / 보유처 기준 가까운 10곳 + 반경 5km 조회 묶음
+- serial_index / serial_lookup : 일련번호 인덱스 생성 / 전체·앞자리·뒷자리·없는 번호 조회 묶음
+- cube / pivot : 집계 큐브 생성 / 요약표(지역×모델, 통합모델×색상, 보유처) + 지역별 수량 조회 묶음 (cube_cells 기록)
+- engine       : 조회 엔진(query_engine)으로 대표 조회 묶음을 행 목록(50행) + 보유처별 수량 JSON 까지 (engine_qps 기록)
+- export_csv / export_xlsx : 전국 조회 결과 전체 내보내기 (export_rows, export_csv_bytes / export_xlsx_bytes 기록)
+- popup_agg    : 전국 조회 결과의 지도 마커/팝업 집계
+- map_render   : folium 지도 HTML 생성 (map_html_bytes / map_payload_bytes 도 기록)
+- map_viewport : 화면 영역 모드 준비 + 전국/수도권/시내 화면 레이어 (viewport_payload_bytes 는 그중 최대)
+
+결과는 JSON 으로 저장해 커밋 간 비교합니다.
+
+사용법:
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+    python benchmarks/run_benchmarks.py --sizes 1000000 --repeat 1
+    python benchmarks/run_benchmarks.py --sizes 100000 --sheets 8 --workers 8
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/이전결과.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from dataset_store import build_dataset  # noqa: E402
+from facets import MODEL_GROUPS, FacetEngine  # noqa: E402
+from geocode import DEFAULT_BASE, classify_series, geocode_series  # noqa: E402
+from ingest import (city_of_store, enrich_inventory, first_boyu_column, load_inventory,  # noqa: E402
+                    map_categories, normalize_store_name, read_excel_fallback, read_xlsx_projected,
+                    region_of_store)
+from inventory_cube import InventoryCube  # noqa: E402
+from inventory_index import InventoryIndex, SearchCache, age_cutoff  # noqa: E402
+from query_engine import QueryEngine  # noqa: E402
+from result_export import export_rows  # noqa: E402
+from serial_index import SerialIndex  # noqa: E402
+from spatial_index import StoreSpatialIndex  # noqa: E402
+from map_render import (MarkerViewport, StoreMarkerLayer, build_inventory_map, build_store_records,  # noqa: E402
+                        map_payload_bytes, store_cities)
+from synth_inventory import write_xlsx  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def timed(fn, repeat):
+    # repeat 회 중 최솟값 (초)과 마지막 결과
+    best, result = None, None
+    for _ in range(max(1, repeat)):
+        t = time.perf_counter()
+        result = fn()
+        dt = time.perf_counter() - t
+        best = dt if best is None else min(best, dt)
+    return best, result
+
+
+def synth_file(workdir, n_rows, seed, sheets=1):
+    suffix = "" if sheets == 1 else f"-x{sheets}"
+    path = os.path.join(workdir, f"synth-{n_rows}-s{seed}{suffix}.xlsx")
+    if not os.path.exists(path):
+        write_xlsx(path, n_rows, seed, sheets)
+    return path
+
+
+def search_queries(index):
+    # 현장에서 자주 쓰는 조회 모양: 모델 1~2개 + 사무실, 모델 그룹 전국, 전 모델 전국, 특정 보유처
+    models = index.model.categories if index.model is not None else []
+    owners = index.owner.categories if index.owner is not None else []
+    queries = []
+    for group in MODEL_GROUPS.values():
+        queries.append(dict(models=group, regions=["사무실"]))
+        queries.append(dict(models=group, regions=["전체"]))
+    if len(models):
+        queries.append(dict(models=models[:2], colors=["전체"], regions=["사무실", "동남", "서남"]))
+        queries.append(dict(models=list(models), regions=["전체"]))
+    if len(owners):
+        queries.append(dict(owners=owners[:3], regions=["전체"]))
+    return queries
+
+
+def run_size(path, repeat, with_pandas, sheets_path=None, workers=None):
+    stages, info = {}, {}
+
+    stages["parse"], (raw, roles) = timed(lambda: read_xlsx_projected(path), repeat)
+    if with_pandas:
+        stages["parse_pandas"], _ = timed(lambda: read_excel_fallback(path), 1)
+    info["rows"] = len(raw)
+
+    boyu_col = first_boyu_column(raw.columns)
+    owners = map_categories(raw[boyu_col], normalize_store_name)
+    info["owners"] = int(owners.nunique())
+    stages["geocode"], _ = timed(lambda: geocode_series(owners, *DEFAULT_BASE), repeat)
+    stages["classify"], _ = timed(
+        lambda: (classify_series(owners, region_of_store), classify_series(owners, city_of_store)), repeat)
+
+    if sheets_path is not None:
+        stages["ingest_serial"], _ = timed(lambda: load_inventory(sheets_path, max_workers=1), repeat)
+        stages["ingest_parallel"], multi = timed(lambda: load_inventory(sheets_path, max_workers=workers), repeat)
+        info["ingest_workers"] = multi.attrs['load_stats'].get('workers', 1)
+
+    df = enrich_inventory(raw.copy(), roles=roles)
+    df.attrs['col_roles'] = roles
+
+    def build_index():
+        index = InventoryIndex(df)
+        return index, FacetEngine(index, MODEL_GROUPS)
+    stages["index"], (index, _) = timed(build_index, repeat)
+
+    queries = search_queries(index)
+    stages["search"], _ = timed(lambda: [index.search(**q) for q in queries], repeat)
+    cache = SearchCache(index)
+    for q in queries: cache.search(**q)
+    stages["search_cached"], _ = timed(lambda: [cache.search(**q) for q in queries], repeat)
+    info["queries"] = len(queries)
+
+    # 합성 데이터의 출고일은 2025년이므로 기준일을 고정
+    cutoff = age_cutoff(90, today=np.datetime64('2025-12-31'))
+    stages["aging"], aged = timed(lambda: index.order_by_shipped(index.search(regions=["전체"], shipped_by=cutoff)), repeat)
+    info["aging_rows"] = len(aged)
+
+    stages["spatial_index"], spatial = timed(lambda: StoreSpatialIndex(df, index), repeat)
+    centers = [spatial.store_point(n) for n in spatial.located_names()[::max(1, spatial.n_located // 50)]]
+    held = spatial.stores_holding(index.search(models=list(index.model.categories[:2]), regions=["전체"]))
+
+    def nearby():
+        for lat, lon in centers:
+            spatial.nearest(lat, lon, 10, allowed=held)
+            spatial.within(lat, lon, 5.0)
+    stages["nearby"], _ = timed(nearby, repeat)
+    info["nearby_queries"] = 2 * len(centers)
+
+    stages["serial_index"], serials = timed(lambda: SerialIndex(df, roles), repeat)
+    sample = [str(k) for k in serials.keys[::max(1, len(serials) // 200)]]
+    serial_queries = [q for k in sample for q in (k, k[:5], k[-5:], "X" + k)]
+
+    def serial_lookup():
+        for q in serial_queries: serials.lookup(q)
+    stages["serial_lookup"], _ = timed(serial_lookup, repeat)
+    info["serial_queries"] = len(serial_queries)
+
+    stages["cube"], cube = timed(lambda: InventoryCube(index, df['cached_city'], MODEL_GROUPS), repeat)
+    info["cube_cells"] = len(cube)
+    models = list(index.model.categories[:2])
+
+    def pivot():
+        cube.pivot("region", "model")
+        cube.pivot("model_group", "color", {"region": ["사무실"]})
+        cube.pivot("owner", None, {"model": models})
+        for q in queries: cube.counts_by("region", {"model": q.get("models"), "color": q.get("colors")})
+    stages["pivot"], _ = timed(pivot, repeat)
+
+    dataset = build_dataset("bench", df, {})
+    engine = QueryEngine(lambda: dataset)
+    engine_queries = [dict(q, view=view, limit=50) for q in queries for view in ("rows", "stores")]
+    for q in engine_queries: json.dumps(engine.query(**q), ensure_ascii=False)
+
+    def engine_run():
+        for q in engine_queries: json.dumps(engine.query(**q), ensure_ascii=False)
+    stages["engine"], _ = timed(engine_run, repeat)
+    info["engine_qps"] = round(len(engine_queries) / max(stages["engine"], 1e-9))
+
+    # 지도: 전 모델 전국 조회 (도매 제외)
+    national = index.without_wholesale(index.search(models=list(index.model.categories), regions=["전체"]))
+    for fmt in ("csv", "xlsx"):
+        stages[f"export_{fmt}"], data = timed(lambda: export_rows(df, national, fmt), repeat)
+        info[f"export_{fmt}_bytes"] = len(data)
+    map_df = df.iloc[national]
+    stages["popup_agg"], records = timed(lambda: build_store_records(map_df, roles), repeat)
+    info["map_rows"] = len(map_df)
+    info["stores"] = len(records[1])
+
+    def render_map():
+        return build_inventory_map(records).get_root().render()
+    stages["map_render"], html = timed(render_map, repeat)
+    info["map_html_bytes"] = len(html.encode("utf-8"))
+    info["map_payload_bytes"] = len(StoreMarkerLayer(*records).payload.encode("utf-8"))
+
+    views = [(None, None), ([[33.0, 124.5], [38.8, 131.0]], 7), ([[37.3, 126.6], [37.8, 127.3]], 10),
+             ([[37.48, 126.85], [37.56, 126.98]], 13)]
+
+    def render_viewport():
+        viewport = MarkerViewport(records, store_cities(map_df, roles, records))
+        base = build_inventory_map(records, markers=False)
+        sizes = []
+        for bounds, zoom in views:
+            fg, _ = viewport.layer(bounds, zoom)
+            fg.add_to(base)
+            fg.render()
+            sizes.append(map_payload_bytes(fg))
+        return sizes
+    stages["map_viewport"], sizes = timed(render_viewport, repeat)
+    info["viewport_payload_bytes"] = max(sizes)
+    return {"stages": stages, **info}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\n비교 기준: {baseline_path} ({base['meta'].get('commit')})")
+    for size, res in current["results"].items():
+        old = base["results"].get(size)
+        if old is None: continue
+        print(f"[{size} rows]")
+        for stage, sec in res["stages"].items():
+            prev = old["stages"].get(stage)
+            if prev is None: continue
+            ratio = sec / prev if prev else float("nan")
+            print(f"  {stage:<14} {prev * 1000:10.1f} ms -> {sec * 1000:10.1f} ms  (x{ratio:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="재고 대시보드 단계별 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(ROOT, "benchmarks", ".data"))
+    parser.add_argument("--output", default=None, help="결과 JSON 경로 (기본: benchmarks/results/)")
+    parser.add_argument("--with-pandas", action="store_true", help="pd.read_excel 파싱 시간도 측정")
+    parser.add_argument("--sheets", type=int, default=4, help="병렬 적재 측정용 시트 수 (1 이면 생략)")
+    parser.add_argument("--workers", type=int, default=None, help="병렬 적재 프로세스 수 (기본: 시트 수와 CPU 수 중 작은 값)")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    commit = git_commit()
+    out = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for n in args.sizes:
+        path = synth_file(args.workdir, n, args.seed)
+        sheets_path = synth_file(args.workdir, n, args.seed, args.sheets) if args.sheets > 1 else None
+        workers = args.workers or min(args.sheets, os.cpu_count() or 1)
+        res = run_size(path, args.repeat, args.with_pandas, sheets_path, workers)
+        out["results"][str(n)] = res
+        stages = "  ".join(f"{k}={v * 1000:.1f}ms" for k, v in res["stages"].items())
+        print(f"[{n} rows] stores={res['stores']} map_html={res['map_html_bytes']:,}B  {stages}")
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"bench-{stamp}-{commit}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"saved: {output}")
+
+    if args.compare:
+        compare(out, args.compare)
+
+
+if __name__ == "__main__":
+    main()
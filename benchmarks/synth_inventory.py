@@ -0,0 +1,157 @@
+"""합성 재고 엑셀 생성기 (벤치마크용)
+
+실제 재고 파일과 같은 모양의 시트를 만듭니다.
+- 보유처: 좌표 사전(NEIGHBORHOOD_COORDS / DISTRICT_CENTERS) 지명 + 지역 접두어, 도매-/반추 보유처 포함
+- 모델: MODEL_GROUPS 모델 + 기타 모델, 한글 색상명, 재고상태, 일련번호
+- 14번째 컬럼(인덱스 13)이 출고일 (앱의 위치 규칙과 동일)
+- --sheets N: 같은 행을 N 개 시트로 나눠 씀 (지역별 시트를 합치는 병렬 적재 측정용)
+
+100만 행도 만들 수 있도록 openpyxl 대신 시트 XML 을 직접 씁니다. (inline string)
+
+사용법:
+    python benchmarks/synth_inventory.py 100000 /tmp/inv100k.xlsx [--seed 0] [--sheets 4]
+"""
+import argparse
+import os
+import random
+import sys
+import zipfile
+from itertools import accumulate
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from facets import MODEL_GROUPS  # noqa: E402
+from geocode import DISTRICT_CENTERS, NEIGHBORHOOD_COORDS  # noqa: E402
+
+HEADER = ["No", "보유처", "모델명", "색상", "재고상태", "일련번호",
+          "입고처", "입고일", "통신사", "요금제", "담당자", "메모", "구분", "출고일자",
+          "비고1", "비고2"]
+
+EXTRA_MODELS = ["SM-A366N", "SM-S931N", "SM-S936N", "SM-F966N", "SM-A166L", "SM-M366K"]
+COLORS = ["블랙", "화이트", "실버 섀도우", "티타늄 그레이", "티타늄 블루", "블루", "아이스블루",
+          "핑크", "민트", "그린", "골드", "옐로우", "퍼플", "레드", "코랄"]
+STATUSES = ["정상", "A등급", "B등급", "C등급", "불량"]
+REGION_PREFIXES = ["동남", "동북", "서남", "서북", "남부", "강원", "인천", "강변TM", "신도림TM", ""]
+STORE_SUFFIXES = ["점", "직영점", "", "TM", "2호점"]
+
+
+def make_stores(n_stores, rnd):
+    places = list(NEIGHBORHOOD_COORDS) + list(DISTRICT_CENTERS) + ["미지정", "본사창고"]
+    stores = ["반추정보통신", "반추 본사", "반추(물류)"]
+    for i in range(n_stores):
+        place = rnd.choice(places)
+        p = rnd.random()
+        region = rnd.choice(REGION_PREFIXES)
+        if p < 0.08: stores.append(f"도매-{place}{i}")
+        # 매장 코드 접두어(숫자 포함, 지역 분류 시 제거됨) 가 붙은 이름과 지역명으로 시작하는 이름을 섞음
+        elif p < 0.5: stores.append(f"S{rnd.randint(10, 999)}-{region}{place}{rnd.choice(STORE_SUFFIXES)}")
+        else: stores.append(f"{region}-{place}{rnd.choice(STORE_SUFFIXES)}")
+    return stores
+
+
+def iter_rows(n_rows, seed=0, stores_per_1k=40, max_stores=3000):
+    rnd = random.Random(seed)
+    stores = make_stores(min(max_stores, max(10, n_rows * stores_per_1k // 1000)), rnd)
+    models = [m for group in MODEL_GROUPS.values() for m in group] + EXTRA_MODELS
+    # 실제 데이터처럼 일부 모델/보유처에 재고가 몰리도록 가중치 부여
+    model_w = list(accumulate(rnd.uniform(0.5, 5) for _ in models))
+    store_w = list(accumulate(rnd.paretovariate(1.5) for _ in stores))
+    for i in range(n_rows):
+        store = rnd.choices(stores, cum_weights=store_w)[0]
+        color = rnd.choice(COLORS) if rnd.random() > 0.02 else None
+        d = rnd.random()
+        if d < 0.1: shipped = None
+        elif d < 0.5: shipped = f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        elif d < 0.8: shipped = f"2025{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}"
+        else: shipped = f"2025.{rnd.randint(1, 12):02d}.{rnd.randint(1, 28):02d}"
+        yield [
+            i + 1, store, rnd.choices(models, cum_weights=model_w)[0], color, rnd.choice(STATUSES),
+            f"R{rnd.randint(10 ** 9, 10 ** 10 - 1)}",
+            f"입고{rnd.randint(1, 30)}", f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            rnd.choice(["SKT", "KT", "LGU+"]), f"요금제{rnd.randint(1, 20)}", f"담당{rnd.randint(1, 60)}",
+            None if rnd.random() < 0.7 else f"메모{rnd.randint(1, 999)}", rnd.choice(["신규", "기변", "재고"]),
+            shipped, None, f"비고{rnd.randint(1, 99)}",
+        ]
+
+
+def _column_letter(i):
+    s = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def _cell(ref, value):
+    if value is None: return ""
+    if isinstance(value, int): return f'<c r="{ref}"><v>{value}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+{sheets}
+</Types>"""
+_SHEET_TYPE = '<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>{sheets}</sheets>
+</workbook>"""
+_SHEET = '<sheet name="{name}" sheetId="{n}" r:id="rId{n}"/>'
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{sheets}
+</Relationships>"""
+_SHEET_REL = '<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+
+
+def write_xlsx(path, n_rows, seed=0, sheets=1):
+    letters = [_column_letter(i) for i in range(len(HEADER))]
+    numbers = range(1, sheets + 1)
+    names = ["재고"] if sheets == 1 else [f"재고{n}" for n in numbers]
+    # 시트마다 행을 고르게 나눔 (모든 시트에 같은 헤더)
+    bounds = [n_rows * k // sheets for k in range(sheets + 1)]
+    rows = iter_rows(n_rows, seed)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(sheets="\n".join(_SHEET_TYPE.format(n=n) for n in numbers)))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(_SHEET.format(name=name, n=n) for name, n in zip(names, numbers))))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(sheets="\n".join(_SHEET_REL.format(n=n) for n in numbers)))
+        for n in numbers:
+            with zf.open(f"xl/worksheets/sheet{n}.xml", "w") as f:
+                f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+
+                def write_row(r, values):
+                    cells = "".join(_cell(f"{letters[j]}{r}", v) for j, v in enumerate(values))
+                    f.write(f'<row r="{r}">{cells}</row>'.encode("utf-8"))
+
+                write_row(1, HEADER)
+                for r in range(2, bounds[n] - bounds[n - 1] + 2):
+                    write_row(r, next(rows))
+                f.write(b"</sheetData></worksheet>")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="합성 재고 엑셀 생성")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sheets", type=int, default=1)
+    args = parser.parse_args(argv)
+    write_xlsx(args.output, args.rows, args.seed, args.sheets)
+    print(f"{args.output}: {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+
+from facets import MODEL_GROUPS, FacetEngine
+from ingest import load_inventory
+from inventory_cube import InventoryCube
+from inventory_index import InventoryIndex, SearchCache
+from serial_index import SerialIndex
+from snapshot_store import SnapshotStore
+from spatial_index import StoreSpatialIndex
+
+# ==============================================================================
+# 프로세스 공용 데이터 보관소 (버전 스냅샷 + 이중 버퍼)
+# ==============================================================================
+# 모든 세션은 현재 데이터 묶음(Dataset: DataFrame + 인덱스 + 선택지 + 조회 캐시 + 공간 인덱스 + 일련번호 인덱스 + 집계 큐브)을 참조만 합니다.
+# 업로드는 백그라운드 스레드에서 새 버전(snapshot_store)을 끝까지 만든 뒤 현재 버전 표시만 바꾸므로,
+# 처리 중에도 다른 사용자는 기존 데이터로 계속 조회할 수 있습니다.
+# 한 번의 실행(rerun) 동안에는 시작할 때 받은 묶음을 계속 쓰고, 다음 실행에서 새 버전으로 넘어갑니다.
+
+Dataset = namedtuple("Dataset", ["key", "df", "index", "facets", "search_cache", "spatial", "serials", "cube", "meta"])
+
+
+def build_dataset(key, df, meta):
+    index = InventoryIndex(df)
+    cube = InventoryCube(index, df['cached_city'] if 'cached_city' in df.columns else None, MODEL_GROUPS)
+    return Dataset(key, df, index, FacetEngine(index, MODEL_GROUPS), SearchCache(index), StoreSpatialIndex(df, index),
+                   SerialIndex(df, index.roles), cube, meta)
+
+
+class UploadJob:
+    def __init__(self, name):
+        self.name = name
+        self.stage = "대기"
+        self.progress = 0.0
+        self.started = time.time()
+        self.finished = None
+        self.error = None
+        self.delta = None
+
+    @property
+    def running(self):
+        return self.finished is None
+
+    def update(self, stage, progress):
+        self.stage, self.progress = stage, progress
+
+
+class DatasetStore:
+    def __init__(self, root, legacy_file=None, legacy_meta=None):
+        # legacy_file/legacy_meta: 버전 보관소 이전의 고정 경로 파일 (보관소가 비어 있으면 첫 버전으로 가져옴)
+        self.snapshots = SnapshotStore(root)
+        self.legacy_file = legacy_file
+        self.legacy_meta = legacy_meta
+        self.current = None
+        self.job = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def busy(self):
+        job = self.job
+        return job is not None and job.running
+
+    def get(self):
+        # 현재 버전의 데이터 묶음. 이미 올라와 있으면 CURRENT 한 번 읽는 것 외에 잠금/파일 접근 없음
+        version = self.snapshots.current_version()
+        if version is None and self.current is None: version = self._import_legacy()
+        if version is None: return None
+        current = self.current
+        if current is not None and current.key == version: return current
+        with self._load_lock:
+            # 잠금을 기다리는 동안 업로드/되돌리기가 current 와 CURRENT 를 함께 바꿨을 수 있으므로 다시 읽음
+            # (잠금 밖에서 읽은 이전 버전을 다시 올려 새 버전을 덮어쓰지 않도록)
+            version = self.snapshots.current_version()
+            if version is None: return self.current
+            current = self.current
+            if current is None or current.key != version:
+                loaded = self._load(version)
+                # 가리키는 버전을 읽을 수 없으면(정리 중 등) 올라와 있던 묶음을 계속 사용
+                if loaded is None: return current
+                current = self.current = loaded
+        return current
+
+    def _load(self, version):
+        snap = self.snapshots.snapshot(version)
+        if snap is None: return None
+        return build_dataset(version, self.snapshots.load(snap, load_inventory), snap.meta)
+
+    def _import_legacy(self):
+        if self.legacy_file is None or not os.path.exists(self.legacy_file) or self.snapshots.versions(): return None
+        with self._load_lock:
+            if self.snapshots.versions(): return self.snapshots.current_version()
+            name = os.path.basename(self.legacy_file)
+            if self.legacy_meta is not None and os.path.exists(self.legacy_meta):
+                with open(self.legacy_meta, "r", encoding="utf-8") as f: name = f.read() or name
+            with open(self.legacy_file, "rb") as f: data = f.read()
+            version, _ = self.snapshots.create(data, name, load_inventory)
+            self.snapshots.publish(version)
+        return version
+
+    def versions(self):
+        return self.snapshots.versions()
+
+    # --------------------------------------------------------------------------
+    # 업로드 (백그라운드)
+    # --------------------------------------------------------------------------
+    def submit(self, data, name):
+        # 처리 중인 업로드가 있으면 False
+        with self._lock:
+            if self.busy: return False
+            self.job = UploadJob(name)
+        threading.Thread(target=self._run, args=(self.job, bytes(data)), name="inventory-upload", daemon=True).start()
+        return True
+
+    def _run(self, job, data):
+        try:
+            job.update("엑셀 읽기 / 좌표 계산", 0.1)
+            # 직전 데이터는 변경 건수(추가/삭제/변경) 안내에만 사용
+            current = self.current
+            previous = current.df if current is not None else None
+            version, df = self.snapshots.create(data, job.name, partial(load_inventory, previous=previous))
+
+            job.update("인덱스 생성", 0.85)
+            new = build_dataset(version, df, self.snapshots.snapshot(version).meta)
+
+            job.update("교체", 0.95)
+            job.delta = df.attrs.get('delta')
+            with self._load_lock:
+                self.current = new
+                self.snapshots.publish(version)
+            self.snapshots.gc()
+            job.update("완료", 1.0)
+        except Exception as e:
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+
+    # --------------------------------------------------------------------------
+    # 되돌리기 / 초기화
+    # --------------------------------------------------------------------------
+    def rollback(self, version):
+        # 보관 중인 버전을 현재 버전으로. 묶음을 먼저 만든 뒤 표시를 바꾸므로 다른 세션은 기다리지 않음
+        with self._load_lock:
+            new = self._load(version)
+            if new is None: return False
+            self.current = new
+            self.snapshots.publish(version)
+        return True
+
+    def reset(self):
+        # 현재 버전 표시만 비웁니다. (버전은 보관 기간 동안 남아 있어 되돌릴 수 있음)
+        # 처리 중인 업로드가 있으면 False: 끝나면서 새 버전을 게시해 초기화를 되돌려 버리므로
+        with self._lock, self._load_lock:
+            if self.busy: return False
+            self.snapshots.clear()
+            self.current = None
+            self.job = None
+        return True
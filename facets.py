@@ -0,0 +1,127 @@
+from functools import lru_cache
+
+import numpy as np
+
+# ==============================================================================
+# 검색창 선택지(모델 → 색상 → 보유처) 계산
+# ==============================================================================
+# 데이터당 한 번 (모델, 색상) 개수표와 (모델, 색상, 보유처) 조합 개수를 만들어 두고,
+# 선택 상태별 결과는 메모이즈해서 rerun 마다 데이터를 다시 훑지 않습니다.
+# 코드 배열은 InventoryIndex 의 범주 코드를 그대로 사용합니다. (결측 = -1 → +1 해서 0번 칸)
+
+MEMO_SIZE = 256
+
+# 검색창에서 하나로 묶어 보여줄 모델 (표시 이름 → 실제 모델명 목록)
+MODEL_GROUPS = {
+    "SM-F766 (N0/NK 통합)": ["SM-F766N0", "SM-F766NK"],
+    "SM-S937 (N0/NK 통합)": ["SM-S937N0", "SM-S937NK"]
+}
+
+
+def expand_models(selected_display, model_groups):
+    # 화면 선택값(통합 그룹명 포함)을 실제 모델명 목록으로 펼침
+    selected = []
+    for opt in selected_display:
+        if opt in model_groups: selected.extend(model_groups[opt])
+        else: selected.append(opt)
+    return selected
+
+
+def _codes(column, n):
+    if column is None: return np.full(n, -1, dtype=np.int64), []
+    return column.codes.astype(np.int64), column.categories
+
+
+class FacetEngine:
+    def __init__(self, index, model_groups):
+        self.index = index
+        n = index.n
+        m_codes, self.models = _codes(index.model, n)
+        c_codes, self.colors = _codes(index.color, n)
+        o_codes, self.owners = _codes(index.owner, n)
+        self.M, self.C, self.O = len(self.models) + 1, len(self.colors) + 1, len(self.owners) + 1
+
+        # (모델, 색상) 개수표
+        mc = (m_codes + 1) * self.C + (c_codes + 1)
+        self.model_color = np.bincount(mc, minlength=self.M * self.C).reshape(self.M, self.C)
+        self.model_counts = self.model_color.sum(axis=1)
+
+        # (모델, 색상, 보유처) 조합별 개수 (희소)
+        keys, counts = np.unique(mc * self.O + (o_codes + 1), return_counts=True)
+        self.t_model = keys // (self.C * self.O)
+        self.t_color = (keys // self.O) % self.C
+        self.t_owner = keys % self.O
+        self.t_count = counts
+
+        self.model_lookup = {v: i + 1 for i, v in enumerate(self.models)}
+        self.color_lookup = {v: i + 1 for i, v in enumerate(self.colors)}
+        self.model_groups = model_groups
+
+        self._model_options = self._build_model_options()
+        self._colors_for = lru_cache(maxsize=MEMO_SIZE)(self._colors_for_key)
+        self._owners_for = lru_cache(maxsize=MEMO_SIZE)(self._owners_for_key)
+
+    # --------------------------------------------------------------------------
+    def _build_model_options(self):
+        present = {m for m, cnt in zip(self.models, self.model_counts[1:]) if cnt > 0}
+        options, grouped, counts = [], [], {}
+        for label, items in self.model_groups.items():
+            if any(i in present for i in items):
+                options.append(label)
+                grouped.extend(items)
+                counts[label] = int(sum(self.model_counts[self.model_lookup[i]] for i in items if i in self.model_lookup))
+        for m in self.models:
+            if m in present and m not in grouped:
+                options.append(str(m))
+                counts[str(m)] = int(self.model_counts[self.model_lookup[m]])
+        options.sort()
+        return options, counts
+
+    def model_options(self):
+        # (정렬된 화면 선택지, 선택지별 수량)
+        return self._model_options
+
+    def _model_selector(self, models):
+        sel = np.zeros(self.M, dtype=bool)
+        if models:
+            for m in models:
+                code = self.model_lookup.get(m)
+                if code is not None: sel[code] = True
+        else:
+            sel[:] = True
+        return sel
+
+    def _color_selector(self, colors):
+        sel = np.zeros(self.C, dtype=bool)
+        if colors and "전체" not in colors:
+            for c in colors:
+                code = self.color_lookup.get(c)
+                if code is not None: sel[code] = True
+        else:
+            sel[:] = True
+        return sel
+
+    @staticmethod
+    def _key(values):
+        return tuple(sorted(set(values or ())))
+
+    # --------------------------------------------------------------------------
+    def _colors_for_key(self, models):
+        counts = self.model_color[self._model_selector(models)].sum(axis=0)
+        # 0번 칸(결측 색상)은 선택지에서 제외
+        present = np.flatnonzero(counts[1:]) + 1
+        return [self.colors[i - 1] for i in present], {self.colors[i - 1]: int(counts[i]) for i in present}
+
+    def colors_for(self, models):
+        # 선택 모델의 색상 선택지(정렬)와 색상별 수량
+        return self._colors_for(self._key(models))
+
+    def _owners_for_key(self, models, colors):
+        sel = self._model_selector(models)[self.t_model] & self._color_selector(colors)[self.t_color]
+        counts = np.bincount(self.t_owner[sel], weights=self.t_count[sel], minlength=self.O)
+        present = np.flatnonzero(counts[1:]) + 1
+        return [self.owners[i - 1] for i in present], {self.owners[i - 1]: int(counts[i]) for i in present}
+
+    def owners_for(self, models, colors):
+        # 선택 모델/색상의 보유처 선택지(정렬)와 보유처별 수량
+        return self._owners_for(self._key(models), self._key(colors))
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import random
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 좌표 / 지역 사전
+# ==============================================================================
+
+# 매칭되는 지명이 없을 때 사용하는 기본 좌표 (서울시청)
+DEFAULT_BASE = (37.5665, 126.9780)
+
+DISTRICT_CENTERS = {
+    "강남": [37.5172, 127.0473], "서초": [37.4837, 127.0324], "송파": [37.5145, 127.1066],
+    "강동": [37.5301, 127.1238], "영등포": [37.5264, 126.8962], "마포": [37.5663, 126.9016],
+    "용산": [37.5326, 126.9645], "종로": [37.5729, 126.9791], "중구": [37.5637, 126.9975],
+    "성동": [37.5633, 127.0371], "광진": [37.5385, 127.0823], "동대문": [37.5714, 127.0097],
+    "성북": [37.5891, 127.0182], "강북": [37.6396, 127.0257], "도봉": [37.6688, 127.0471],
+    "노원": [37.6542, 127.0568], "은평": [37.6027, 126.9291], "서대문": [37.5791, 126.9368],
+    "양천": [37.5169, 126.8665], "강서": [37.5509, 126.8495], "구로": [37.4954, 126.8874],
+    "금천": [37.4573, 126.8964], "동작": [37.5124, 126.9393], "관악": [37.4784, 126.9516],
+    "중랑": [37.6065, 127.0927],
+    "수원": [37.2636, 127.0286], "성남": [37.4200, 127.1265], "의정부": [37.7381, 127.0337],
+    "안양": [37.3943, 126.9568], "부천": [37.5034, 126.7660], "광명": [37.4786, 126.8646],
+    "평택": [36.9925, 127.1127], "동두천": [37.9036, 127.0604], "안산": [37.3219, 126.8309],
+    "고양": [37.6584, 126.8320], "과천": [37.4292, 126.9877], "구리": [37.6033, 127.1436],
+    "남양주": [37.6360, 127.2165], "오산": [37.1498, 127.0772], "시흥": [37.3801, 126.8029],
+    "군포": [37.3614, 126.9351], "의왕": [37.3447, 126.9739], "하남": [37.5393, 127.2149],
+    "용인": [37.2410, 127.1775], "파주": [37.7600, 126.7800], "이천": [37.2811, 127.4358],
+    "안성": [37.0080, 127.2797], "김포": [37.6153, 126.7157], "화성": [37.1995, 126.8315],
+    "광주": [37.4294, 127.2550], "양주": [37.7853, 127.0458], "포천": [37.8949, 127.2003],
+    "여주": [37.2983, 127.6370], "연천": [38.0964, 127.0749], "가평": [37.8315, 127.5095],
+    "양평": [37.4912, 127.4876], "인천": [37.4563, 126.7052],
+    "춘천": [37.8813, 127.7298], "원주": [37.3422, 127.9202], "강릉": [37.7519, 128.8760],
+    "장안": [37.3036, 126.9745], "권선": [37.2575, 126.9715], "팔달": [37.2798, 127.0441], "영통": [37.2511, 127.0709],
+    "수정": [37.4500, 127.1400], "중원": [37.4300, 127.1700], "분당": [37.3827, 127.1189],
+    "만안": [37.4000, 126.9200], "동안": [37.3900, 126.9600],
+    "덕양": [37.6380, 126.8330], "일산동": [37.6600, 126.7700], "일산서": [37.6700, 126.7500],
+    "처인": [37.2300, 127.2000], "기흥": [37.2655, 127.1293], "수지": [37.3223, 127.0975],
+    "일산": [37.6584, 126.8320]
+}
+
+NEIGHBORHOOD_COORDS = {
+    "반추": [37.5156, 126.8950], "반추정보통신": [37.5156, 126.8950],
+    "신도림TM": [37.5087, 126.8905], "테크노": [37.5351, 127.0957], "강변TM": [37.5351, 127.0957],
+    "신원": [37.6744, 126.8653], "화정": [37.6346, 126.8326], "성사": [37.6533, 126.8430],
+    "삼송": [37.6530, 126.8950], "원흥": [37.6500, 126.8730], "배곧": [37.3705, 126.7335],
+    "정왕": [37.3450, 126.7400], "은행": [37.4360, 126.7970], "상동": [37.5050, 126.7530],
+    "중동": [37.5020, 126.7640], "소사": [37.4830, 126.7940], "풍무": [37.6030, 126.7230],
+    "사우": [37.6190, 126.7190], "구래": [37.6450, 126.6280], "철산": [37.4760, 126.8680],
+    "하안": [37.4550, 126.8810], "우만": [37.2913, 127.0396], "동탄": [37.2005, 127.0976],
+    "병점": [37.2070, 127.0330], "봉담": [37.2160, 126.9450], "향남": [37.1320, 126.9210],
+    "장당": [37.0468, 127.0607], "송탄": [37.0820, 127.0570], "안중": [36.9930, 126.9310],
+    "팽성": [36.9580, 127.0520], "공도": [37.0010, 127.1720], "대천": [37.0160, 127.2660],
+    "판교": [37.3956, 127.1112], "야탑": [37.4110, 127.1280], "위례": [37.4787, 127.1458],
+    "죽전": [37.3240, 127.1070], "미사": [37.5640, 127.1940], "경안": [37.4090, 127.2570],
+    "태전": [37.3940, 127.2280], "홍문": [37.2960, 127.6365], "민락": [37.7470, 127.0990],
+    "지행": [37.8935, 127.0545], "옥정": [37.8220, 127.0960], "덕정": [37.8420, 127.0620],
+    "다산": [37.6230, 127.1570], "별내": [37.6440, 127.1150], "호평": [37.6550, 127.2430],
+    "양수": [37.5452, 127.3276], "운정": [37.7160, 126.7450], "문산": [37.8550, 126.7940],
+    "전곡": [38.0260, 127.0660], "원통": [38.1326, 128.2036], "인제": [38.0697, 128.1703],
+    "송도": [37.3947, 126.6393], "청라": [37.5384, 126.6337], "구월": [37.4490, 126.7050],
+    "주안": [37.4650, 126.6800], "검단": [37.5930, 126.6740], "여의도": [37.5219, 126.9242],
+    "잠실": [37.5132, 127.1000], "천호": [37.5436, 127.1255], "홍대": [37.5575, 126.9245],
+    "신촌": [37.5598, 126.9425], "합정": [37.5484, 126.9137], "연신내": [37.6186, 126.9207],
+    "수색": [37.5802, 126.8958], "이태원": [37.5345, 126.9940], "청파": [37.5447, 126.9678],
+    "혜화": [37.5820, 127.0010], "군자": [37.5571, 127.0794], "아차산": [37.5520, 127.0890],
+    "성수": [37.5445, 127.0559], "왕십리": [37.5619, 127.0384], "상봉": [37.5954, 127.0858],
+    "수유": [37.6370, 127.0250], "창동": [37.6530, 127.0470], "서부물류": [37.5113, 126.8373],
+    "장항": [37.6629, 126.7697],"봉일":[37.7436, 126.8069],"광탄":[37.7975,126.8480]
+}
+
+REGION_KEYS = ["강변TM", "신도림TM", "동남", "동북", "서남", "서북", "남부", "강원", "인천"]
+
+
+# ==============================================================================
+# 우선순위 매처
+# ==============================================================================
+# 키 목록을 하나의 정규식으로 컴파일합니다.
+# 모든 위치에서 lookahead 로 매칭을 시도하고, 각 위치에서는 목록 순서가 빠른 키가 먼저 선택되므로
+# "목록 순서대로 `key in text` 를 검사해 처음 걸리는 키" 와 항상 같은 결과를 돌려줍니다.
+class PriorityMatcher:
+    def __init__(self, keys):
+        self.keys = []
+        self.rank = {}
+        for k in keys:
+            if k not in self.rank:
+                self.rank[k] = len(self.keys)
+                self.keys.append(k)
+        alt = "|".join(re.escape(k) for k in self.keys)
+        self.pattern = re.compile(f"(?=({alt}))") if self.keys else None
+
+    def first(self, text):
+        # 매칭된 키 중 우선순위가 가장 높은 키의 순번 (없으면 -1)
+        if self.pattern is None: return -1
+        best = -1
+        for m in self.pattern.finditer(text):
+            r = self.rank[m.group(1)]
+            if best < 0 or r < best:
+                best = r
+                if best == 0: break
+        return best
+
+    def first_key(self, text):
+        r = self.first(text)
+        return self.keys[r] if r >= 0 else None
+
+
+_COORD_TABLE = list(NEIGHBORHOOD_COORDS.items()) + list(DISTRICT_CENTERS.items())
+COORD_MATCHER = PriorityMatcher([name for name, _ in _COORD_TABLE])
+_COORD_LOOKUP = {}
+for _name, _coords in _COORD_TABLE:
+    _COORD_LOOKUP.setdefault(_name, _coords)
+REGION_MATCHER = PriorityMatcher(REGION_KEYS)
+
+
+# ==============================================================================
+# 단건 함수 (기존 동작 유지)
+# ==============================================================================
+def get_region_category(text):
+    if pd.isna(text): return "기타"
+    text = str(text).strip()
+    return REGION_MATCHER.first_key(text) or "기타"
+
+def get_city_only(text):
+    if pd.isna(text): return "미분류(서울)"
+    return COORD_MATCHER.first_key(str(text)) or "미분류(서울)"
+
+def get_city_center(city):
+    # get_city_only 결과(지명)의 대표 좌표 [위도, 경도] (미분류면 None)
+    return _COORD_LOOKUP.get(city)
+
+def get_jitter_offsets(store_name):
+    # 전역 random 상태를 건드리지 않도록 보유처 이름 해시로 시드한 전용 난수기를 사용합니다.
+    # (random.seed + random.uniform 과 동일한 수열)
+    hash_int = int(hashlib.md5(str(store_name).encode()).hexdigest(), 16)
+    rng = random.Random(hash_int)
+    lat_offset = rng.uniform(-0.003, 0.003)
+    lon_offset = rng.uniform(-0.003, 0.003)
+    return lat_offset, lon_offset
+
+def get_coordinate_smart_jitter(store_name, base_lat, base_lon):
+    if "반추" in str(store_name): return base_lat, base_lon
+    lat_offset, lon_offset = get_jitter_offsets(store_name)
+    return base_lat + lat_offset, base_lon + lon_offset
+
+def get_coordinate_priority(text, base_lat, base_lon):
+    if pd.isna(text): return base_lat, base_lon
+    text = str(text)
+    name = COORD_MATCHER.first_key(text)
+    if name is not None:
+        coords = _COORD_LOOKUP[name]
+        return get_coordinate_smart_jitter(text, coords[0], coords[1])
+    return get_coordinate_smart_jitter(text, base_lat, base_lon)
+
+
+# ==============================================================================
+# 벡터화 함수: 고유값 단위로 한 번만 계산 후 행 전체로 배포
+# ==============================================================================
+def geocode_series(values, base_lat=DEFAULT_BASE[0], base_lon=DEFAULT_BASE[1]):
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    # 마지막 칸은 결측값(-1 코드) 자리
+    u_lat = np.empty(len(uniques) + 1, dtype=np.float64)
+    u_lon = np.empty(len(uniques) + 1, dtype=np.float64)
+    for i, text in enumerate(uniques):
+        u_lat[i], u_lon[i] = get_coordinate_priority(text, base_lat, base_lon)
+    u_lat[-1], u_lon[-1] = base_lat, base_lon
+    return u_lat[codes], u_lon[codes]
+
+def classify_series(values, func):
+    # 결과는 범주형(Categorical)으로 돌려줍니다. (지역/시군구는 종류가 적음)
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    labels = np.empty(len(uniques) + 1, dtype=object)
+    for i, text in enumerate(uniques):
+        labels[i] = func(text)
+    labels[-1] = func(np.nan)
+    cats, inv = np.unique(labels, return_inverse=True)
+    return pd.Categorical.from_codes(inv[codes], categories=pd.Index(cats))
+
+
+# 좌표/지역 사전이 바뀌면 디스크 캐시가 자동으로 무효화되도록 사전 내용으로 버전 문자열을 만듭니다.
+TABLE_VERSION = hashlib.md5(
+    json.dumps([NEIGHBORHOOD_COORDS, DISTRICT_CENTERS, REGION_KEYS, DEFAULT_BASE], ensure_ascii=False).encode()
+).hexdigest()[:12]
@@ -0,0 +1,725 @@
+import io
+import logging
+import multiprocessing
+import os
+import posixpath
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from openpyxl.reader.strings import read_string_table
+from openpyxl.styles.stylesheet import Stylesheet
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+from geocode import DEFAULT_BASE, get_region_category, get_city_only, geocode_series, classify_series
+
+# ==============================================================================
+# 컬럼 역할 매핑 (화면에서 쓰는 col_map / target_col 규칙과 동일)
+# ==============================================================================
+# 범주형(Categorical)으로 읽을 역할
+CATEGORY_ROLES = ("보유처", "모델명", "색상", "status")
+
+def clean_header(col):
+    return str(col).replace('▼', '').strip()
+
+def resolve_columns(columns):
+    columns = list(columns)
+    col_map = {}
+    for col in columns:
+        c = clean_header(col)
+        if '보유처' in c: col_map['보유처'] = col
+        elif '모델명' in c: col_map['모델명'] = col
+        elif '색상' in c: col_map['색상'] = col
+        elif any(k in c for k in ['재고', '상태', '등급']): col_map['status'] = col
+        elif '일련번호' in c: col_map['일련번호'] = col
+
+    target_col = None
+    if len(columns) >= 14: target_col = columns[13]
+    if target_col is None:
+        for col in columns:
+            c = clean_header(col)
+            if any(k in c for k in ['출고', '날짜']): target_col = col; break
+
+    return {
+        '보유처': col_map.get('보유처'),
+        '모델명': col_map.get('모델명', columns[0] if columns else None),
+        '색상': col_map.get('색상'),
+        'status': col_map.get('status'),
+        '일련번호': col_map.get('일련번호'),
+        'target': target_col,
+    }
+
+def first_boyu_column(columns):
+    # 좌표 계산은 (기존과 같이) '보유처' 가 들어간 첫 번째 컬럼 기준
+    for col in columns:
+        if '보유처' in str(col): return col
+    return None
+
+def needed_columns(columns):
+    roles = resolve_columns(columns)
+    keep = {c for c in roles.values() if c is not None}
+    first = first_boyu_column(columns)
+    if first is not None: keep.add(first)
+    return [c for c in columns if c in keep], roles
+
+
+# ==============================================================================
+# xlsx 스트리밍 리더 (필요한 컬럼만 변환)
+# ==============================================================================
+# pd.read_excel(dtype=str) 와 같은 결과를 내도록 openpyxl 의 문자열/스타일 파서를 그대로 사용하고,
+# 시트 XML 은 iterparse 로 한 행씩 읽으면서 필요한 컬럼의 셀만 값으로 변환합니다.
+
+# pandas read_excel 기본 결측 문자열
+NA_STRINGS = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_ROW_TAG = _MAIN_NS + "row"
+_CELL_TAG = _MAIN_NS + "c"
+_VALUE_TAG = _MAIN_NS + "v"
+_INLINE_TAG = _MAIN_NS + "is"
+_TEXT_TAG = _MAIN_NS + "t"
+_RUN_TAG = _MAIN_NS + "r"
+_ERROR = object()
+# pd.read_excel(dtype=str) 결과와 같은 문자열 dtype (pandas 2: object, pandas 3: str)
+_TEXT_DTYPE = pd.Series(["", np.nan]).dtype
+
+
+class UnsupportedWorkbook(Exception):
+    pass
+
+
+# 스트리밍 리더가 못 읽는 파일에서 나는 오류 (이때만 pandas 로 다시 읽음)
+# - zip 이 아니거나(xls 등) 통합 문서 구성 파일이 없음 / XML 이 깨짐 / 값·스타일·공유 문자열 번호가 이상함
+STREAM_READ_ERRORS = (UnsupportedWorkbook, zipfile.BadZipFile, KeyError, ET.ParseError, ValueError, IndexError)
+
+_log = logging.getLogger("inventory.ingest")
+
+
+def _inline_text(node):
+    # openpyxl Text.content 와 동일: <t> + 서식 run 의 <t> (윗주 rPh 제외)
+    parts = []
+    t = node.find(_TEXT_TAG)
+    if t is not None and t.text: parts.append(t.text)
+    for r in node.iterfind(_RUN_TAG):
+        rt = r.find(_TEXT_TAG)
+        if rt is not None and rt.text: parts.append(rt.text)
+    return "".join(parts)
+
+
+def _column_index(ref):
+    n = 0
+    for ch in ref:
+        o = ord(ch)
+        if 65 <= o <= 90: n = n * 26 + o - 64
+        else: break
+    return n - 1
+
+def _worksheets(zf):
+    # 워크시트 [(시트 이름, 시트 XML 경로)] (통합 문서 순서, 차트 시트 제외) 와 날짜 기준(1900/1904)
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    pr = wb.find(_MAIN_NS + "workbookPr")
+    epoch = CALENDAR_WINDOWS_1900
+    if pr is not None and pr.get("date1904") in ("1", "true"): epoch = CALENDAR_MAC_1904
+
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): (r.get("Type", ""), r.get("Target", "")) for r in rels}
+    sheets = wb.find(_MAIN_NS + "sheets")
+    found = []
+    for sheet in (sheets if sheets is not None else []):
+        rel_type, target = targets.get(sheet.get(_REL_NS + "id"), ("", ""))
+        if not rel_type.endswith("/worksheet"): continue
+        path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        found.append((sheet.get("name"), path))
+    return found, epoch
+
+def _select_worksheet(zf, sheet=None):
+    # sheet: 시트 이름 (None 이면 첫 번째 워크시트)
+    sheets, epoch = _worksheets(zf)
+    for name, path in sheets:
+        if sheet is None or name == sheet: return path, epoch
+    raise UnsupportedWorkbook("워크시트를 찾을 수 없습니다." if sheet is None else f"시트를 찾을 수 없습니다: {sheet}")
+
+def _date_styles(zf):
+    if "xl/styles.xml" not in zf.namelist(): return set(), set()
+    stylesheet = Stylesheet.from_tree(ET.fromstring(zf.read("xl/styles.xml")))
+    return stylesheet.date_formats, stylesheet.timedelta_formats
+
+
+class XlsxColumnReader:
+    def __init__(self, file, sheet=None):
+        self.zf = zipfile.ZipFile(file)
+        self.sheet_path, self.epoch = _select_worksheet(self.zf, sheet)
+        if "xl/sharedStrings.xml" in self.zf.namelist():
+            with self.zf.open("xl/sharedStrings.xml") as f: self.shared = read_string_table(f)
+        else:
+            self.shared = []
+        self.date_formats, self.timedelta_formats = _date_styles(self.zf)
+
+    def close(self):
+        self.zf.close()
+
+    def _cell_value(self, c):
+        # openpyxl(read_only, data_only) + pandas _convert_cell 과 같은 변환
+        t = c.get("t", "n")
+        if t == "inlineStr":
+            child = c.find(_INLINE_TAG)
+            return _inline_text(child) if child is not None else None
+        v = c.findtext(_VALUE_TAG, None) or None
+        if v is None: return None
+        if t == "n":
+            value = float(v) if ("." in v or "E" in v or "e" in v) else int(v)
+            s = c.get("s")
+            style_id = int(s) if s else 0
+            if style_id in self.date_formats:
+                try:
+                    return from_excel(value, self.epoch, timedelta=style_id in self.timedelta_formats)
+                except (OverflowError, ValueError):
+                    return _ERROR
+            as_int = int(value)
+            return as_int if as_int == value else float(value)
+        if t == "s": return self.shared[int(v)]
+        if t == "b": return bool(int(v))
+        if t == "e": return _ERROR
+        if t == "d": return from_ISO8601(v)
+        return v
+
+    def _cell_nonblank(self, c):
+        # 변환하지 않는 컬럼은 값 존재 여부만 확인 (pandas 의 빈 행/폭 계산용)
+        t = c.get("t", "n")
+        if t == "inlineStr":
+            child = c.find(_INLINE_TAG)
+            return child is not None and _inline_text(child) != ""
+        v = c.findtext(_VALUE_TAG, None) or None
+        if v is None: return False
+        if t == "s": return self.shared[int(v)] != ""
+        return True
+
+    def iter_rows(self, state):
+        # (행 번호, {컬럼 위치: 값}, 폭) 을 돌려줍니다.
+        # state["keep"] 에 없는 컬럼은 값으로 변환하지 않고, 빈 행/최대 폭 판단에 필요한 경우에만 값 존재 여부를 봅니다.
+        # (end 이벤트만 받아 파싱 비용을 줄이고, 처리한 행은 비워서 메모리를 유지합니다)
+        row_no = -1
+        col_cache = {}
+        with self.zf.open(self.sheet_path) as f:
+            for _, el in ET.iterparse(f):
+                if el.tag != _ROW_TAG: continue
+                r = el.get("r")
+                row_no = int(r) - 1 if r else row_no + 1
+                keep = state["keep"]
+                known_width = state["width"]
+                values = {}
+                width = 0
+                col = -1
+                for c in el:
+                    if c.tag != _CELL_TAG: continue
+                    ref = c.get("r")
+                    if ref:
+                        letters = ref.rstrip("0123456789")
+                        col = col_cache.get(letters)
+                        if col is None: col = col_cache[letters] = _column_index(letters)
+                    else:
+                        col += 1
+                    if keep is None or col in keep:
+                        value = self._cell_value(c)
+                        if value is not None and value != "":
+                            values[col] = value
+                            width = col + 1
+                    elif (not width or col >= known_width) and self._cell_nonblank(c):
+                        width = col + 1
+                yield row_no, values, width
+                el.clear()
+
+
+def _to_text(value):
+    if value is _ERROR: return np.nan
+    if isinstance(value, str): return np.nan if value in NA_STRINGS else value
+    return str(value)
+
+def _dedup_names(names):
+    # pandas 의 중복 컬럼명 처리 규칙 (a, a -> a, a.1)
+    names = list(names)
+    counts = {}
+    for i, col in enumerate(names):
+        cur_count = counts.get(col, 0)
+        while cur_count > 0:
+            counts[col] = cur_count + 1
+            col = f"{col}.{cur_count}"
+            cur_count = counts.get(col, 0)
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+def _header_names(header_values, width):
+    names = []
+    for i in range(width):
+        v = header_values.get(i)
+        names.append(f"Unnamed: {i}" if v is None or v is _ERROR else v)
+    return _dedup_names(names)
+
+
+def read_xlsx_projected(file, project=True, sheet=None):
+    # 헤더 행을 먼저 읽어 필요한 컬럼을 정한 뒤, 나머지 행은 그 컬럼만 변환하며 스트리밍합니다.
+    # 범주형 역할 컬럼은 읽는 즉시 코드(정수)로 사전 인코딩합니다.
+    reader = XlsxColumnReader(file, sheet)
+    try:
+        state = {"keep": None, "width": 0}
+        rows = reader.iter_rows(state)
+
+        header_values, header_width = {}, 0
+        first = next(rows, None)
+        if first is None: raise UnsupportedWorkbook("빈 시트입니다.")
+        row_no, header_values, header_width = first
+        if row_no != 0:
+            # 1행이 비어 있는 시트: 빈 헤더 후 첫 행부터 데이터
+            pending = [first]
+            header_values, header_width = {}, 0
+        else:
+            pending = []
+
+        header = _header_names(header_values, header_width)
+        keep_names, roles = needed_columns(header) if project else (header, resolve_columns(header))
+        keep = {header.index(n) for n in keep_names}
+        # 데이터 행이 헤더보다 넓으면 14번째 컬럼이 출고일이 될 수 있으므로 미리 받아둡니다.
+        if header_width < 14: keep.add(13)
+        if project: state["keep"] = keep
+        else: keep = set(range(header_width))
+        state["width"] = header_width
+        keep_cols = sorted(keep)
+
+        cat_positions = {header.index(roles[r]) for r in CATEGORY_ROLES if roles.get(r) in header}
+        cat_codes = {p: [] for p in keep_cols if p in cat_positions}
+        cat_lookup = {p: {} for p in cat_codes}
+        text_values = {p: [] for p in keep_cols if p not in cat_positions}
+
+        n_rows = 0
+        last_nonblank = -1
+        max_width = header_width
+
+        def append_row(values):
+            if not project:
+                # 전체 컬럼 모드: 헤더보다 넓은 행에서 처음 보는 컬럼은 앞쪽을 결측으로 채워 추가
+                for p in values:
+                    if p not in text_values and p not in cat_codes: text_values[p] = [np.nan] * n_rows
+            for p, codes in cat_codes.items():
+                v = values.get(p)
+                v = np.nan if v is None else _to_text(v)
+                if isinstance(v, float):
+                    codes.append(-1)
+                else:
+                    lookup = cat_lookup[p]
+                    code = lookup.get(v)
+                    if code is None: code = lookup[v] = len(lookup)
+                    codes.append(code)
+            for p, out in text_values.items():
+                v = values.get(p)
+                out.append(np.nan if v is None else _to_text(v))
+
+        def blank_row():
+            for codes in cat_codes.values(): codes.append(-1)
+            for out in text_values.values(): out.append(np.nan)
+
+        def consume(row_no, values, width):
+            nonlocal n_rows, last_nonblank, max_width
+            data_idx = row_no - 1
+            while n_rows < data_idx:
+                blank_row(); n_rows += 1
+            append_row(values)
+            if width:
+                last_nonblank = n_rows
+                if width > max_width: max_width = state["width"] = width
+            n_rows += 1
+
+        for item in pending: consume(*item)
+        for item in rows: consume(*item)
+    finally:
+        reader.close()
+
+    n = last_nonblank + 1
+    columns = _header_names(header_values, max_width)
+    if project:
+        keep_names, roles = needed_columns(columns)
+        final_keep = [columns.index(c) for c in keep_names]
+    else:
+        roles = resolve_columns(columns)
+        final_keep = list(range(len(columns)))
+    if any(p not in cat_codes and p not in text_values for p in final_keep):
+        if project: raise UnsupportedWorkbook("헤더보다 넓은 데이터 행")
+        for p in final_keep:
+            if p not in cat_codes and p not in text_values: text_values[p] = [np.nan] * n
+
+    data = {}
+    for p in final_keep:
+        name = columns[p]
+        if p in cat_codes:
+            data[name] = _categorical_from_lookup(cat_codes[p][:n], cat_lookup[p])
+        else:
+            data[name] = pd.Series(text_values[p][:n], dtype=object).astype(_TEXT_DTYPE)
+    df = pd.DataFrame(data, columns=[columns[p] for p in final_keep])
+    return df, roles
+
+
+def _categorical_from_lookup(codes, lookup):
+    # 등장 순서로 매긴 코드를 정렬된 범주 순서로 다시 매깁니다. (정렬 결과가 문자열 정렬과 같도록)
+    cats = np.array(list(lookup.keys()), dtype=object)
+    order = np.argsort(cats, kind="stable")
+    remap = np.empty(len(cats) + 1, dtype=np.int32)
+    remap[order] = np.arange(len(cats), dtype=np.int32)
+    remap[-1] = -1
+    codes = remap[np.asarray(codes, dtype=np.int64)]
+    return pd.Categorical.from_codes(codes, categories=pd.Index(cats[order]) if len(cats) else pd.Index([], dtype=object))
+
+
+def read_excel_fallback(file, project=True, sheet=None):
+    # 스트리밍 리더가 처리하지 못하는 파일은 pandas 로 전체를 읽은 뒤 같은 규칙으로 컬럼을 고릅니다.
+    if hasattr(file, "seek"): file.seek(0)
+    df = pd.read_excel(file, dtype=str, sheet_name=0 if sheet is None else sheet)
+    columns = list(df.columns)
+    if project:
+        keep_names, roles = needed_columns(columns)
+        df = df[keep_names]
+    else:
+        roles = resolve_columns(columns)
+    for r in CATEGORY_ROLES:
+        col = roles.get(r)
+        if col is not None and col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df, roles
+
+
+# ==============================================================================
+# 가공 (좌표 / 지역 / 시군구)
+# ==============================================================================
+_STORE_PREFIX = re.compile(r'^[^-\s]*\d[^-\s]*-')
+
+def normalize_store_name(text):
+    if pd.isna(text): return text
+    text = str(text).strip()
+    return "반추정보통신" if "반추" in text else text
+
+def strip_store_prefix(text):
+    if pd.isna(text): return text
+    return _STORE_PREFIX.sub('', str(text))
+
+def region_of_store(text):
+    return get_region_category(strip_store_prefix(text))
+
+def city_of_store(text):
+    return get_city_only(strip_store_prefix(text))
+
+def map_categories(series, func):
+    # 범주 값에만 func 를 적용한 뒤 (같아진 범주는 합쳐서) 다시 인코딩합니다.
+    cat = series.cat
+    mapped = np.array([func(c) for c in cat.categories], dtype=object)
+    valid = np.array([not pd.isna(v) for v in mapped], dtype=bool)
+    uniq, inv = np.unique(mapped[valid].astype(str), return_inverse=True) if valid.any() else (np.array([], dtype=object), np.array([], dtype=np.int64))
+    inv_full = np.full(len(mapped) + 1, -1, dtype=np.int64)
+    inv_full[np.flatnonzero(valid)] = inv
+    codes = inv_full[cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(uniq.astype(object))), index=series.index, name=series.name)
+
+
+# ==============================================================================
+# 출고일 파싱 (문자열 -> datetime64)
+# ==============================================================================
+# 내보내기마다 섞여 오는 형식: 2025-07-18 / 20250718 / 2025.07.18 / 2025/7/18 / 2025년 7월 18일 /
+# 25.07.18 / 날짜 셀(2025-07-18 00:00:00) / 날짜 서식이 빠진 엑셀 일련값(45856). 못 읽으면 NaT.
+# 같은 날짜가 많이 반복되므로 고유 값만 정규식(컬럼 단위)으로 한 번 파싱한 뒤 행 전체로 배포합니다.
+_DATE_YMD = r'^(\d{4})\s*[-./년]?\s*(\d{1,2})\s*[-./월]?\s*(\d{1,2})(?!\d)'
+_DATE_SHORT = r'^(\d{2})[-./](\d{1,2})[-./](\d{1,2})$'
+_DATE_SERIAL = r'^(\d{5})(?:\.0+)?$'
+_EXCEL_EPOCH = np.datetime64('1899-12-30', 's')
+DATE_YEARS = (1990, 2100)
+
+
+def parse_ship_dates(values):
+    # 출고일 컬럼 -> datetime64[s] 배열 (행 순서 그대로)
+    codes, uniques = pd.factorize(values.astype(object))
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    ymd = text.str.extract(_DATE_YMD).astype(float)
+    short = text.str.extract(_DATE_SHORT).astype(float)
+    short[0] += 2000
+    parts = ymd.fillna(short)
+    parts = parts.where(parts[0].between(*DATE_YEARS), axis=0)
+    parsed = pd.to_datetime(parts.set_axis(['year', 'month', 'day'], axis=1), errors='coerce').to_numpy('datetime64[s]')
+
+    serial = text.str.extract(_DATE_SERIAL)[0].astype(float).to_numpy()
+    from_serial = _EXCEL_EPOCH + np.where(np.isnan(serial), 0, serial).astype('timedelta64[D]')
+    in_range = (from_serial >= np.datetime64(f'{DATE_YEARS[0]}-01-01')) & (from_serial < np.datetime64(f'{DATE_YEARS[1]}-01-01'))
+    use_serial = np.isnat(parsed) & ~np.isnan(serial) & in_range
+    parsed[use_serial] = from_serial[use_serial]
+    return np.append(parsed, np.datetime64('NaT', 's'))[codes]
+
+
+def enrich_inventory(df, roles=None):
+    # roles: 컬럼 역할 (있으면 출고일을 파싱해 cached_shipped 에 저장)
+    boyu_col = first_boyu_column(df.columns)
+    if boyu_col:
+        if not isinstance(df[boyu_col].dtype, pd.CategoricalDtype):
+            df[boyu_col] = df[boyu_col].astype("category")
+        df[boyu_col] = map_categories(df[boyu_col], normalize_store_name)
+
+        # 고유 보유처 단위로 한 번만 계산 후 행 전체로 배포
+        df['cached_lat'], df['cached_lon'] = geocode_series(df[boyu_col], *DEFAULT_BASE)
+        df['cached_region'] = classify_series(df[boyu_col], region_of_store)
+        df['cached_city'] = classify_series(df[boyu_col], city_of_store)
+    target = (roles or {}).get('target')
+    if target is not None and target in df.columns:
+        df['cached_shipped'] = parse_ship_dates(df[target])
+    return df
+
+
+# ==============================================================================
+# 변경분 비교 (일련번호 기준)
+# ==============================================================================
+# 업로드 결과 안내용 건수만 셉니다. 새 파일은 항상 전체를 파싱/가공하고 인덱스도 새 묶음으로 다시 만들므로
+# (조회 중인 세션이 쓰는 기존 묶음은 고치지 않음) 반영 시간은 바뀐 건수가 아니라 파일 크기에 비례합니다.
+DELTA_FIELDS = ("보유처", "모델명", "색상", "status", "target")
+
+
+def _keyed(df, roles):
+    # 일련번호 → 비교 대상 값(문자열) 표. 일련번호가 없거나 비어 있으면 None
+    serial = roles.get('일련번호')
+    if serial is None or serial not in df.columns: return None
+    cols = [roles.get(f) for f in DELTA_FIELDS]
+    data = {f: df[c].astype("string").fillna("").to_numpy(dtype=object)
+            for f, c in zip(DELTA_FIELDS, cols) if c is not None and c in df.columns}
+    keyed = pd.DataFrame(data, index=pd.Index(df[serial].astype(object), name="serial"))
+    keyed = keyed[keyed.index.notna()]
+    return keyed[~keyed.index.duplicated(keep="first")]
+
+
+def diff_inventory(previous, current, roles):
+    # 추가/삭제/변경(보유처 이동 포함) 건수
+    old = _keyed(previous, previous.attrs.get('col_roles') or resolve_columns(previous.columns))
+    new = _keyed(current, roles)
+    if old is None or new is None: return None
+    common = new.index.intersection(old.index)
+    fields = [f for f in new.columns if f in old.columns]
+    a = old.loc[common, fields].to_numpy()
+    b = new.loc[common, fields].to_numpy()
+    changed = (a != b).any(axis=1) if len(fields) else np.zeros(len(common), dtype=bool)
+    moved = (old.loc[common, "보유처"].to_numpy() != new.loc[common, "보유처"].to_numpy()) if "보유처" in fields else np.zeros(len(common), dtype=bool)
+    return {
+        'inserted': int(len(new.index.difference(old.index))),
+        'removed': int(len(old.index.difference(new.index))),
+        'changed': int(changed.sum()),
+        'moved': int(moved.sum()),
+        'unchanged': int(len(common) - changed.sum()),
+    }
+
+
+# ==============================================================================
+# 여러 파일 / 여러 시트 (부분별 병렬 파싱 + 컬럼 맞춤)
+# ==============================================================================
+# 지역별로 따로 받은 재고 파일 여러 개는 업로드 시 하나의 묶음(zip 안에 xlsx 들)으로 저장하고,
+# 한 통합 문서 안의 여러 시트와 함께 "부분(part)" 단위로 나눠 프로세스 풀에서 동시에 파싱/가공합니다.
+# (openpyxl/XML 파싱은 GIL 에 묶이므로 스레드로는 빨라지지 않음)
+# 합칠 때는 부분마다 resolve_columns 로 찾은 역할 컬럼을 첫 부분의 컬럼 이름으로 맞춥니다.
+
+WorkbookPart = namedtuple("WorkbookPart", ["label", "source", "member", "sheet"])
+
+# 부분이 여러 개여도 파일이 작으면 프로세스 시작 비용이 더 크므로 한 프로세스에서 차례로 처리
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+
+def bundle_workbooks(files):
+    # [(파일 이름, 내용 bytes)] -> 묶음 파일 내용 (xlsx 는 이미 압축되어 있으므로 무압축 저장, 업로드 순서 유지)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for i, (name, data) in enumerate(files):
+            zf.writestr(f"{i + 1:02d}-{os.path.basename(name)}", bytes(data))
+    return buf.getvalue()
+
+
+def _is_bundle(zf):
+    names = zf.namelist()
+    return "xl/workbook.xml" not in names and any(n.lower().endswith(".xlsx") for n in names)
+
+
+def _sheet_names(file):
+    # 워크시트 이름 목록 (통합 문서 구조를 못 읽으면 None -> 첫 시트만 기존 방식으로 읽음)
+    try:
+        with zipfile.ZipFile(file) as zf:
+            return [name for name, _ in _worksheets(zf)[0]]
+    except STREAM_READ_ERRORS:
+        return None
+
+
+def workbook_parts(file):
+    # 파일(경로 또는 파일 객체) -> [WorkbookPart] (묶음이면 안의 통합 문서마다, 통합 문서면 워크시트마다)
+    if hasattr(file, "read"):
+        file.seek(0)
+        source = file.read()
+    else:
+        source = os.fspath(file)
+    label = os.path.basename(source) if isinstance(source, str) else "upload.xlsx"
+    try:
+        with zipfile.ZipFile(_open_source(source)) as zf:
+            members = [n for n in zf.namelist() if n.lower().endswith(".xlsx")] if _is_bundle(zf) else None
+            workbooks = [(n.split("-", 1)[-1], n, io.BytesIO(zf.read(n))) for n in members] if members else None
+    except zipfile.BadZipFile:
+        workbooks = None
+    if workbooks is None: workbooks = [(label, None, _open_source(source))]
+
+    parts = []
+    for name, member, f in workbooks:
+        sheets = _sheet_names(f)
+        if not sheets or len(sheets) == 1:
+            parts.append(WorkbookPart(name, source, member, None))
+        else:
+            parts.extend(WorkbookPart(f"{name} / {sheet}", source, member, sheet) for sheet in sheets)
+    return parts
+
+
+def _open_source(source, member=None):
+    f = io.BytesIO(source) if isinstance(source, bytes) else source
+    if member is None: return f
+    with zipfile.ZipFile(f) as zf: return io.BytesIO(zf.read(member))
+
+
+def _read_part(f, project, sheet, label=None):
+    try:
+        return ("xlsx_stream",) + read_xlsx_projected(f, project=project, sheet=sheet)
+    except STREAM_READ_ERRORS as e:
+        # 스트리밍 리더가 못 읽는 파일은 pandas 로 다시 시도 (진짜 오류는 여기서 그대로 올라감)
+        # 느린 경로로 빠진 이유를 남김 (load_stats 의 reader="pandas" 와 함께 확인)
+        _log.warning("xlsx 스트리밍 읽기 실패, pandas 로 다시 읽음 (%s): %s: %s", label or sheet or "첫 시트", type(e).__name__, e)
+        return ("pandas",) + read_excel_fallback(f, project=project, sheet=sheet)
+
+
+def load_part(part, project=True):
+    # 한 부분 파싱 + 가공 (프로세스 풀 작업 단위, 모듈 최상위 함수여야 pickle 가능)
+    t0 = time.perf_counter()
+    reader, df, roles = _read_part(_open_source(part.source, part.member), project, part.sheet, part.label)
+    t1 = time.perf_counter()
+    df = enrich_inventory(df, roles=roles)
+    t2 = time.perf_counter()
+    stats = {
+        'part': part.label, 'reader': reader, 'rows': len(df),
+        'parse_ms': round((t1 - t0) * 1000, 2), 'enrich_ms': round((t2 - t1) * 1000, 2),
+    }
+    return df, roles, stats
+
+
+def _pool_context():
+    # Streamlit 서버는 스레드가 많으므로 fork 대신 forkserver (없으면 spawn) 로 작업 프로세스를 만듭니다.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _source_size(source):
+    return len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+
+def load_parts(parts, project=True, max_workers=None):
+    # 부분별 (df, roles, stats) 를 순서대로. 가능한 경우 프로세스 풀에서 동시에 처리합니다.
+    if max_workers is None:
+        max_workers = min(len(parts), os.cpu_count() or 1)
+        if parts and _source_size(parts[0].source) < PARALLEL_MIN_BYTES: max_workers = 1
+    if max_workers > 1 and len(parts) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context()) as pool:
+                futures = [pool.submit(load_part, p, project) for p in parts]
+                return [f.result() for f in futures], max_workers
+        except (OSError, RuntimeError, ImportError):
+            # 프로세스를 만들 수 없는 환경(권한/자원 제한, 작업 프로세스 비정상 종료 등)은 한 프로세스에서 처리
+            pass
+    return [load_part(p, project) for p in parts], 1
+
+
+def _canonical_roles(results):
+    # 역할별로 처음 찾은 부분의 컬럼 이름을 기준으로 삼습니다. (보유처 첫 컬럼 포함)
+    canon = {}
+    for df, roles, _ in results:
+        for role, col in roles.items():
+            if col is not None and canon.get(role) is None: canon[role] = col
+        first = first_boyu_column(df.columns)
+        if first is not None and canon.get('_first_boyu') is None: canon['_first_boyu'] = first
+    return canon
+
+
+def _aligned(df, roles, canon):
+    rename = {}
+    sources = dict(roles, _first_boyu=first_boyu_column(df.columns))
+    for role, col in sources.items():
+        target = canon.get(role)
+        if col is not None and target is not None and col != target and col not in rename: rename[col] = target
+    if not rename: return df
+    df = df.rename(columns=rename)
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def _union_categorical(pieces, lengths):
+    # 부분마다 다른 범주를 합친 정렬된 범주로 다시 인코딩 (없는 부분은 결측)
+    present = [p for p in pieces if p is not None]
+    cats = pd.Index(sorted(set().union(*(set(p.cat.categories) for p in present))))
+    codes = []
+    for p, n in zip(pieces, lengths):
+        if p is None:
+            codes.append(np.full(n, -1, dtype=np.int32))
+            continue
+        remap = np.append(cats.get_indexer(p.cat.categories), -1).astype(np.int32)
+        codes.append(remap[p.cat.codes.to_numpy()])
+    return pd.Categorical.from_codes(np.concatenate(codes), categories=cats)
+
+
+def combine_parts(results):
+    # [(df, roles, stats)] -> (합친 df, 기준 roles). 보유처 컬럼이 있는 부분(요약 시트 등 제외)만 합칩니다.
+    usable = [r for r in results if r[1].get('보유처') is not None] or results[:1]
+    canon = _canonical_roles(usable)
+    frames = [_aligned(df, roles, canon) for df, roles, _ in usable]
+    lengths = [len(f) for f in frames]
+    columns = list(dict.fromkeys(c for f in frames for c in f.columns))
+    data = {}
+    for col in columns:
+        pieces = [f[col] if col in f.columns else None for f in frames]
+        present = [p for p in pieces if p is not None]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in present):
+            data[col] = _union_categorical(pieces, lengths)
+            continue
+        if any(isinstance(p.dtype, pd.CategoricalDtype) for p in present):
+            pieces = [p.astype(object).astype(_TEXT_DTYPE) if p is not None else None for p in pieces]
+            present = [p for p in pieces if p is not None]
+        dtype = present[0].dtype
+        filled = [p.reset_index(drop=True) if p is not None else pd.Series(np.nan, index=range(n)).astype(dtype)
+                  for p, n in zip(pieces, lengths)]
+        data[col] = pd.concat(filled, ignore_index=True)
+    df = pd.DataFrame(data, columns=columns)
+    roles = {role: canon.get(role) for role in usable[0][1]}
+    return df, roles
+
+
+def load_inventory(file, project=True, previous=None, max_workers=None):
+    # previous: 직전 데이터 (있으면 일련번호 기준 변경 건수를 attrs['delta'] 에 기록)
+    # 파일이 여러 통합 문서의 묶음이거나 시트가 여러 개면 부분별로 병렬 처리한 뒤 합칩니다.
+    parts = workbook_parts(file)
+    if len(parts) == 1:
+        df, roles, stats = load_part(parts[0], project)
+        del stats['part']
+    else:
+        t0 = time.perf_counter()
+        results, workers = load_parts(parts, project, max_workers=max_workers)
+        t1 = time.perf_counter()
+        df, roles = combine_parts(results)
+        t2 = time.perf_counter()
+        stats = {
+            'reader': "+".join(sorted({r[2]['reader'] for r in results})), 'rows': len(df),
+            'workers': workers, 'parts_ms': round((t1 - t0) * 1000, 2), 'combine_ms': round((t2 - t1) * 1000, 2),
+            'parts': [r[2] for r in results],
+        }
+    df.attrs['col_roles'] = roles
+    # 적재 당시 단계별 소요 시간 (Parquet 캐시에도 함께 저장되어 진단 패널에서 확인)
+    df.attrs['load_stats'] = stats
+    if previous is not None:
+        delta = diff_inventory(previous, df, roles)
+        if delta is not None: df.attrs['delta'] = delta
+    return df
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+from geocode import TABLE_VERSION
+
+# ==============================================================================
+# 파싱/가공 완료된 재고 데이터의 디스크 캐시 (Parquet)
+# ==============================================================================
+# 캐시 키 = 원본 xlsx 내용 해시 + 좌표 사전 버전 + 캐시 포맷 버전
+# 가공 로직(컬럼 구성 등)이 바뀌면 CACHE_FORMAT 을 올려 기존 캐시를 무효화합니다.
+CACHE_FORMAT = 3
+CACHE_DIR_NAME = ".inventory_cache"
+KEEP_CACHE_FILES = 3
+
+_digest_memo = {}
+
+
+def file_digest(path):
+    # 같은 파일(수정시각/크기 동일)은 다시 해시하지 않습니다.
+    st_ = os.stat(path)
+    memo_key = (os.path.abspath(path), st_.st_mtime_ns, st_.st_size)
+    if memo_key in _digest_memo: return _digest_memo[memo_key]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digest_memo.clear()
+    _digest_memo[memo_key] = digest
+    return digest
+
+
+def cache_dir_for(data_file):
+    return os.path.join(os.path.dirname(os.path.abspath(data_file)), CACHE_DIR_NAME)
+
+
+def cache_path_for(data_file, digest):
+    name = f"{digest[:32]}-{TABLE_VERSION}-v{CACHE_FORMAT}.parquet"
+    return os.path.join(cache_dir_for(data_file), name)
+
+
+# ==============================================================================
+# 원자적 쓰기: 임시 파일에 다 쓴 뒤 os.replace 로 교체 (읽는 쪽은 항상 완성된 파일만 봄)
+# ==============================================================================
+def _atomic_write(path, write_fn, mode):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+
+
+def atomic_write_bytes(path, data):
+    _atomic_write(path, lambda f: f.write(data), "wb")
+
+
+def atomic_write_text(path, text):
+    _atomic_write(path, lambda f: f.write(text), "w")
+
+
+def _cacheable(df):
+    # Parquet 는 문자열 컬럼명만 지원하므로 그 외 헤더는 캐시하지 않고 매번 파싱합니다.
+    return all(isinstance(c, str) for c in df.columns) and df.columns.is_unique
+
+
+def _prune(directory, keep_path):
+    try:
+        files = [os.path.join(directory, n) for n in os.listdir(directory) if n.endswith(".parquet")]
+    except FileNotFoundError:
+        return
+    files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    for p in files[KEEP_CACHE_FILES:]:
+        if p != keep_path:
+            try: os.remove(p)
+            except OSError: pass
+
+
+def load_or_build(data_file, build_fn, digest=None):
+    # 캐시가 있으면 Parquet 에서 바로 읽고, 없으면 build_fn(data_file) 로 만든 뒤 저장합니다.
+    if digest is None: digest = file_digest(data_file)
+    path = cache_path_for(data_file, digest)
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # 손상된 캐시는 버리고 다시 만듭니다.
+            try: os.remove(path)
+            except OSError: pass
+
+    df = build_fn(data_file)
+    if _cacheable(df):
+        try:
+            _atomic_write(path, lambda f: df.to_parquet(f, index=False), "wb")
+            _prune(os.path.dirname(path), path)
+        except Exception:
+            # 캐시 저장 실패(디스크/권한 등)는 조회에 영향을 주지 않습니다.
+            pass
+    return df
+
+
+def clear_cache(data_file):
+    directory = cache_dir_for(data_file)
+    if not os.path.isdir(directory): return
+    for n in os.listdir(directory):
+        try: os.remove(os.path.join(directory, n))
+        except OSError: pass
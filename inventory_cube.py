@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from inventory_index import ALL, OFFICE
+
+# ==============================================================================
+# 재고 집계 큐브 (지역 × 시군구 × 보유처 × 모델 × 색상 × 상태)
+# ==============================================================================
+# 적재 시 인덱스의 범주 코드로 한 번만 만듭니다. 값이 있는 조합(칸)만 보관하는 희소 배열이며,
+# 칸 수는 행 수보다 훨씬 적으므로 요약표/수량 조회는 행을 다시 훑지 않고 칸만 더합니다.
+# - 칸: 차원별 코드 배열 (0 = 결측, i + 1 = labels[i]) + 칸별 수량
+# - 지역은 조회 화면과 같이 사무실(반추) 재고를 "사무실" 로 따로 셉니다.
+# - 모델은 MODEL_GROUPS 통합 모델(model_group 차원)로도 묶어 볼 수 있습니다.
+
+CUBE_DIMS = ("region", "city", "owner", "model", "color", "status")
+DIM_NAMES = {"region": "지역", "city": "시군구", "owner": "보유처", "model": "모델", "model_group": "모델(통합)",
+             "color": "색상", "status": "상태"}
+MISSING = "(없음)"
+TOTAL = "합계"
+
+
+def _column_codes(column, n):
+    # CategoryColumn -> (코드 + 1, 범주 목록). 컬럼이 없으면 전부 결측
+    if column is None: return np.zeros(n, dtype=np.int64), []
+    return column.codes.astype(np.int64) + 1, [str(c) for c in column.categories]
+
+
+class InventoryCube:
+    def __init__(self, index, city=None, model_groups=None):
+        # city: cached_city 컬럼 (인덱스에 없으므로 따로 받음)
+        n = index.n
+        codes, self.labels = {}, {}
+        codes["region"], self.labels["region"] = _column_codes(index.region, n)
+        self.labels["region"] = self.labels["region"] + [OFFICE]
+        codes["region"] = np.where(index.is_office, len(self.labels["region"]), codes["region"])
+        if city is not None:
+            cat = city.astype("category").cat
+            codes["city"], self.labels["city"] = cat.codes.to_numpy().astype(np.int64) + 1, [str(c) for c in cat.categories]
+        else:
+            codes["city"], self.labels["city"] = np.zeros(n, dtype=np.int64), []
+        codes["owner"], self.labels["owner"] = _column_codes(index.owner, n)
+        codes["model"], self.labels["model"] = _column_codes(index.model, n)
+        codes["color"], self.labels["color"] = _column_codes(index.color, n)
+        codes["status"], self.labels["status"] = _column_codes(index.status, n)
+        self.sizes = {d: len(self.labels[d]) + 1 for d in CUBE_DIMS}
+
+        # 차원별 코드를 하나의 정수 키로 합쳐 값이 있는 조합과 수량을 구함 (키가 int64 를 넘으면 행 단위 unique)
+        self.cells = {}
+        if np.prod([float(self.sizes[d]) for d in CUBE_DIMS]) < 2 ** 62:
+            key = np.zeros(n, dtype=np.int64)
+            for d in CUBE_DIMS: key = key * self.sizes[d] + codes[d]
+            keys, counts = np.unique(key, return_counts=True)
+            for d in reversed(CUBE_DIMS):
+                keys, cell = np.divmod(keys, self.sizes[d])
+                self.cells[d] = cell.astype(np.int32)
+        else:
+            combos, counts = np.unique(np.stack([codes[d] for d in CUBE_DIMS], axis=1), axis=0, return_counts=True)
+            for i, d in enumerate(CUBE_DIMS): self.cells[d] = combos[:, i].astype(np.int32)
+        self.counts = counts.astype(np.int64)
+
+        # 통합 모델: 모델 코드 -> 통합 모델 코드
+        self.model_groups = model_groups or {}
+        group_of = {m: g for g, items in self.model_groups.items() for m in items}
+        group_labels = sorted({group_of.get(m, m) for m in self.labels["model"]})
+        group_lookup = {g: i + 1 for i, g in enumerate(group_labels)}
+        self.labels["model_group"] = group_labels
+        self.sizes["model_group"] = len(group_labels) + 1
+        self.group_of_model = np.array([0] + [group_lookup[group_of.get(m, m)] for m in self.labels["model"]], dtype=np.int32)
+        self.lookup = {d: {v: i + 1 for i, v in enumerate(labels)} for d, labels in self.labels.items()}
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def _codes(self, dim):
+        if dim == "model_group": return self.group_of_model[self.cells["model"]]
+        return self.cells[dim]
+
+    def _mask(self, where):
+        # where: {차원: 값 목록}. 값이 없거나 "전체" 포함이면 조건 없음. 모델은 통합 모델 이름도 허용
+        mask = np.ones(len(self.counts), dtype=bool)
+        for dim, values in (where or {}).items():
+            if not values or ALL in values: continue
+            if dim == "model":
+                values = [m for v in values for m in self.model_groups.get(v, [v])]
+            sel = np.zeros(self.sizes[dim], dtype=bool)
+            for v in values:
+                code = self.lookup[dim].get(v)
+                if code is not None: sel[code] = True
+            mask &= sel[self._codes(dim)]
+        return mask
+
+    def _label(self, dim, code):
+        return self.labels[dim][code - 1] if code else MISSING
+
+    # --------------------------------------------------------------------------
+    # 조회
+    # --------------------------------------------------------------------------
+    def counts_by(self, dim, where=None):
+        # 조건에 맞는 재고의 dim 값별 수량 {값: 수량} (수량 0 제외, 결측 제외)
+        mask = self._mask(where)
+        counts = np.bincount(self._codes(dim)[mask], weights=self.counts[mask], minlength=self.sizes[dim])
+        present = np.flatnonzero(counts[1:]) + 1
+        return {self.labels[dim][c - 1]: int(counts[c]) for c in present}
+
+    def pivot(self, rows, cols=None, where=None, margins=True):
+        # rows(, cols) 차원별 수량표. 값이 없는 행/열은 제외하고 합계 행/열을 붙임
+        mask = self._mask(where)
+        weights = self.counts[mask]
+        r = self._codes(rows)[mask].astype(np.int64)
+        nr = self.sizes[rows]
+        if cols is None:
+            table = np.bincount(r, weights=weights, minlength=nr).astype(np.int64)[:, None]
+            col_labels, keep_c = ["수량"], np.array([0])
+        else:
+            nc = self.sizes[cols]
+            c = self._codes(cols)[mask].astype(np.int64)
+            table = np.bincount(r * nc + c, weights=weights, minlength=nr * nc).astype(np.int64).reshape(nr, nc)
+            keep_c = np.flatnonzero(table.sum(axis=0))
+            col_labels = [self._label(cols, k) for k in keep_c]
+        keep_r = np.flatnonzero(table.sum(axis=1))
+        out = pd.DataFrame(table[np.ix_(keep_r, keep_c)], index=[self._label(rows, k) for k in keep_r], columns=col_labels)
+        out.index.name = DIM_NAMES.get(rows, rows)
+        if margins and len(out):
+            if cols is not None: out[TOTAL] = out.sum(axis=1)
+            out.loc[TOTAL] = out.sum(axis=0)
+        return out
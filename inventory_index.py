@@ -0,0 +1,262 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ingest import resolve_columns
+
+# ==============================================================================
+# 조회용 사전 인덱스
+# ==============================================================================
+# 적재 시 한 번만 만들고, 조회는 문자열 비교 없이 정수 코드/비트맵 연산으로 처리합니다.
+# - 컬럼별 범주 코드 (int32)
+# - 값별 행 비트맵 (np.packbits 로 압축, 종류가 적은 컬럼)
+# - 보유처 오름차순 행 순서 + 보유처별 구간 (종류가 많은 보유처는 비트맵 대신 구간 사용)
+# - 사무실(반추) / 도매 플래그
+# - 출고일 (일 단위 정수 배열, 경과일 조건/오래된순 정렬용)
+
+ALL = "전체"
+OFFICE = "사무실"
+NO_DATE = np.iinfo(np.int32).max
+# 경과일 기준 날짜의 시간대 (np.datetime64('today') 는 UTC 날짜라 00~09시에 하루 어긋남)
+LOCAL_TZ = "Asia/Seoul"
+
+
+def local_today(now=None):
+    # now: 기준 시각 (시간대 포함, 없으면 현재 시각)
+    now = pd.Timestamp.now(tz=LOCAL_TZ) if now is None else pd.Timestamp(now).tz_convert(LOCAL_TZ)
+    return np.datetime64(now.date(), 'D')
+
+
+def age_cutoff(min_age_days, today=None):
+    # "출고 후 min_age_days 일 이상" -> 허용되는 마지막 출고일 (일 단위 정수). 조회 캐시 키로도 쓰여 날짜가 바뀌면 새로 조회됨
+    if today is None: today = local_today()
+    return int((np.datetime64(today, 'D') - np.timedelta64(int(min_age_days), 'D')).astype(np.int64))
+
+
+def _as_category(values):
+    if isinstance(values.dtype, pd.CategoricalDtype): return values
+    return values.astype("category")
+
+
+class CategoryColumn:
+    def __init__(self, values, bitmaps=True):
+        cat = _as_category(values).cat
+        self.n = len(values)
+        self.categories = list(cat.categories)
+        self.lookup = {v: i for i, v in enumerate(self.categories)}
+        self.codes = cat.codes.to_numpy().astype(np.int32, copy=False)
+        # 코드 순(결측은 맨 뒤)으로 정렬한 행 순서와 코드별 구간
+        sort_key = np.where(self.codes < 0, len(self.categories), self.codes)
+        self.order = np.argsort(sort_key, kind="stable").astype(np.int64, copy=False)
+        bounds = np.searchsorted(sort_key[self.order], np.arange(len(self.categories) + 1))
+        self.starts = bounds[:-1]
+        self.ends = bounds[1:]
+        self.bitmaps = None
+        if bitmaps:
+            self.bitmaps = [self._rows_to_bitmap(self.rows_of_code(i)) for i in range(len(self.categories))]
+
+    def _rows_to_bitmap(self, rows):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def rows_of_code(self, code):
+        return self.order[self.starts[code]:self.ends[code]]
+
+    def codes_of(self, values):
+        return [self.lookup[v] for v in values if v in self.lookup]
+
+    def count_of_code(self, code):
+        return int(self.ends[code] - self.starts[code])
+
+    def bitmap(self, values):
+        codes = self.codes_of(values)
+        if self.bitmaps is not None:
+            out = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+            for c in codes: np.bitwise_or(out, self.bitmaps[c], out=out)
+            return out
+        if not codes: return np.zeros((self.n + 7) // 8, dtype=np.uint8)
+        return self._rows_to_bitmap(np.concatenate([self.rows_of_code(c) for c in codes]))
+
+    def values_in(self, mask):
+        # mask 에 해당하는 행들의 고유 값 (범주 순서 = 정렬 순서, 결측 제외)
+        counts = np.bincount(self.codes[mask] + 1, minlength=len(self.categories) + 1)[1:]
+        return [self.categories[c] for c in np.flatnonzero(counts)]
+
+
+class InventoryIndex:
+    def __init__(self, df, roles=None):
+        self.roles = roles or df.attrs.get('col_roles') or resolve_columns(df.columns)
+        self.n = len(df)
+        self.nbytes = (self.n + 7) // 8
+
+        def column(col, bitmaps=True):
+            if col is None or col not in df.columns: return None
+            return CategoryColumn(df[col], bitmaps=bitmaps)
+
+        self.model = column(self.roles.get('모델명'))
+        self.color = column(self.roles.get('색상'))
+        self.status = column(self.roles.get('status'))
+        self.region = column('cached_region')
+        # 보유처는 종류가 많으므로 비트맵 대신 정렬 구간만 유지
+        self.owner = column(self.roles.get('보유처'), bitmaps=False)
+
+        if self.owner is not None:
+            names = [str(c) for c in self.owner.categories]
+            office_cat = np.array(["반추" in s for s in names] + [False], dtype=bool)
+            wholesale_cat = np.array([s.startswith('도매-') for s in names] + [False], dtype=bool)
+            self.is_office = office_cat[self.owner.codes]
+            self.is_wholesale = wholesale_cat[self.owner.codes]
+            self.owner_order = self.owner.order
+        else:
+            self.is_office = np.zeros(self.n, dtype=bool)
+            self.is_wholesale = np.zeros(self.n, dtype=bool)
+            self.owner_order = np.arange(self.n, dtype=np.int64)
+        self.office_bitmap = np.packbits(self.is_office)
+
+        # 출고일 (1970-01-01 부터의 일수, 모르면 NO_DATE). 사무실 재고는 화면과 같이 출고일 없음으로 취급
+        self.shipped_day = np.full(self.n, NO_DATE, dtype=np.int32)
+        if 'cached_shipped' in df.columns:
+            shipped = df['cached_shipped'].to_numpy('datetime64[D]')
+            known = ~np.isnat(shipped) & ~self.is_office
+            self.shipped_day[known] = shipped[known].astype(np.int64)
+        self.dated = self.shipped_day != NO_DATE
+
+    # --------------------------------------------------------------------------
+    # 비트맵 연산
+    # --------------------------------------------------------------------------
+    def _full(self):
+        return np.packbits(np.ones(self.n, dtype=bool))
+
+    def _to_mask(self, bitmap):
+        return np.unpackbits(bitmap, count=self.n).view(bool)
+
+    @staticmethod
+    def _selected(values):
+        # 미선택 또는 "전체" 포함 시 필터 없음
+        return bool(values) and ALL not in values
+
+    def filter_bitmap(self, models=None, colors=None, owners=None, regions=None, shipped_by=None):
+        # shipped_by: age_cutoff() 결과. 그날 이전에 출고된(출고일을 아는) 행만
+        bm = self._full()
+        if models and self.model is not None:
+            np.bitwise_and(bm, self.model.bitmap(models), out=bm)
+        if self._selected(colors) and self.color is not None:
+            np.bitwise_and(bm, self.color.bitmap(colors), out=bm)
+        if self._selected(owners) and self.owner is not None:
+            np.bitwise_and(bm, self.owner.bitmap(owners), out=bm)
+        if self._selected(regions):
+            others = [r for r in regions if r != OFFICE]
+            region_bm = self.region.bitmap(others) if (others and self.region is not None) else np.zeros(self.nbytes, dtype=np.uint8)
+            if OFFICE in regions: np.bitwise_or(region_bm, self.office_bitmap, out=region_bm)
+            np.bitwise_and(bm, region_bm, out=bm)
+        if shipped_by is not None:
+            np.bitwise_and(bm, np.packbits(self.shipped_day <= shipped_by), out=bm)
+        return bm
+
+    def mask(self, **filters):
+        return self._to_mask(self.filter_bitmap(**filters))
+
+    # --------------------------------------------------------------------------
+    # 조회
+    # --------------------------------------------------------------------------
+    def search(self, models=None, colors=None, owners=None, regions=None, shipped_by=None):
+        # 조건에 맞는 행 위치를 보유처 오름차순(같은 보유처는 원본 순서)으로 돌려줍니다.
+        mask = self.mask(models=models, colors=colors, owners=owners, regions=regions, shipped_by=shipped_by)
+        return self.owner_order[mask[self.owner_order]]
+
+    def without_wholesale(self, positions):
+        # 지도 표시용: 도매 보유처 제외
+        return positions[~self.is_wholesale[positions]]
+
+    def order_by_owner(self, positions, ascending=True):
+        # search() 결과(보유처 오름차순)를 목록 정렬 방향에 맞게 재배열. 같은 보유처는 원본 순서, 결측은 맨 뒤
+        if ascending or self.owner is None: return positions
+        codes = self.owner.codes[positions]
+        key = np.where(codes < 0, -1, codes)
+        return positions[np.argsort(-key, kind="stable")]
+
+    def order_by_shipped(self, positions):
+        # 오래된 출고일 순. 같은 날은 기존 순서(보유처 오름차순), 출고일 모름은 맨 뒤
+        return positions[np.argsort(self.shipped_day[positions], kind="stable")]
+
+    def age_days(self, positions, today=None):
+        # 출고 후 경과일 (출고일 모름은 -1)
+        if today is None: today = local_today()
+        day = self.shipped_day[positions]
+        return np.where(day == NO_DATE, -1, int(np.datetime64(today, 'D').astype(np.int64)) - day.astype(np.int64))
+
+
+# ==============================================================================
+# 조회 결과 캐시 (프로세스 공용 LRU)
+# ==============================================================================
+# 같은 조건의 조회는 모든 세션이 결과를 공유합니다. DataFrame 대신 행 위치 배열만 보관하며,
+# 보관 용량(바이트)이 SEARCH_CACHE_BYTES 를 넘으면 가장 오래 안 쓴 결과부터 버립니다.
+# 데이터(파일 해시)마다 새 인덱스/캐시를 만들므로 새 파일 업로드 시 자동으로 무효화됩니다.
+SEARCH_CACHE_BYTES = 64 * 1024 * 1024
+
+SearchResult = namedtuple("SearchResult", ["positions", "map_positions", "list_key", "map_key"])
+
+
+def _frozen(arr):
+    arr.flags.writeable = False
+    return arr
+
+
+def search_result(index, positions):
+    # 행 위치 -> SearchResult (지도용 도매 제외 위치와 결과 해시 포함)
+    map_positions = index.without_wholesale(positions)
+    return SearchResult(
+        _frozen(positions), _frozen(map_positions),
+        hashlib.sha1(positions.tobytes()).hexdigest(), hashlib.sha1(map_positions.tobytes()).hexdigest(),
+    )
+
+
+class SearchCache:
+    def __init__(self, index, max_bytes=SEARCH_CACHE_BYTES):
+        self.index = index
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        # 보관 중인 조회 결과 수
+        return len(self._entries)
+
+    @staticmethod
+    def normalize(models=None, colors=None, owners=None, regions=None, shipped_by=None):
+        # 결과가 같은 조건은 같은 키가 되도록 정렬/중복 제거 ("전체" 포함 = 필터 없음)
+        def norm(values, all_means_none=True):
+            values = set(values or ())
+            if all_means_none and ALL in values: return ()
+            return tuple(sorted(values))
+        return norm(models, all_means_none=False), norm(colors), norm(owners), norm(regions), shipped_by
+
+    def search(self, models=None, colors=None, owners=None, regions=None, shipped_by=None):
+        key = self.normalize(models, colors, owners, regions, shipped_by)
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return hit
+            self.misses += 1
+
+        m, c, o, r, d = key
+        result = search_result(self.index, self.index.search(models=list(m), colors=list(c), owners=list(o), regions=list(r), shipped_by=d))
+        size = result.positions.nbytes + result.map_positions.nbytes
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = result
+                self.nbytes += size
+                while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                    _, old = self._entries.popitem(last=False)
+                    self.nbytes -= old.positions.nbytes + old.map_positions.nbytes
+            return self._entries[key]
@@ -0,0 +1,425 @@
+import json
+from functools import cached_property
+
+import folium
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from folium.elements import JSCSSMixin
+from jinja2 import Template
+
+from geocode import get_city_center
+
+# [기능 추가] 모바일 제스처 처리를 위한 플러그인 확인
+# 한 손가락 스크롤 / 두 손가락 줌 기능을 담당합니다.
+try:
+    from folium.plugins import GestureHandling
+    gesture_handling_available = True
+except ImportError:
+    gesture_handling_available = False
+
+# ==============================================================================
+# 지도 마커 렌더링
+# ==============================================================================
+# 보유처마다 folium.Marker(DivIcon + 팝업 HTML)를 만들면 마커 수만큼 HTML/JS 가 늘어납니다.
+# 대신 모든 보유처를 하나의 압축 JSON 배열로 넘기고, 브라우저에서 공용 아이콘/팝업 템플릿으로 그립니다.
+# - 아이콘: 스타일 + 수량 배지 조합별로 L.divIcon 하나만 만들어 공유 (배지 = 보유처의 조회 결과 수량)
+# - 팝업: 보유처별 표 데이터만 별도 목록으로 넘기고, 마커를 클릭할 때 템플릿으로 표를 만듦
+# - 보유처가 CLUSTER_THRESHOLD 개를 넘으면 markercluster 로 묶어서 표시
+# - 선택 강조는 별도 레이어로 분리 → 목록 클릭 시 지도 본체는 다시 그리지 않음
+
+CLUSTER_THRESHOLD = 300
+COORD_DIGITS = 6
+
+# 화면 영역 모드: 지도가 돌려준 화면 범위/줌에 맞춰 보낼 마커만 고름
+VIEWPORT_MAX_MARKERS = 400      # 화면 안 보유처가 이보다 많으면 개별 마커 대신 묶음
+VIEWPORT_DETAIL_STORES = 60     # 화면 안 보유처가 이 이하이면 줌과 관계없이 개별 마커
+REGION_MAX_ZOOM = 8             # 이 줌 이하: 지역(권역) 묶음
+CITY_MAX_ZOOM = 11              # 이 줌 이하: 시군구/동 묶음
+VIEWPORT_PAD = 0.25             # 화면 범위를 사방으로 넓혀 조금 움직여도 마커가 남도록
+
+MARKERCLUSTER_JS = [
+    ("markerclusterjs", "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js"),
+]
+MARKERCLUSTER_CSS = [
+    ("markerclustercss", "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css"),
+    ("markerclusterdefaultcss", "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css"),
+]
+
+
+def get_real_color(korean_color):
+    if pd.isna(korean_color): return '#3388ff', '#000000'
+    c = str(korean_color).lower()
+    if '블랙' in c or 'black' in c: return '#000000', '#FFFFFF'
+    elif '화이트' in c or 'white' in c or '실버' in c: return '#FFFFFF', '#000000'
+    elif '그레이' in c or '티타늄' in c: return '#808080', '#000000'
+    elif '블루' in c: return '#0000FF', '#FFFFFF'
+    elif '핑크' in c: return '#FFC0CB', '#000000'
+    elif '그린' in c: return '#008000', '#FFFFFF'
+    elif '골드' in c or '옐로우' in c: return '#FFD700', '#000000'
+    elif '퍼플' in c: return '#800080', '#FFFFFF'
+    elif '레드' in c: return '#FF0000', '#FFFFFF'
+    return '#3388ff', '#000000'
+
+
+def marker_style(colors, name, is_selected):
+    # (배경색, 아이콘색, 아이콘 모양, 테두리 스타일)
+    if len(colors) == 1:
+        hex_c, _ = get_real_color(colors[0])
+        if hex_c.upper() == '#FFFFFF': bg_c, ic_c = "rgba(0,0,0,0.4)", "white"
+        else: bg_c, ic_c = "rgba(255,255,255,0.8)", hex_c
+    else: bg_c, ic_c = "rgba(128,0,128,0.8)", "white"
+
+    if is_selected: bg_c, ic_c = "rgba(255,0,0,0.85)", "white"
+
+    icon_shape = "fa-mobile"
+    border_style = "border-radius: 50%;"
+    if "반추" in str(name):
+        icon_shape = "fa-star"
+        bg_c = "rgba(255, 255, 0, 0.9)"
+        ic_c = "red"
+        border_style = "border-radius: 10%; border: 2px solid red;"
+    return bg_c, ic_c, icon_shape, border_style
+
+
+def icon_html(style):
+    bg_c, ic_c, icon_shape, border_style = style
+    return (f'<div style="background-color: {bg_c}; color: {ic_c}; width: 24px; height: 24px; {border_style}'
+            f' display: flex; justify-content: center; align-items: center; font-size: 12px;'
+            f' box-shadow: 1px 1px 3px rgba(0,0,0,0.3);"><i class="fa {icon_shape}"></i></div>')
+
+
+def _text_list(values):
+    # 결측은 "-" 로 표시하는 문자열 목록
+    values = pd.Series(values).astype(object)
+    return values.where(values.notna(), "-").map(str).tolist()
+
+
+def _split(values, bounds):
+    return [values[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+
+def build_store_records(map_df, roles):
+    # 보유처별 마커 데이터, 공용 아이콘 목록, 보유처별 팝업 표(지연 표시용)
+    # 선택 강조는 포함하지 않으므로 같은 조회 결과에 대해서는 항상 같은 값입니다. (selection_layer 참고)
+    # 보유처 묶음/색상 수/팝업 집계를 모두 전체 데이터에 대한 한 번의 groupby 로 계산합니다.
+    real_boyu = roles.get('보유처')
+    real_model = roles.get('모델명')
+    real_color = roles.get('색상')
+    real_status = roles.get('status')
+    real_target = roles.get('target')
+
+    keys = ['cached_lat', 'cached_lon', real_boyu]
+    gid = map_df.groupby(keys, observed=True, sort=True).ngroup().to_numpy()
+    valid = ~np.isnan(gid) if gid.dtype.kind == "f" else np.ones(len(gid), dtype=bool)
+    frame = map_df[valid]
+    gid = gid[valid].astype(np.int64)
+    n_stores = int(gid.max()) + 1 if len(gid) else 0
+
+    # 보유처 대표값 (그룹 첫 행)
+    _, first = np.unique(gid, return_index=True)
+    lat = frame['cached_lat'].to_numpy()[first]
+    lon = frame['cached_lon'].to_numpy()[first]
+    names = frame[real_boyu].iloc[first].tolist()
+    regions = _text_list(frame['cached_region'].iloc[first])
+    totals = np.bincount(gid, minlength=n_stores)
+
+    # 보유처별 색상 종류 수(결측도 한 종류)와 단일 색상 값
+    if real_color:
+        colors = pd.DataFrame({'g': gid, 'c': frame[real_color].to_numpy()}).drop_duplicates()
+        color_counts = np.bincount(colors['g'].to_numpy(), minlength=n_stores)
+        single_color = dict(zip(colors['g'].tolist(), colors['c'].tolist()))
+    else:
+        color_counts = np.ones(n_stores, dtype=np.int64)
+        single_color = {}
+
+    icons, style_ids, stores = [], {}, []
+    for i in range(n_stores):
+        name = names[i]
+        marker_colors = [single_color.get(i)] if color_counts[i] == 1 else [None, None]
+        style = marker_style(marker_colors, name, False)
+        if style not in style_ids:
+            style_ids[style] = len(icons)
+            icons.append(icon_html(style))
+        stores.append([
+            round(float(lat[i]), COORD_DIGITS), round(float(lon[i]), COORD_DIGITS), str(name),
+            regions[i], style_ids[style], int(totals[i]),
+        ])
+
+    # 팝업 표: (보유처, 모델, 색상, 상태, 출고일) 별 수량
+    agg_cols = [real_model]
+    if real_color: agg_cols.append(real_color)
+    if real_status: agg_cols.append(real_status)
+    if real_target: agg_cols.append(real_target)
+    summary = (frame[agg_cols].assign(_store=gid)
+               .groupby(['_store'] + agg_cols, dropna=False, observed=True, sort=True)
+               .size().reset_index(name='count'))
+    store_of_row = summary['_store'].to_numpy()
+    n_rows = len(summary)
+
+    def column(col):
+        if not col: return ["-"] * n_rows
+        return _text_list(summary[col])
+
+    targets = column(real_target)
+    # [수정] 반추정보통신인 경우 팝업창 출고일 미표기(-) 처리
+    office = np.array(["반추" in str(n) for n in names] + [False], dtype=bool)
+    for r in np.flatnonzero(office[store_of_row]): targets[r] = "-"
+
+    rows = [list(r) for r in zip(column(real_model), column(real_color), column(real_status),
+                                 targets, summary['count'].astype(int).tolist())]
+    bounds = np.searchsorted(store_of_row, np.arange(n_stores + 1))
+    popups = _split(rows, bounds)
+    return icons, stores, popups
+
+
+# ==============================================================================
+# 클라이언트 렌더링 레이어
+# ==============================================================================
+class StoreMarkerLayer(JSCSSMixin, MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var data = {{ this.payload }};
+            var esc = function(s) {
+                return String(s).replace(/[&<>"']/g, function(c) {
+                    return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+                });
+            };
+            // 아이콘 + 수량 배지. (스타일, 수량) 조합별로 한 번만 만들어 공유
+            var iconCache = {};
+            var iconFor = function(st) {
+                var key = st[4] + ":" + st[5];
+                if (!(key in iconCache)) {
+                    iconCache[key] = L.divIcon({className: "empty", html: "<div style='position:relative;'>" + data.icons[st[4]]
+                        + "<span style='position:absolute; top:-7px; left:16px; min-width:14px; padding:0 3px; border-radius:7px;"
+                        + " background:#fff; color:#000; border:1px solid #555; font-size:9px; font-weight:bold; line-height:12px;"
+                        + " text-align:center; white-space:nowrap;'>" + st[5] + "</span></div>"});
+                }
+                return iconCache[key];
+            };
+            var td = "border:1px solid #000; padding:5px; text-align:center;";
+            var th = td + " white-space:nowrap;";
+            var popupHtml = function(st, i) {
+                var rows = data.popups[i].map(function(r) {
+                    return "<tr>" + r.map(function(v) { return "<td style='" + td + "'>" + esc(v) + "</td>"; }).join("") + "</tr>";
+                }).join("");
+                return "<div style='width:100%; min-width:280px; font-family:sans-serif;'>"
+                    + "<div style='font-size:14px; font-weight:bold; color:#000; margin-bottom:10px; text-align:center; border-bottom:1px solid #ddd; padding-bottom:5px;'>"
+                    + esc(st[3]) + " - " + esc(st[2]) + "</div>"
+                    + "<table style='width:100%; border-collapse:collapse; font-size:11px;'><thead><tr style='background-color:#f0f0f0;'>"
+                    + ["모델", "색상", "상태", "출고일", "수량"].map(function(h) { return "<th style='" + th + "'>" + h + "</th>"; }).join("")
+                    + "</tr></thead><tbody>" + rows + "</tbody></table>"
+                    + "<div style='text-align:right; font-size:11px; font-weight:bold; margin-top:10px;'>총: " + st[5] + "대</div></div>";
+            };
+            var markers = data.stores.map(function(st, i) {
+                var marker = L.marker([st[0], st[1]], {icon: iconFor(st)});
+                marker.bindPopup(function() { return popupHtml(st, i); }, {maxWidth: 400});
+                return marker;
+            });
+            var map = {{ this._parent.get_name() }};
+            {%- if this.clustered %}
+            var cluster = L.markerClusterGroup({chunkedLoading: true, showCoverageOnHover: false});
+            cluster.addLayers(markers);
+            cluster.addTo(map);
+            {%- else %}
+            L.featureGroup(markers).addTo(map);
+            {%- endif %}
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, icons, stores, popups, cluster_threshold=CLUSTER_THRESHOLD):
+        super().__init__()
+        self._name = "StoreMarkerLayer"
+        self.icons = icons
+        self.stores = stores
+        self.popups = popups
+        self.clustered = len(stores) > cluster_threshold
+        # 클러스터를 쓸 때만 markercluster 리소스를 불러옵니다.
+        self.default_js = list(MARKERCLUSTER_JS) if self.clustered else []
+        self.default_css = list(MARKERCLUSTER_CSS) if self.clustered else []
+
+    @cached_property
+    def payload(self):
+        text = json.dumps({"icons": self.icons, "stores": self.stores, "popups": self.popups}, ensure_ascii=False, separators=(",", ":"))
+        # 스크립트 태그 안에 들어가므로 "</" 는 이스케이프
+        return text.replace("</", "<\\/")
+
+
+def build_inventory_map(records, markers=True):
+    # records = build_store_records(...) 결과 (조회 결과별로 캐시해서 재사용)
+    # markers=False: 지도 틀(범위/제스처)만. 마커는 화면 영역 레이어(viewport_layer)로 따로 보냄
+    stores = records[1]
+    min_lat = min(st_[0] for st_ in stores)
+    max_lat = max(st_[0] for st_ in stores)
+    min_lon = min(st_[1] for st_ in stores)
+    max_lon = max(st_[1] for st_ in stores)
+
+    c_lat = (min_lat + max_lat) / 2
+    c_lon = (min_lon + max_lon) / 2
+
+    m = folium.Map(location=[c_lat, c_lon], zoom_start=10)
+    m.fit_bounds([[min_lat, min_lon], [max_lat, max_lon]], max_zoom=12)
+
+    if gesture_handling_available:
+        try: GestureHandling().add_to(m)
+        except: pass
+
+    if markers: StoreMarkerLayer(*records).add_to(m)
+    return m
+
+
+def map_payload_bytes(m):
+    # 지도(와 st_folium 이 붙인 추가 레이어)에 실린 마커 데이터(JSON) 크기 (진단용, 렌더링 때 만든 문자열을 재사용)
+    total = 0
+    for child in m._children.values():
+        if isinstance(child, (StoreMarkerLayer, BubbleLayer)): total += len(child.payload.encode("utf-8"))
+        elif isinstance(child, folium.FeatureGroup): total += map_payload_bytes(child)
+    return total
+
+
+def selection_layer(records, clicked_name, nearby=None):
+    # 선택된 보유처 강조 마커만 담은 레이어. (주변 조회면 기준 위치와 반경 원도 함께)
+    # st_folium(feature_group_to_add=...) 로 넘기면 지도 본체는 그대로 두고 이 레이어만 교체됩니다.
+    # 클릭은 아래 원래 마커로 통과하도록 interactive=False (팝업은 원래 마커에서 열림)
+    fg = folium.FeatureGroup(name="selected_store")
+    if nearby:
+        folium.Circle(location=list(nearby['center']), radius=nearby['radius_km'] * 1000, color="#1565c0",
+                      weight=1, fill=True, fill_opacity=0.05, interactive=False).add_to(fg)
+        folium.CircleMarker(location=list(nearby['center']), radius=6, color="#1565c0", fill=True,
+                            fill_opacity=1.0, interactive=False).add_to(fg)
+    if clicked_name is None: return fg
+    for st_ in records[1]:
+        if st_[2] != clicked_name: continue
+        folium.Marker(
+            location=[st_[0], st_[1]],
+            icon=folium.DivIcon(html=icon_html(marker_style([None], clicked_name, True))),
+            z_index_offset=1000,
+            interactive=False,
+        ).add_to(fg)
+    return fg
+
+
+# ==============================================================================
+# 화면 영역 모드 (보이는 범위만 / 줌에 따라 묶음)
+# ==============================================================================
+# 지도 본체(build_inventory_map(markers=False))는 조회 결과마다 한 번만 그리고,
+# 지도를 움직일 때마다 돌려받은 화면 범위/줌으로 보낼 마커만 골라 추가 레이어로 교체합니다.
+# - 줌이 낮으면 지역(권역) 또는 시군구/동(cached_city) 단위 묶음 원 (지명 대표 좌표, 없으면 보유처 평균 위치)
+# - 줌이 높고 화면 안 보유처가 적으면 개별 마커 (팝업 포함)
+# 어떤 경우에도 보내는 마커 수는 VIEWPORT_MAX_MARKERS 안팎으로 유지됩니다.
+class BubbleLayer(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var data = {{ this.payload }};
+            var esc = function(s) {
+                return String(s).replace(/[&<>"']/g, function(c) {
+                    return {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"}[c];
+                });
+            };
+            var layer = {{ this._parent.get_name() }};
+            data.bubbles.forEach(function(b) {
+                var size = Math.round(26 + 8 * Math.log10(Math.max(b[4], 1)));
+                var icon = L.divIcon({className: "empty", iconSize: [size, size], html:
+                    "<div style='width:" + size + "px; height:" + size + "px; border-radius:50%; background-color:rgba(21,101,192,0.75);"
+                    + " color:white; display:flex; justify-content:center; align-items:center; font-size:11px; font-weight:bold;"
+                    + " box-shadow:1px 1px 3px rgba(0,0,0,0.3);'>" + b[4] + "</div>"});
+                var marker = L.marker([b[0], b[1]], {icon: icon});
+                marker.bindTooltip(esc(b[2]) + " · 보유처 " + b[3] + "곳 · " + b[4] + "대");
+                // 묶음을 누르면 그 위치로 확대 (확대 후 더 자세한 단계로 다시 받음)
+                marker.on("click", function() { this._map.setView(this.getLatLng(), this._map.getZoom() + 2); });
+                marker.addTo(layer);
+            });
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, bubbles):
+        super().__init__()
+        self._name = "BubbleLayer"
+        self.bubbles = bubbles
+
+    @cached_property
+    def payload(self):
+        return json.dumps({"bubbles": self.bubbles}, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def store_cities(map_df, roles, records):
+    # 보유처 records 순서대로 시군구/동(cached_city)
+    real_boyu = roles.get('보유처')
+    if 'cached_city' not in map_df.columns or real_boyu is None: return [None] * len(records[1])
+    pairs = map_df[[real_boyu, 'cached_city']].drop_duplicates(real_boyu)
+    lookup = dict(zip(pairs[real_boyu].astype(object).map(str), pairs['cached_city'].astype(object)))
+    return [lookup.get(st_[2]) for st_ in records[1]]
+
+
+class MarkerViewport:
+    # 조회 결과 하나의 화면 영역 선택용 사전 계산 (조회 결과별로 캐시해서 재사용)
+    def __init__(self, records, cities):
+        self.icons, self.stores, self.popups = records
+        self.lat = np.array([st_[0] for st_ in self.stores], dtype=np.float64)
+        self.lon = np.array([st_[1] for st_ in self.stores], dtype=np.float64)
+        self.totals = np.array([st_[5] for st_ in self.stores], dtype=np.int64)
+        self.levels = {
+            "region": self._groups([st_[3] for st_ in self.stores], None),
+            "city": self._groups(cities, get_city_center),
+        }
+
+    def _groups(self, labels, center_of):
+        codes, names = pd.factorize(pd.Series(labels, dtype=object).fillna("-"))
+        n = len(names)
+        stores = np.bincount(codes, minlength=n)
+        totals = np.bincount(codes, weights=self.totals, minlength=n).astype(np.int64)
+        lat = np.bincount(codes, weights=self.lat, minlength=n) / np.maximum(stores, 1)
+        lon = np.bincount(codes, weights=self.lon, minlength=n) / np.maximum(stores, 1)
+        if center_of is not None:
+            for i, name in enumerate(names):
+                c = center_of(name)
+                if c is not None: lat[i], lon[i] = c
+        return {"names": [str(x) for x in names], "lat": lat, "lon": lon, "stores": stores, "totals": totals}
+
+    @staticmethod
+    def _in_bounds(lat, lon, bounds):
+        if not bounds: return np.ones(len(lat), dtype=bool)
+        (s, w), (n, e) = bounds
+        pad_lat, pad_lon = (n - s) * VIEWPORT_PAD, (e - w) * VIEWPORT_PAD
+        return (lat >= s - pad_lat) & (lat <= n + pad_lat) & (lon >= w - pad_lon) & (lon <= e + pad_lon)
+
+    def level_for(self, n_in_view, zoom):
+        if n_in_view <= VIEWPORT_DETAIL_STORES: return "store"
+        if zoom is None:
+            # 처음(화면 정보 없음)은 결과 전체가 보이는 상태
+            return "store" if n_in_view <= VIEWPORT_MAX_MARKERS and len(self.stores) <= CLUSTER_THRESHOLD else "region"
+        if zoom > CITY_MAX_ZOOM and n_in_view <= VIEWPORT_MAX_MARKERS: return "store"
+        return "city" if zoom > REGION_MAX_ZOOM else "region"
+
+    def layer(self, bounds=None, zoom=None):
+        # bounds: [[남, 서], [북, 동]] 또는 None, zoom: 정수 또는 None -> (FeatureGroup, 통계)
+        fg = folium.FeatureGroup(name="viewport_markers")
+        in_view = self._in_bounds(self.lat, self.lon, bounds)
+        n_in_view = int(in_view.sum())
+        level = self.level_for(n_in_view, zoom)
+        if level == "store":
+            idx = np.flatnonzero(in_view)
+            sent = len(idx)
+            StoreMarkerLayer(self.icons, [self.stores[i] for i in idx], [self.popups[i] for i in idx],
+                             cluster_threshold=len(idx)).add_to(fg)
+        else:
+            g = self.levels[level]
+            keep = np.flatnonzero(self._in_bounds(g["lat"], g["lon"], bounds) & (g["stores"] > 0))
+            sent = len(keep)
+            BubbleLayer([[round(float(g["lat"][i]), COORD_DIGITS), round(float(g["lon"][i]), COORD_DIGITS),
+                          g["names"][i], int(g["stores"][i]), int(g["totals"][i])] for i in keep]).add_to(fg)
+        return fg, {"level": level, "in_view": n_in_view, "sent": sent}
+
+
+def viewport_bounds(map_state):
+    # st_folium 이 돌려준 bounds -> [[남, 서], [북, 동]] (값이 없으면 None)
+    b = (map_state or {}).get("bounds") or {}
+    sw, ne = b.get("_southWest") or {}, b.get("_northEast") or {}
+    try:
+        return [[float(sw["lat"]), float(sw["lng"])], [float(ne["lat"]), float(ne["lng"])]]
+    except (KeyError, TypeError, ValueError):
+        return None
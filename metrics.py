@@ -0,0 +1,105 @@
+import cProfile
+import datetime
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# ==============================================================================
+# 실행(rerun) 단위 단계별 측정 / 지표 로그 / 프로파일
+# ==============================================================================
+# - 단계별 소요 시간(ms)과 행 수, 지도 데이터 크기 등을 기록
+# - 실행마다 한 줄씩 JSON Lines 로그에 추가 (크기 기준 자동 교체)
+# - 요청 시 한 번의 실행만 cProfile 로 측정해 .prof 파일과 요약 텍스트를 남김
+
+METRICS_DIR = os.environ.get("INVENTORY_METRICS_DIR", "metrics")
+METRICS_FILE = "metrics.jsonl"
+METRICS_MAX_BYTES = 5 * 1024 * 1024
+METRICS_BACKUPS = 3
+PROFILE_TOP = 40
+
+_logger = None
+
+
+def _metrics_logger():
+    global _logger
+    if _logger is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        logger = logging.getLogger("inventory.metrics")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not logger.handlers:
+            handler = RotatingFileHandler(os.path.join(METRICS_DIR, METRICS_FILE), maxBytes=METRICS_MAX_BYTES,
+                                          backupCount=METRICS_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+class RunMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timestamp = datetime.datetime.now().isoformat(timespec="milliseconds")
+        self.stages = []
+        self.info = {}
+        self.finished = False
+
+    @contextmanager
+    def stage(self, name, **info):
+        # with run.stage("search") as s: ... s["rows"] = n
+        rec = {"stage": name, **info}
+        t = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["ms"] = round((time.perf_counter() - t) * 1000, 2)
+            self.stages.append(rec)
+
+    def to_dict(self):
+        return {
+            "ts": self.timestamp,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": self.stages,
+            **self.info,
+        }
+
+    def finish(self):
+        # 실행 기록을 로그에 남기고 dict 로 돌려줌 (st.rerun 직전에도 호출 가능, 한 번만 기록)
+        record = self.to_dict()
+        if not self.finished:
+            self.finished = True
+            try:
+                _metrics_logger().info(json.dumps(record, ensure_ascii=False, default=str))
+            except Exception:
+                # 지표 기록 실패(디스크/권한 등)는 화면에 영향을 주지 않습니다.
+                pass
+        return record
+
+
+# ==============================================================================
+# 한 번의 실행 프로파일 (cProfile)
+# ==============================================================================
+def start_profile():
+    prof = cProfile.Profile()
+    prof.enable()
+    return prof
+
+
+def stop_profile(prof, top=PROFILE_TOP):
+    # 누적 시간 상위 함수 요약 텍스트와 저장된 .prof 경로
+    prof.disable()
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
+    path = None
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"profile-{datetime.datetime.now():%Y%m%d-%H%M%S}.prof")
+        prof.dump_stats(path)
+    except Exception:
+        path = None
+    return out.getvalue(), path
@@ -0,0 +1,366 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import DatasetStore
+from facets import MODEL_GROUPS, expand_models
+from inventory_index import age_cutoff, search_result
+
+# ==============================================================================
+# 재고 조회 엔진 (Streamlit 없이 사용)
+# ==============================================================================
+# 앱과 같은 데이터(버전 스냅샷)와 같은 인덱스/조회 캐시로 조회만 처리합니다.
+# 데이터는 처음 한 번 메모리에 올린 뒤 계속 사용하며, 앱에서 새 파일을 올리거나 되돌리면 다음 조회부터 새 버전을 씁니다.
+# - query  : 모델 / 색상 / 지역 / 보유처 / 출고 후 경과일 조건 -> 행 목록(rows) 또는 보유처별 수량(stores)
+# - serial : 일련번호 전체 / 앞자리 / 뒷자리 조회
+# - nearby : 기준 위치에서 가까운 보유처 (반경 / 가까운 N곳)
+# - options: 모델 선택지와 수량
+#
+# 사용법:
+#     python query_engine.py query --model SM-S931N --region 사무실 --view stores
+#     python query_engine.py serial R3186
+#     python query_engine.py nearby --lat 37.5 --lon 127.0 --radius-km 5 --count 10 --model SM-S931N
+#     python query_engine.py serve --port 8765
+#         GET /health
+#         GET /query?model=SM-S931N&region=사무실&region=동남&view=stores
+#         GET /serial?q=R3186
+#         GET /nearby?lat=37.5&lon=127.0&radius_km=5&count=10&model=SM-S931N
+#         GET /options
+
+SNAPSHOT_DIR = 'inventory_snapshots'
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+ROW_ROLES = ("보유처", "모델명", "색상", "status", "target", "일련번호")
+SORTS = ("owner", "owner_desc", "oldest")
+
+_log = logging.getLogger("inventory.query")
+
+
+class QueryError(ValueError):
+    # 잘못된 조회 조건 (HTTP 400)
+    pass
+
+
+class NoDataError(RuntimeError):
+    # 올라온 데이터 없음 (HTTP 503)
+    pass
+
+
+def _json_value(v):
+    if v is None: return None
+    if isinstance(v, float) and np.isnan(v): return None
+    if isinstance(v, (np.integer,)): return int(v)
+    if isinstance(v, (np.floating,)): return None if np.isnan(v) else float(v)
+    if isinstance(v, (pd.Timestamp, np.datetime64)): return None if pd.isna(v) else str(pd.Timestamp(v).date())
+    if v is pd.NA or v is pd.NaT: return None
+    return v
+
+
+class ResultTable:
+    # 데이터 버전당 한 번 만드는 출력용 표
+    # - 행 목록용 컬럼 배열 (조회마다 DataFrame 을 자르지 않고 배열 인덱싱만)
+    # - 보유처 코드별 이름 / 좌표 / 지역 / 시군구
+    def __init__(self, dataset):
+        df = dataset.df
+        roles = dataset.index.roles
+        self.columns = {role: df[roles[role]].astype(object).to_numpy()
+                        for role in ROW_ROLES if roles.get(role) is not None and roles[role] in df.columns}
+        if 'cached_shipped' in df.columns:
+            shipped = df['cached_shipped'].to_numpy('datetime64[D]')
+            self.columns['shipped'] = np.where(np.isnat(shipped), None, np.datetime_as_string(shipped)).astype(object)
+
+        owner = dataset.index.owner
+        spatial = dataset.spatial
+        n = len(owner.categories) if owner is not None else 0
+        self.names = [str(c) for c in owner.categories] if owner is not None else []
+        lat = np.where(spatial.located, spatial.lat, np.nan).tolist() if n else []
+        lon = np.where(spatial.located, spatial.lon, np.nan).tolist() if n else []
+        region, city = [None] * n, [None] * n
+        if n and 'cached_region' in df.columns:
+            has_rows = owner.ends > owner.starts
+            first = owner.order[owner.starts[has_rows]]
+            codes = np.flatnonzero(has_rows)
+            regions = df['cached_region'].astype(object).to_numpy()[first]
+            cities = df['cached_city'].astype(object).to_numpy()[first] if 'cached_city' in df.columns else [None] * len(first)
+            for c, r, t in zip(codes, regions, cities):
+                region[c], city[c] = _json_value(r), _json_value(t)
+        self.stores = [{'store': self.names[c], 'lat': _json_value(lat[c]), 'lon': _json_value(lon[c]),
+                        'region': region[c], 'city': city[c]} for c in range(n)]
+
+    def record(self, code, **extra):
+        return {**self.stores[code], **extra}
+
+
+class QueryEngine:
+    def __init__(self, get_dataset):
+        # get_dataset: 현재 Dataset 을 돌려주는 함수 (DatasetStore.get 등)
+        self.get_dataset = get_dataset
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _dataset(self):
+        dataset = self.get_dataset()
+        if dataset is None: raise NoDataError("올라온 재고 데이터가 없습니다.")
+        return dataset
+
+    def _table(self, dataset):
+        table = self._tables.get(dataset.key)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(dataset.key)
+                if table is None:
+                    table = ResultTable(dataset)
+                    self._tables = {dataset.key: table}
+        return table
+
+    # --------------------------------------------------------------------------
+    # 결과 만들기
+    # --------------------------------------------------------------------------
+    @staticmethod
+    def _page(limit, offset):
+        try: limit, offset = int(limit), int(offset)
+        except (TypeError, ValueError): raise QueryError("limit / offset 은 정수여야 합니다.")
+        if limit < 0 or offset < 0: raise QueryError("limit / offset 은 0 이상이어야 합니다.")
+        return min(limit, MAX_LIMIT), offset
+
+    def _rows(self, dataset, positions, limit, offset, distances=None):
+        # 행 위치 -> [{역할: 값}] (요청한 구간만 꺼냄)
+        page = positions[offset:offset + limit]
+        data = {name: values[page].tolist() for name, values in self._table(dataset).columns.items()}
+        data['age_days'] = [a if a >= 0 else None for a in dataset.index.age_days(page).tolist()]
+        rows = [{k: _json_value(v[i]) for k, v in data.items()} for i in range(len(page))]
+        if distances is not None:
+            for r in rows: r['distance_km'] = distances.get(r.get('보유처'))
+        return rows
+
+    def _stores(self, dataset, positions, distances=None):
+        # 보유처별 수량 (distances 가 있으면 가까운 순, 없으면 수량 많은 순)
+        owner = dataset.index.owner
+        if owner is None: return []
+        counts = np.bincount(owner.codes[positions] + 1, minlength=len(owner.categories) + 1)[1:]
+        table = self._table(dataset)
+        if distances is not None:
+            codes = [owner.lookup[name] for name in distances if name in owner.lookup]
+            return [table.record(c, count=int(counts[c]), distance_km=distances[table.names[c]]) for c in codes if counts[c]]
+        codes = np.flatnonzero(counts)
+        codes = codes[np.argsort(-counts[codes], kind="stable")]
+        return [table.record(c, count=n) for c, n in zip(codes.tolist(), counts[codes].tolist())]
+
+    def _respond(self, dataset, result, view, limit, offset, extra=None, distances=None):
+        if view not in ("rows", "stores"): raise QueryError("view 는 rows 또는 stores 입니다.")
+        limit, offset = self._page(limit, offset)
+        out = {'version': dataset.key, 'total': int(len(result.positions))}
+        if extra: out.update(extra)
+        if view == "stores": out['stores'] = self._stores(dataset, result.positions, distances)
+        else:
+            out['offset'], out['limit'] = offset, limit
+            out['rows'] = self._rows(dataset, result.positions, limit, offset, distances)
+        return out
+
+    @staticmethod
+    def _list(values):
+        # None / "a" / ["a", "b"] / ["a,b"] -> ["a", "b"]
+        if values is None: return []
+        if isinstance(values, str): values = [values]
+        return [v.strip() for item in values for v in str(item).split(",") if v.strip()]
+
+    # --------------------------------------------------------------------------
+    # 조회
+    # --------------------------------------------------------------------------
+    def query(self, models=None, colors=None, regions=None, owners=None, min_age=None,
+              view="rows", sort="owner", limit=DEFAULT_LIMIT, offset=0):
+        # 앱의 조회와 같은 조건 (모델은 통합 그룹명도 허용, 지역 미지정 = 전체)
+        dataset = self._dataset()
+        models = expand_models(self._list(models), MODEL_GROUPS)
+        colors, regions, owners = self._list(colors), self._list(regions), self._list(owners)
+        if sort not in SORTS: raise QueryError(f"sort 는 {', '.join(SORTS)} 중 하나입니다.")
+        shipped_by = None
+        if min_age not in (None, "", 0, "0"):
+            try: min_age = int(min_age)
+            except (TypeError, ValueError): raise QueryError("min_age 는 정수(일)여야 합니다.")
+            if min_age < 0: raise QueryError("min_age 는 0 이상이어야 합니다.")
+            if min_age: shipped_by = age_cutoff(min_age)
+        result = dataset.search_cache.search(models=models, colors=colors, owners=owners, regions=regions, shipped_by=shipped_by)
+        if view == "rows" and sort != "owner":
+            index = dataset.index
+            positions = index.order_by_shipped(result.positions) if sort == "oldest" else index.order_by_owner(result.positions, ascending=False)
+            result = result._replace(positions=positions)
+        return self._respond(dataset, result, view, limit, offset)
+
+    def serial(self, query, view="rows", limit=DEFAULT_LIMIT, offset=0):
+        dataset = self._dataset()
+        match = dataset.serials.lookup(query)
+        result = search_result(dataset.index, match.positions)
+        return self._respond(dataset, result, view, limit, offset, extra={'match': match.kind, 'matched': int(match.total)})
+
+    def nearby(self, lat, lon, radius_km=5.0, count=10, models=None, colors=None, view="stores", limit=DEFAULT_LIMIT, offset=0):
+        # 앱의 주변 재고 찾기와 같은 규칙 (모델/색상을 가진 보유처만, count=0 이면 반경 안 전체)
+        dataset = self._dataset()
+        try: lat, lon, radius_km, count = float(lat), float(lon), float(radius_km), int(count)
+        except (TypeError, ValueError): raise QueryError("lat / lon / radius_km / count 형식이 잘못되었습니다.")
+        if not (np.isfinite(lat) and np.isfinite(lon) and np.isfinite(radius_km)): raise QueryError("lat / lon / radius_km 은 유한한 숫자여야 합니다.")
+        if radius_km < 0 or count < 0: raise QueryError("radius_km / count 는 0 이상이어야 합니다.")
+        spatial = dataset.spatial
+        base = dataset.search_cache.search(models=expand_models(self._list(models), MODEL_GROUPS), colors=self._list(colors))
+        held = spatial.stores_holding(base.positions)
+        if count: store_codes, dists = spatial.nearest(lat, lon, count, allowed=held, max_km=radius_km)
+        else: store_codes, dists = spatial.within(lat, lon, radius_km, allowed=held)
+        result = search_result(dataset.index, spatial.rows_of_stores(base.positions, store_codes))
+        owner = dataset.index.owner
+        distances = {owner.categories[c]: round(float(d), 3) for c, d in zip(store_codes, dists)}
+        return self._respond(dataset, result, view, limit, offset, extra={'center': [lat, lon], 'radius_km': radius_km}, distances=distances)
+
+    def options(self):
+        dataset = self._dataset()
+        options, counts = dataset.facets.model_options()
+        return {'version': dataset.key, 'models': [{'model': o, 'count': int(counts.get(o, 0))} for o in options]}
+
+    def health(self):
+        dataset = self.get_dataset()
+        if dataset is None: return {'status': 'empty'}
+        return {'status': 'ok', 'version': dataset.key, 'rows': len(dataset.df), 'name': dataset.meta.get('name')}
+
+
+def open_engine(snapshot_dir=SNAPSHOT_DIR):
+    return QueryEngine(DatasetStore(snapshot_dir).get)
+
+
+# ==============================================================================
+# 로컬 HTTP JSON API
+# ==============================================================================
+def _handler(engine):
+    routes = {
+        '/query': lambda p: engine.query(models=p.get('model'), colors=p.get('color'), regions=p.get('region'),
+                                         owners=p.get('owner'), min_age=_one(p, 'min_age'), view=_one(p, 'view', "rows"),
+                                         sort=_one(p, 'sort', "owner"), limit=_one(p, 'limit', DEFAULT_LIMIT), offset=_one(p, 'offset', 0)),
+        '/serial': lambda p: engine.serial(_one(p, 'q', ""), view=_one(p, 'view', "rows"),
+                                           limit=_one(p, 'limit', DEFAULT_LIMIT), offset=_one(p, 'offset', 0)),
+        '/nearby': lambda p: engine.nearby(_one(p, 'lat'), _one(p, 'lon'), _one(p, 'radius_km', 5.0), _one(p, 'count', 10),
+                                           models=p.get('model'), colors=p.get('color'), view=_one(p, 'view', "stores"),
+                                           limit=_one(p, 'limit', DEFAULT_LIMIT), offset=_one(p, 'offset', 0)),
+        '/options': lambda p: engine.options(),
+        '/health': lambda p: engine.health(),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            route = routes.get(url.path.rstrip("/") or "/health")
+            if route is None: return self._send(404, {'error': f"없는 경로: {url.path}"})
+            try:
+                self._send(200, route(parse_qs(url.query)))
+            except QueryError as e:
+                self._send(400, {'error': str(e)})
+            except NoDataError as e:
+                self._send(503, {'error': str(e)})
+            except Exception as e:
+                # 예상하지 못한 오류도 연결을 끊지 않고 JSON 으로 응답 (자세한 내용은 로그에)
+                _log.exception("조회 처리 중 오류: %s", self.path)
+                self._send(500, {'error': f"서버 오류: {type(e).__name__}"})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def serve(engine, host="127.0.0.1", port=8765):
+    # 데이터는 시작할 때 미리 올려 둠 (첫 요청 지연 방지)
+    engine.health()
+    server = ThreadingHTTPServer((host, port), _handler(engine))
+    server.daemon_threads = True
+    return server
+
+
+# ==============================================================================
+# 명령줄
+# ==============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="재고 조회 엔진 (JSON 출력 / 로컬 HTTP API)")
+    parser.add_argument("--snapshots", default=SNAPSHOT_DIR, help="버전 보관소 폴더 (앱과 같은 위치)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def paging(p, view):
+        p.add_argument("--view", choices=["rows", "stores"], default=view)
+        p.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+        p.add_argument("--offset", type=int, default=0)
+
+    q = sub.add_parser("query", help="조건 조회")
+    q.add_argument("--model", action="append")
+    q.add_argument("--color", action="append")
+    q.add_argument("--region", action="append")
+    q.add_argument("--owner", action="append")
+    q.add_argument("--min-age", type=int)
+    q.add_argument("--sort", choices=SORTS, default="owner")
+    paging(q, "rows")
+
+    s = sub.add_parser("serial", help="일련번호 조회")
+    s.add_argument("q")
+    paging(s, "rows")
+
+    n = sub.add_parser("nearby", help="주변 보유처 조회")
+    n.add_argument("--lat", type=float, required=True)
+    n.add_argument("--lon", type=float, required=True)
+    n.add_argument("--radius-km", type=float, default=5.0)
+    n.add_argument("--count", type=int, default=10)
+    n.add_argument("--model", action="append")
+    n.add_argument("--color", action="append")
+    paging(n, "stores")
+
+    sub.add_parser("options", help="모델 선택지")
+
+    sv = sub.add_parser("serve", help="로컬 HTTP JSON API")
+    sv.add_argument("--host", default="127.0.0.1")
+    sv.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args(argv)
+    engine = open_engine(args.snapshots)
+    if args.command == "serve":
+        server = serve(engine, args.host, args.port)
+        print(f"listening on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+        return 0
+
+    try:
+        if args.command == "query":
+            out = engine.query(models=args.model, colors=args.color, regions=args.region, owners=args.owner, min_age=args.min_age,
+                               view=args.view, sort=args.sort, limit=args.limit, offset=args.offset)
+        elif args.command == "serial":
+            out = engine.serial(args.q, view=args.view, limit=args.limit, offset=args.offset)
+        elif args.command == "nearby":
+            out = engine.nearby(args.lat, args.lon, args.radius_km, args.count, models=args.model, colors=args.color,
+                                view=args.view, limit=args.limit, offset=args.offset)
+        else:
+            out = engine.options()
+    except (QueryError, NoDataError) as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False))
+        return 1
+    print(json.dumps(out, ensure_ascii=False, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import codecs
+import csv
+import io
+import re
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+# ==============================================================================
+# 조회 결과 내보내기 (CSV / XLSX)
+# ==============================================================================
+# 공용 데이터(DataFrame)에서 결과 행 위치만 EXPORT_CHUNK_ROWS 개씩 꺼내 바로 파일에 씁니다.
+# - 결과 전체를 DataFrame 으로 복사하지 않으므로, 메모리는 묶음 크기 + 완성된 파일만큼만 더 씀
+# - 파일은 디스크의 임시 파일에 만든 뒤 완성본만 읽어 돌려줌 (st.download_button 의 지연 생성용)
+# - 범주(category) 컬럼은 범주별로 한 번만 변환하고 행에는 코드로 골라 붙임
+# 적재 때 읽어 둔 컬럼(모델명/색상/보유처/상태/일련번호/출고일 등 화면에서 쓰는 역할 컬럼, ingest.needed_columns) 뒤에
+# 분류된 지역/시군구와 날짜로 정리한 출고일을 붙입니다. 원본 파일의 나머지 컬럼은 적재 때 읽지 않으므로 포함되지 않습니다.
+
+EXPORT_CHUNK_ROWS = 10000
+EXPORT_FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "xlsx": ("엑셀 (XLSX)", ".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+DERIVED_COLUMNS = (("cached_region", "지역"), ("cached_city", "시군구"), ("cached_shipped", "출고일(정리)"))
+SHEET_TITLE = "조회결과"
+
+
+def export_columns(df):
+    # [(컬럼, 머리글)]: 적재된 컬럼(cached_ 제외, 원본 파일의 일부) + 파생 컬럼
+    columns = [(c, str(c)) for c in df.columns if not str(c).startswith("cached_")]
+    return columns + [(c, h) for c, h in DERIVED_COLUMNS if c in df.columns]
+
+
+def _column_reader(series, encode=None, encode_dates=None):
+    # 행 위치 -> 값 배열 (object). 값은 문자열 또는 None(결측), 날짜는 "YYYY-MM-DD"
+    # encode: 값 하나를 출력 형태로 바꾸는 함수 (범주 컬럼은 범주별로 한 번만 호출)
+    # encode_dates: 날짜 컬럼은 datetime64 배열을 통째로 출력 형태로 바꾸는 함수 (있으면 encode 대신 사용)
+    if series.dtype.kind == "M":
+        values = series.to_numpy()
+
+        def read(pos):
+            part = values[pos]
+            if encode_dates is not None: return encode_dates(part)
+            out = np.datetime_as_string(part, unit="D").astype(object)
+            out[np.isnat(part)] = None
+            return out if encode is None else np.array([encode(v) for v in out], dtype=object)
+        return read
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        # 코드 -1(결측)은 마지막 칸
+        table = np.array([str(c) for c in series.cat.categories] + [None], dtype=object)
+        if encode is not None: table = np.array([encode(v) for v in table], dtype=object)
+        return lambda pos: table[codes[pos]]
+
+    def read(pos):
+        out = series.take(pos).to_numpy(dtype=object, na_value=None)
+        out = np.array([None if v is None else str(v) for v in out], dtype=object)
+        return out if encode is None else np.array([encode(v) for v in out], dtype=object)
+    return read
+
+
+def export_summary(df):
+    # 내보내는 컬럼 안내 문구 (다운로드 버튼 도움말)
+    return "포함 컬럼: " + ", ".join(h for _, h in export_columns(df)) + " (원본 파일의 다른 컬럼은 포함되지 않음)"
+
+
+def iter_chunks(df, positions, encode=None, chunk_rows=EXPORT_CHUNK_ROWS, encode_dates=None):
+    # 결과 행을 묶음 단위로: 컬럼별 값 배열 목록
+    readers = [_column_reader(df[c], encode, encode_dates) for c, _ in export_columns(df)]
+    positions = np.asarray(positions, dtype=np.int64)
+    for start in range(0, len(positions), chunk_rows):
+        pos = positions[start:start + chunk_rows]
+        yield [read(pos) for read in readers]
+
+
+# ------------------------------------------------------------------------------
+# CSV
+# ------------------------------------------------------------------------------
+def write_csv(df, positions, out, chunk_rows=EXPORT_CHUNK_ROWS):
+    # out: 바이너리 파일. 엑셀에서 한글이 깨지지 않도록 UTF-8 BOM 포함 (묶음 단위로 한 번에 인코딩)
+    out.write(codecs.BOM_UTF8)
+
+    def write(rows):
+        buf = io.StringIO(newline="")
+        csv.writer(buf).writerows(rows)
+        out.write(buf.getvalue().encode("utf-8"))
+    write([[h for _, h in export_columns(df)]])
+    for columns in iter_chunks(df, positions, chunk_rows=chunk_rows): write(zip(*columns))
+
+
+# ------------------------------------------------------------------------------
+# XLSX (시트 XML 을 직접 스트리밍)
+# ------------------------------------------------------------------------------
+# openpyxl(write_only) 은 셀마다 객체를 만들어 10만 행에 15초 이상 걸리므로,
+# 시트 XML 을 묶음 단위로 만들어 zip 항목에 흘려 씁니다. (문자열은 inline string, 셀 위치 속성 생략)
+# - 날짜 컬럼은 엑셀 날짜(일련값 + yyyy-mm-dd 서식) 셀로 씀
+# - 행/열 수를 미리 알므로 <dimension> 을 적어 둠 (openpyxl read_only 등에서 max_row 를 바로 알 수 있게)
+# 메모리는 묶음 하나의 XML 크기만큼만 씁니다.
+
+# XML 1.0 에 쓸 수 없는 제어 문자
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EMPTY_CELL = "<c/>"
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>
+<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>
+</Types>"""
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>
+</Relationships>"""
+_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>
+</workbook>"""
+_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+# 셀 서식: 0 = 기본, 1 = 날짜 (yyyy-mm-dd)
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/></numFmts>
+<fonts count="1"><font><sz val="11"/><name val="맑은 고딕"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/><xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>
+</styleSheet>"""
+_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+               '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><dimension ref="{ref}"/><sheetData>')
+_SHEET_TAIL = b"</sheetData></worksheet>"
+# 엑셀 날짜 일련값의 기준일 (1900 날짜 체계, 1900-03-01 이후 날짜 기준)
+_EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+
+
+def _xlsx_cell(value):
+    if value is None: return _EMPTY_CELL
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_XML_ILLEGAL.sub("", value))}</t></is></c>'
+
+
+def _xlsx_date_cells(values):
+    # datetime64 배열 -> 날짜 셀 (일 단위, 결측은 빈 셀)
+    serial = (values.astype("datetime64[D]") - _EXCEL_EPOCH).astype(np.int64)
+    out = np.array([f'<c s="1"><v>{d}</v></c>' for d in serial.tolist()], dtype=object)
+    out[np.isnat(values)] = _EMPTY_CELL
+    return out
+
+
+def write_xlsx(df, positions, out, chunk_rows=EXPORT_CHUNK_ROWS):
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=SHEET_TITLE))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        headers = [h for _, h in export_columns(df)]
+        ref = f"A1:{get_column_letter(max(len(headers), 1))}{len(positions) + 1}"
+        with zf.open("xl/worksheets/sheet1.xml", "w") as f:
+            f.write(_SHEET_HEAD.format(ref=ref).encode("utf-8"))
+            header = "".join(_xlsx_cell(h) for h in headers)
+            f.write(f"<row>{header}</row>".encode("utf-8"))
+            for columns in iter_chunks(df, positions, _xlsx_cell, chunk_rows, _xlsx_date_cells):
+                f.write("".join(["<row>" + "".join(cells) + "</row>" for cells in zip(*columns)]).encode("utf-8"))
+            f.write(_SHEET_TAIL)
+
+
+# ------------------------------------------------------------------------------
+# 내보내기
+# ------------------------------------------------------------------------------
+def export_rows(df, positions, fmt, chunk_rows=EXPORT_CHUNK_ROWS):
+    # 결과 행을 fmt("csv"/"xlsx") 파일 내용(bytes)으로. 만드는 동안은 디스크 임시 파일에 쓰고 완성본만 읽음
+    with tempfile.TemporaryFile() as out:
+        (write_xlsx if fmt == "xlsx" else write_csv)(df, positions, out, chunk_rows)
+        out.seek(0)
+        return out.read()
+
+
+def export_file_name(base, fmt):
+    return f"{base}{EXPORT_FORMATS[fmt][1]}"
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 결과 목록 (페이지 단위)
+# ==============================================================================
+# 행마다 st.button 을 만들지 않고, 현재 페이지 행만 벡터 연산으로 문자열을 만들어
+# 하나의 표(st.dataframe, 단일 행 선택)로 보여줍니다. 결과가 몇 건이든 화면 비용은 페이지 크기만큼입니다.
+
+PAGE_SIZE = 100
+
+
+def page_count(n_rows, page_size=PAGE_SIZE):
+    return max(1, (n_rows + page_size - 1) // page_size)
+
+
+def page_slice(n_rows, page, page_size=PAGE_SIZE):
+    # page 는 1부터 시작
+    page = min(max(int(page), 1), page_count(n_rows, page_size))
+    start = (page - 1) * page_size
+    return slice(start, min(start + page_size, n_rows))
+
+
+def _text(df, col):
+    if not col or col not in df.columns: return pd.Series("-", index=df.index, dtype=object)
+    values = df[col].astype(object)
+    return values.where(values.notna(), "-").map(str)
+
+
+def row_labels(page_df, roles, clicked_name=None, distances=None):
+    # "[✅ ]보유처[ (거리)]  :  모델 | 색상 | 상태 | 출고일 | 일련번호" (행 단위 반복문 없이 컬럼 단위로 연결)
+    # distances: {보유처: km} (주변 조회일 때 보유처 옆에 거리 표시)
+    nm = _text(page_df, roles.get('보유처'))
+    is_office = nm.str.contains("반추", regex=False).to_numpy()
+    # [수정] 반추정보통신인 경우 리스트 출고일 미표기(-) 처리
+    tgt = _text(page_df, roles.get('target')).mask(is_office, "-")
+    det = (_text(page_df, roles.get('모델명')) + " | " + _text(page_df, roles.get('색상')) + " | "
+           + _text(page_df, roles.get('status')) + " | " + tgt + " | " + _text(page_df, roles.get('일련번호')))
+    prefix = pd.Series(np.where(nm.to_numpy() == clicked_name, "✅ ", ""), index=page_df.index) if clicked_name is not None else ""
+    dist = nm.map({k: f" ({v:.1f}km)" for k, v in distances.items()}).fillna("") if distances else ""
+    return prefix + nm + dist + "  :  " + det
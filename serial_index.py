@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ingest import resolve_columns
+
+# ==============================================================================
+# 일련번호 조회 인덱스
+# ==============================================================================
+# 적재 시 한 번만 만들고, 조회는 데이터를 훑지 않습니다.
+# - 일련번호(공백 제거 + 대문자) 정렬 고유값과 고유값별 행 구간 (같은 번호가 여러 행이어도 처리)
+# - 전체 일치: dict 로 바로 찾기
+# - 앞자리 일치: 정렬 배열에서 이진 탐색한 연속 구간
+# - 뒷자리 일치: 뒤집은 문자열의 정렬 배열에서 같은 방식
+
+SERIAL_MAX_MATCHES = 500
+_MAX_CHAR = "\U0010ffff"
+
+SerialMatch = namedtuple("SerialMatch", ["kind", "positions", "total"])
+
+
+def normalize_serial(text):
+    return str(text).strip().upper()
+
+
+class SerialIndex:
+    def __init__(self, df, roles=None):
+        roles = roles or df.attrs.get('col_roles') or resolve_columns(df.columns)
+        col = roles.get('일련번호')
+        self.available = col is not None and col in df.columns
+        text = np.empty(0, dtype=object)
+        rows = np.empty(0, dtype=np.int64)
+        if self.available:
+            values = df[col]
+            valid = values.notna().to_numpy()
+            text = values[valid].astype(str).str.strip().str.upper().to_numpy(dtype=object)
+            rows = np.flatnonzero(valid)
+            nonempty = text != ""
+            text, rows = text[nonempty], rows[nonempty]
+
+        # 정렬된 고유 번호(keys)와 번호순 행 위치(rows), 번호별 구간(bounds)
+        codes, keys = pd.factorize(text, sort=True)
+        order = np.argsort(codes, kind="stable")
+        self.keys = np.asarray(keys, dtype=object)
+        self.rows = rows[order]
+        self.bounds = np.searchsorted(codes[order], np.arange(len(self.keys) + 1))
+        self.exact = {k: i for i, k in enumerate(self.keys)}
+
+        reversed_keys = np.array([k[::-1] for k in self.keys], dtype=object)
+        self.rev_order = np.argsort(reversed_keys, kind="stable")
+        self.rev_keys = reversed_keys[self.rev_order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _range(self, sorted_keys, prefix):
+        lo = int(np.searchsorted(sorted_keys, prefix, side="left"))
+        hi = int(np.searchsorted(sorted_keys, prefix + _MAX_CHAR, side="left"))
+        return lo, hi
+
+    def _rows_of_codes(self, codes, limit):
+        out, total = [], 0
+        for c in codes:
+            seg = self.rows[self.bounds[c]:self.bounds[c + 1]]
+            if total < limit: out.append(seg[:limit - total])
+            total += len(seg)
+        return np.concatenate(out) if out else np.empty(0, dtype=np.int64), total
+
+    def lookup(self, query, limit=SERIAL_MAX_MATCHES):
+        # 전체 일치 → 앞자리 일치 → 뒷자리 일치 순으로 처음 결과가 있는 방식의 행 위치 (번호순, 최대 limit 건)
+        q = normalize_serial(query)
+        if not q or not len(self.keys): return SerialMatch(None, np.empty(0, dtype=np.int64), 0)
+
+        code = self.exact.get(q)
+        if code is not None:
+            seg = self.rows[self.bounds[code]:self.bounds[code + 1]]
+            return SerialMatch("exact", seg[:limit], len(seg))
+
+        lo, hi = self._range(self.keys, q)
+        if hi > lo:
+            start, end = self.bounds[lo], self.bounds[hi]
+            return SerialMatch("prefix", self.rows[start:min(end, start + limit)], int(end - start))
+
+        lo, hi = self._range(self.rev_keys, q[::-1])
+        if hi > lo:
+            positions, total = self._rows_of_codes(np.sort(self.rev_order[lo:hi]), limit)
+            return SerialMatch("suffix", positions, total)
+        return SerialMatch(None, np.empty(0, dtype=np.int64), 0)
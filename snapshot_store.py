@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import inventory_cache
+
+# ==============================================================================
+# 버전별 스냅샷 보관소
+# ==============================================================================
+# 업로드마다 번호가 붙은 버전 폴더(v000001, v000002 ...)를 새로 만들고, 만든 뒤에는 고치지 않습니다.
+#   vNNNNNN/source.xlsx                 원본 (가공 규칙이 바뀌면 여기서 다시 만듦)
+#   vNNNNNN/.inventory_cache/*.parquet  가공 완료 데이터 (inventory_cache 의 Parquet 캐시)
+#   vNNNNNN/meta.json                   파일 이름 / 생성 시각 / 행 수 / 내용 해시 / 변경 건수
+# 현재 버전은 CURRENT 파일 하나로 가리키며, 임시 파일에 쓴 뒤 os.replace 로 바꿉니다.
+# - 읽는 쪽은 CURRENT 만 읽고 잠금 없이 완성된 버전 폴더를 읽음 (반쯤 쓰인 파일을 볼 일이 없음)
+# - 버전 폴더는 임시 폴더에 다 만든 뒤 이름 변경으로 번호를 받으므로, 동시에 올려도 번호가 겹치지 않음
+# - 되돌리기 = CURRENT 를 이전 버전으로 바꾸기 / 초기화 = CURRENT 비우기 (버전은 보관 기간 동안 남음)
+# - 현재 버전과 최근 KEEP_VERSIONS 개, 보관 기간(RETENTION_SECONDS) 안의 버전을 뺀 나머지는 정리
+
+POINTER_NAME = "CURRENT"
+SOURCE_NAME = "source.xlsx"
+META_NAME = "meta.json"
+VERSION_PREFIX = "v"
+STAGING_PREFIX = ".tmp-"
+KEEP_VERSIONS = 5
+RETENTION_SECONDS = 24 * 3600
+
+Snapshot = namedtuple("Snapshot", ["version", "path", "meta"])
+
+
+def _version_number(name):
+    if not name.startswith(VERSION_PREFIX) or not name[len(VERSION_PREFIX):].isdigit(): return None
+    return int(name[len(VERSION_PREFIX):])
+
+
+class SnapshotStore:
+    def __init__(self, root):
+        self.root = root
+
+    # --------------------------------------------------------------------------
+    # 읽기
+    # --------------------------------------------------------------------------
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, POINTER_NAME), "r", encoding="utf-8") as f: version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def snapshot(self, version):
+        path = os.path.join(self.root, version)
+        try:
+            with open(os.path.join(path, META_NAME), "r", encoding="utf-8") as f: meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return Snapshot(version, path, meta)
+
+    def versions(self):
+        # 보관 중인 버전 (최신순)
+        try: names = os.listdir(self.root)
+        except FileNotFoundError: return []
+        numbered = sorted((n for n in names if _version_number(n) is not None), key=_version_number, reverse=True)
+        return [s for s in (self.snapshot(n) for n in numbered) if s is not None]
+
+    def previous_version(self):
+        # 현재 버전 바로 이전 버전 (되돌리기 기본값)
+        current = self.current_version()
+        older = [s.version for s in self.versions() if current is None or _version_number(s.version) < _version_number(current)]
+        return older[0] if older else None
+
+    def load(self, snapshot, build_fn):
+        # 가공 완료 데이터 (Parquet). 가공 규칙/좌표 사전 버전이 바뀌었으면 원본에서 다시 만들어 저장
+        source = os.path.join(snapshot.path, SOURCE_NAME)
+        return inventory_cache.load_or_build(source, build_fn, digest=snapshot.meta['digest'])
+
+    # --------------------------------------------------------------------------
+    # 쓰기
+    # --------------------------------------------------------------------------
+    def create(self, data, name, build_fn):
+        # 새 버전을 만들고 (버전, DataFrame) 을 돌려줍니다. CURRENT 는 바꾸지 않음 (publish 에서)
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.root)
+        try:
+            source = os.path.join(staging, SOURCE_NAME)
+            inventory_cache.atomic_write_bytes(source, data)
+            digest = inventory_cache.file_digest(source)
+            df = inventory_cache.load_or_build(source, build_fn, digest=digest)
+            meta = {'name': name, 'created': time.time(), 'rows': len(df), 'digest': digest, 'delta': df.attrs.get('delta')}
+            inventory_cache.atomic_write_text(os.path.join(staging, META_NAME), json.dumps(meta, ensure_ascii=False))
+            return self._claim(staging), df
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def _claim(self, staging):
+        # 다음 번호로 이름 변경. 다른 업로드가 먼저 그 번호를 가져가면(이미 있는 폴더) 다음 번호로 재시도
+        existing = [_version_number(n) for n in os.listdir(self.root)]
+        number = max([n for n in existing if n is not None], default=0) + 1
+        while True:
+            version = f"{VERSION_PREFIX}{number:06d}"
+            target = os.path.join(self.root, version)
+            if not os.path.exists(target):
+                try:
+                    os.rename(staging, target)
+                    return version
+                except OSError:
+                    if not os.path.exists(target): raise
+            number += 1
+
+    def publish(self, version):
+        inventory_cache.atomic_write_text(os.path.join(self.root, POINTER_NAME), version or "")
+
+    def clear(self):
+        if os.path.isdir(self.root): self.publish(None)
+
+    def gc(self, keep=KEEP_VERSIONS, retention=RETENTION_SECONDS, now=None):
+        # 현재 버전 / 최근 keep 개 / 보관 기간 안 버전을 제외하고 삭제. 오래된 임시 폴더(중단된 업로드)도 정리
+        if now is None: now = time.time()
+        current = self.current_version()
+        removed = []
+        for i, snap in enumerate(self.versions()):
+            if snap.version == current or i < keep or now - snap.meta.get('created', now) < retention: continue
+            shutil.rmtree(snap.path, ignore_errors=True)
+            removed.append(snap.version)
+        try: names = os.listdir(self.root)
+        except FileNotFoundError: names = []
+        for n in names:
+            path = os.path.join(self.root, n)
+            if n.startswith(STAGING_PREFIX) and now - os.path.getmtime(path) > retention:
+                if os.path.isdir(path): shutil.rmtree(path, ignore_errors=True)
+                else:
+                    try: os.remove(path)
+                    except OSError: pass
+        return removed
@@ -0,0 +1,178 @@
+import numpy as np
+
+from geocode import get_city_only
+
+# ==============================================================================
+# 보유처 공간 인덱스 (반경 / 가까운 보유처 조회)
+# ==============================================================================
+# 적재 시 보유처별 좌표(cached_lat/lon)를 위경도 격자(GRID_DEG 도 단위 칸)로 묶어 둡니다.
+# - 반경 조회: 반경을 덮는 칸의 보유처만 거리 계산
+# - 가까운 N곳: 기준점 칸에서 바깥으로 한 겹씩 넓혀가며, 남은 칸이 더 가까울 수 없을 때 중단
+# - 재고가 있는 보유처가 적으면(조건이 좁으면) 격자 대신 그 보유처만 바로 거리 계산
+# 지도와 같이 도매 보유처는 제외하고, 위치를 찾지 못한 보유처(기본 좌표 근처에 임의 배치)도 제외합니다.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+GRID_DEG = 0.05
+DIRECT_SCAN_STORES = 256
+UNLOCATED_CITY = get_city_only(np.nan)
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class StoreSpatialIndex:
+    def __init__(self, df, index, cell_deg=GRID_DEG):
+        self.index = index
+        self.cell_deg = cell_deg
+        owner = index.owner
+        n_stores = len(owner.categories) if owner is not None else 0
+        self.lat = np.full(n_stores, np.nan)
+        self.lon = np.full(n_stores, np.nan)
+        self.located = np.zeros(n_stores, dtype=bool)
+        if n_stores and 'cached_lat' in df.columns:
+            # 보유처마다 첫 행의 좌표 (같은 보유처는 같은 좌표)
+            has_rows = owner.ends > owner.starts
+            first = owner.order[owner.starts[has_rows]]
+            self.lat[has_rows] = df['cached_lat'].to_numpy()[first]
+            self.lon[has_rows] = df['cached_lon'].to_numpy()[first]
+            names = [str(c) for c in owner.categories]
+            office = np.array(["반추" in s for s in names], dtype=bool)
+            wholesale = np.array([s.startswith('도매-') for s in names], dtype=bool)
+            if 'cached_city' in df.columns:
+                unlocated = np.zeros(n_stores, dtype=bool)
+                unlocated[has_rows] = df['cached_city'].astype(object).to_numpy()[first] == UNLOCATED_CITY
+            else:
+                unlocated = np.zeros(n_stores, dtype=bool)
+            self.located = has_rows & np.isfinite(self.lat) & np.isfinite(self.lon) & ~wholesale & (office | ~unlocated)
+
+        # 격자: 칸 번호순으로 정렬한 보유처 코드와 칸별 구간
+        codes = np.flatnonzero(self.located)
+        ci = np.floor(self.lat[codes] / cell_deg).astype(np.int64)
+        cj = np.floor(self.lon[codes] / cell_deg).astype(np.int64)
+        order = np.lexsort((cj, ci))
+        self.codes = codes[order]
+        ci, cj = ci[order], cj[order]
+        self.cells = {}
+        if len(self.codes):
+            change = np.flatnonzero((np.diff(ci) != 0) | (np.diff(cj) != 0)) + 1
+            starts = np.concatenate([[0], change])
+            ends = np.concatenate([change, [len(self.codes)]])
+            self.cells = {(int(ci[s]), int(cj[s])): (int(s), int(e)) for s, e in zip(starts, ends)}
+            self.extent = (int(ci.min()), int(ci.max()), int(cj.min()), int(cj.max()))
+        else:
+            self.extent = (0, -1, 0, -1)
+
+    # --------------------------------------------------------------------------
+    # 보조
+    # --------------------------------------------------------------------------
+    @property
+    def n_located(self):
+        return len(self.codes)
+
+    def located_names(self):
+        # 위치를 아는 보유처 이름 (이름순)
+        owner = self.index.owner
+        return [owner.categories[c] for c in np.flatnonzero(self.located)]
+
+    def store_point(self, name):
+        # 보유처 이름 -> (위도, 경도) (위치를 모르면 None)
+        owner = self.index.owner
+        code = owner.lookup.get(name) if owner is not None else None
+        if code is None or not self.located[code]: return None
+        return float(self.lat[code]), float(self.lon[code])
+
+    def stores_holding(self, positions):
+        # 조회 결과 행들이 있는 보유처 (보유처 코드별 bool)
+        owner = self.index.owner
+        counts = np.bincount(owner.codes[positions] + 1, minlength=len(owner.categories) + 1)[1:]
+        return counts > 0
+
+    def _cell(self, lat, lon):
+        return int(np.floor(lat / self.cell_deg)), int(np.floor(lon / self.cell_deg))
+
+    def _gather(self, cells):
+        spans = [self.cells[c] for c in cells if c in self.cells]
+        if not spans: return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.codes[s:e] for s, e in spans])
+
+    def _ranked(self, lat, lon, codes, allowed, max_km=None):
+        if allowed is not None: codes = codes[allowed[codes]]
+        dist = haversine_km(lat, lon, self.lat[codes], self.lon[codes])
+        if max_km is not None:
+            keep = dist <= max_km
+            codes, dist = codes[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return codes[order], dist[order]
+
+    def _direct(self, allowed):
+        # 조건에 맞는 보유처가 적으면 격자를 돌지 않고 그 보유처만 계산
+        if allowed is None: return None
+        candidates = np.flatnonzero(allowed & self.located)
+        return candidates if len(candidates) <= DIRECT_SCAN_STORES else None
+
+    # --------------------------------------------------------------------------
+    # 조회
+    # --------------------------------------------------------------------------
+    def within(self, lat, lon, radius_km, allowed=None):
+        # 반경 안 보유처 (코드, 거리 km) 가까운 순. allowed: 보유처 코드별 bool (재고 보유 등)
+        direct = self._direct(allowed)
+        if direct is not None: return self._ranked(lat, lon, direct, None, radius_km)
+        dlat = radius_km / KM_PER_DEG
+        dlon = radius_km / (KM_PER_DEG * max(np.cos(np.radians(lat)), 1e-6))
+        i0, j0 = self._cell(lat - dlat, lon - dlon)
+        i1, j1 = self._cell(lat + dlat, lon + dlon)
+        lo_i, hi_i, lo_j, hi_j = self.extent
+        i0, i1, j0, j1 = max(i0, lo_i), min(i1, hi_i), max(j0, lo_j), min(j1, hi_j)
+        if i0 > i1 or j0 > j1: return np.empty(0, dtype=np.int64), np.empty(0)
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            candidates = self.codes
+        else:
+            candidates = self._gather((i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+        return self._ranked(lat, lon, candidates, allowed, radius_km)
+
+    def nearest(self, lat, lon, k, allowed=None, max_km=None):
+        # 가까운 k 곳 (코드, 거리 km). max_km 가 있으면 그 안에서만
+        if k <= 0: return np.empty(0, dtype=np.int64), np.empty(0)
+        direct = self._direct(allowed)
+        if direct is not None:
+            codes, dist = self._ranked(lat, lon, direct, None, max_km)
+            return codes[:k], dist[:k]
+        ci, cj = self._cell(lat, lon)
+        lo_i, hi_i, lo_j, hi_j = self.extent
+        max_ring = max(abs(ci - lo_i), abs(ci - hi_i), abs(cj - lo_j), abs(cj - hi_j))
+        # 한 겹 바깥 칸까지의 최소 거리 (경도 방향 칸이 더 좁으므로 그 폭 기준)
+        ring_km = self.cell_deg * KM_PER_DEG * max(np.cos(np.radians(min(abs(lat) + self.cell_deg * max_ring, 89.0))), 1e-6)
+        found = []
+        best_codes, best_dist = np.empty(0, dtype=np.int64), np.empty(0)
+        for ring in range(max_ring + 1):
+            if (2 * ring + 1) ** 2 > 4 * len(self.cells):
+                # 기준점 주변이 비어 있으면(바다/외곽) 칸을 계속 도는 것보다 전체 보유처 계산이 빠름
+                codes, dist = self._ranked(lat, lon, self.codes, allowed, max_km)
+                return codes[:k], dist[:k]
+            if ring == 0:
+                cells = [(ci, cj)]
+            else:
+                cells = [(ci + d, cj + e) for d in range(-ring, ring + 1) for e in (-ring, ring)]
+                cells += [(ci + d, cj + e) for d in (-ring, ring) for e in range(-ring + 1, ring)]
+            codes = self._gather(cells)
+            if len(codes):
+                found.append(codes)
+                best_codes, best_dist = self._ranked(lat, lon, np.concatenate(found), allowed, max_km)
+            # 지금까지 k 곳을 찾았고, 아직 안 본 칸(ring 겹 바깥)은 k 번째보다 가까울 수 없으면 종료
+            if len(best_codes) >= k and best_dist[k - 1] <= ring * ring_km: break
+            if max_km is not None and ring * ring_km > max_km: break
+        return best_codes[:k], best_dist[:k]
+
+    def rows_of_stores(self, positions, store_codes):
+        # 조회 결과 행 중 store_codes 보유처의 행만, store_codes 순서(가까운 순)대로. 같은 보유처는 원래 순서
+        owner = self.index.owner
+        rank = np.full(len(owner.categories) + 1, -1, dtype=np.int64)
+        rank[store_codes] = np.arange(len(store_codes))
+        r = rank[owner.codes[positions]]
+        keep = r >= 0
+        return positions[keep][np.argsort(r[keep], kind="stable")]
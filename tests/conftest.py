@@ -0,0 +1,23 @@
+import io
+import os
+import sys
+
+import pytest
+from openpyxl import Workbook
+
+# 테스트는 저장소 최상위의 모듈(ingest, geocode, ...)을 그대로 가져다 씁니다.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def inventory_workbook():
+    # 작은 재고 엑셀 파일 내용(bytes)을 만드는 함수. rows: [(모델명, 색상, 보유처, 상태, 일련번호)]
+    def make(rows, header=("모델명", "색상", "보유처", "재고상태", "일련번호")):
+        wb = Workbook()
+        ws = wb.active
+        ws.append(list(header))
+        for row in rows: ws.append(list(row))
+        buf = io.BytesIO()
+        wb.save(buf)
+        return buf.getvalue()
+    return make
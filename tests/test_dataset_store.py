@@ -0,0 +1,202 @@
+"""버전 보관소(SnapshotStore)와 공용 데이터 보관소(DatasetStore)의 버전 번호 / CURRENT 교체 / 정리 / 되돌리기 / 초기화 확인"""
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import dataset_store
+from dataset_store import DatasetStore
+from snapshot_store import META_NAME, POINTER_NAME, RETENTION_SECONDS, STAGING_PREFIX, VERSION_PREFIX, SnapshotStore
+
+
+def _rows(n, owner="강남점"):
+    return [("SM-S928N", "블랙", owner, "정상", f"S{i:05d}") for i in range(n)]
+
+
+def _wait(store, timeout=60):
+    deadline = time.time() + timeout
+    while store.busy:
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def blocked_upload(monkeypatch):
+    # 업로드 처리를 release.set() 전까지 멈춰 둠 (처리 중 상태를 재현)
+    release = threading.Event()
+    load = dataset_store.load_inventory
+
+    def slow_load(*args, **kwargs):
+        release.wait(30)
+        return load(*args, **kwargs)
+    monkeypatch.setattr(dataset_store, "load_inventory", slow_load)
+    yield release
+    release.set()
+
+
+def test_reset_is_refused_while_an_upload_is_running(tmp_path, inventory_workbook, blocked_upload):
+    store = DatasetStore(str(tmp_path))
+    assert store.submit(inventory_workbook(_rows(3)), "first.xlsx")
+    assert store.busy
+    # 처리 중에는 초기화하지 않음 (끝난 업로드가 게시하면서 초기화를 되돌리므로)
+    assert store.reset() is False
+
+    blocked_upload.set()
+    _wait(store)
+    assert store.job.error is None
+    assert len(store.get().df) == 3
+
+    assert store.reset() is True
+    assert store.get() is None and store.snapshots.current_version() is None and store.job is None
+    # 버전은 남아 있어 되돌릴 수 있음
+    assert [s.version for s in store.versions()] == ["v000001"]
+
+
+# ------------------------------------------------------------------------------
+# SnapshotStore
+# ------------------------------------------------------------------------------
+def _build(path):
+    # 가공 없이 원본만 읽는 build_fn (버전 관리만 확인)
+    return pd.read_excel(path, dtype=str)
+
+
+def test_concurrent_creates_get_distinct_versions(tmp_path, inventory_workbook):
+    snapshots = SnapshotStore(str(tmp_path))
+    data = [inventory_workbook(_rows(i + 1)) for i in range(8)]
+    barrier = threading.Barrier(len(data))
+    claimed = {}
+
+    def upload(i):
+        barrier.wait()
+        version, df = snapshots.create(data[i], f"{i}.xlsx", _build)
+        claimed[i] = (version, len(df))
+    threads = [threading.Thread(target=upload, args=(i,)) for i in range(len(data))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    versions = [v for v, _ in claimed.values()]
+    assert sorted(versions) == [f"v{n:06d}" for n in range(1, len(data) + 1)]
+    # 각 버전 폴더에는 자기 업로드의 내용이 들어 있음
+    for i, (version, rows) in claimed.items():
+        snap = snapshots.snapshot(version)
+        assert snap.meta['name'] == f"{i}.xlsx" and snap.meta['rows'] == rows == i + 1
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(STAGING_PREFIX)]
+    # 만들기만 하고 게시하지 않았으므로 CURRENT 는 비어 있음
+    assert snapshots.current_version() is None
+
+
+def test_claim_skips_taken_numbers(tmp_path):
+    snapshots = SnapshotStore(str(tmp_path))
+    os.makedirs(tmp_path / "v000001")
+    (tmp_path / "v000001" / "x").write_text("taken")
+    staging = tmp_path / f"{STAGING_PREFIX}a"
+    os.makedirs(staging)
+    assert snapshots._claim(str(staging)) == "v000002"
+
+
+def test_publish_swaps_current_pointer(tmp_path, inventory_workbook):
+    snapshots = SnapshotStore(str(tmp_path))
+    v1, _ = snapshots.create(inventory_workbook(_rows(1)), "a.xlsx", _build)
+    v2, _ = snapshots.create(inventory_workbook(_rows(2)), "b.xlsx", _build)
+    snapshots.publish(v2)
+    assert snapshots.current_version() == v2 and snapshots.previous_version() == v1
+    snapshots.publish(v1)
+    assert snapshots.current_version() == v1 and snapshots.previous_version() is None
+    snapshots.clear()
+    assert snapshots.current_version() is None
+    # 임시 파일 없이 CURRENT 하나만
+    assert sorted(n for n in os.listdir(tmp_path) if not n.startswith(VERSION_PREFIX)) == [POINTER_NAME]
+
+
+def test_gc_keeps_current_recent_and_retained_versions(tmp_path, inventory_workbook):
+    snapshots = SnapshotStore(str(tmp_path))
+    data = inventory_workbook(_rows(1))
+    versions = [snapshots.create(data, f"{i}.xlsx", _build)[0] for i in range(8)]
+    now = time.time()
+    # v1..v6 는 보관 기간이 지난 것으로, v7/v8 은 방금 만든 것으로
+    for v in versions[:6]:
+        path = os.path.join(tmp_path, v, META_NAME)
+        meta = json.loads(open(path, encoding="utf-8").read())
+        meta['created'] = now - 2 * RETENTION_SECONDS
+        open(path, "w", encoding="utf-8").write(json.dumps(meta))
+    snapshots.publish(versions[0])
+    stale = tmp_path / f"{STAGING_PREFIX}old"
+    os.makedirs(stale)
+    os.utime(stale, (now - 2 * RETENTION_SECONDS,) * 2)
+    fresh = tmp_path / f"{STAGING_PREFIX}new"
+    os.makedirs(fresh)
+
+    removed = snapshots.gc(keep=3, now=now)
+    # 최근 3개(v8, v7, v6) + 현재(v1) 는 남고, 보관 기간이 지난 v2~v5 만 삭제
+    assert sorted(removed) == versions[1:5]
+    assert [s.version for s in snapshots.versions()] == [versions[7], versions[6], versions[5], versions[0]]
+    assert snapshots.current_version() == versions[0]
+    # 중단된 업로드의 오래된 임시 폴더만 정리 (진행 중일 수 있는 최근 것은 남김)
+    assert not stale.exists() and fresh.exists()
+    # keep 을 넘어도 보관 기간 안(v7, v8)이거나 현재(v1)면 남김
+    assert snapshots.gc(keep=0, now=now) == [versions[5]]
+    assert [s.version for s in snapshots.versions()] == [versions[7], versions[6], versions[0]]
+
+
+# ------------------------------------------------------------------------------
+# DatasetStore (되돌리기 / 동시 조회)
+# ------------------------------------------------------------------------------
+def _upload(store, data, name):
+    assert store.submit(data, name)
+    _wait(store)
+    assert store.job.error is None
+    return store.get()
+
+
+def test_rollback_switches_dataset_and_pointer(tmp_path, inventory_workbook):
+    store = DatasetStore(str(tmp_path))
+    first = _upload(store, inventory_workbook(_rows(3)), "a.xlsx")
+    second = _upload(store, inventory_workbook(_rows(5)), "b.xlsx")
+    assert (first.key, second.key) == ("v000001", "v000002")
+    assert second.meta['delta'] == {'inserted': 2, 'removed': 0, 'changed': 0, 'moved': 0, 'unchanged': 3}
+
+    assert store.rollback("v000001")
+    back = store.get()
+    assert back.key == "v000001" and len(back.df) == 3
+    assert store.snapshots.current_version() == "v000001"
+    # 없는 버전으로는 되돌리지 않고 현재 묶음 유지
+    assert not store.rollback("v000099")
+    assert store.get() is back
+
+    # 다른 프로세스(조회 엔진 등)도 CURRENT 를 따라감
+    other = DatasetStore(str(tmp_path))
+    assert other.get().key == "v000001"
+    assert store.rollback("v000002")
+    assert other.get().key == "v000002" and len(other.get().df) == 5
+
+
+def test_concurrent_get_loads_each_version_once(tmp_path, inventory_workbook, monkeypatch):
+    writer = DatasetStore(str(tmp_path))
+    _upload(writer, inventory_workbook(_rows(4)), "a.xlsx")
+    reader = DatasetStore(str(tmp_path))
+    loads = []
+    load = reader._load
+
+    def counted(version):
+        loads.append(version)
+        time.sleep(0.05)
+        return load(version)
+    monkeypatch.setattr(reader, "_load", counted)
+
+    barrier = threading.Barrier(8)
+    got = []
+
+    def read():
+        barrier.wait()
+        got.append(reader.get())
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert loads == ["v000001"]
+    assert len({id(d) for d in got}) == 1
+
+    _upload(writer, inventory_workbook(_rows(6)), "b.xlsx")
+    assert reader.get().key == "v000002" and loads == ["v000001", "v000002"]
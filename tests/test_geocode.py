@@ -0,0 +1,159 @@
+"""보유처 좌표 / 지역 / 시군구 계산이 기존 방식(사전 순서대로 `key in text` 검사 + iterrows)과 같은지 확인"""
+import hashlib
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geocode import (COORD_MATCHER, DEFAULT_BASE, DISTRICT_CENTERS, NEIGHBORHOOD_COORDS, REGION_KEYS, REGION_MATCHER,
+                     PriorityMatcher, classify_series, geocode_series, get_city_only, get_coordinate_priority,
+                     get_region_category)
+from ingest import city_of_store, enrich_inventory, region_of_store
+
+
+# ------------------------------------------------------------------------------
+# 기존 구현 (변경 전 app.py 그대로)
+# ------------------------------------------------------------------------------
+def old_region(text):
+    if pd.isna(text): return "기타"
+    text = str(text).strip()
+    for key in ["강변TM", "신도림TM", "동남", "동북", "서남", "서북", "남부", "강원", "인천"]:
+        if key in text: return key
+    return "기타"
+
+
+def old_city(text):
+    if pd.isna(text): return "미분류(서울)"
+    text = str(text)
+    for dong in NEIGHBORHOOD_COORDS.keys():
+        if dong in text: return dong
+    for dist in DISTRICT_CENTERS.keys():
+        if dist in text: return dist
+    return "미분류(서울)"
+
+
+def old_jitter(store_name, base_lat, base_lon):
+    if "반추" in str(store_name): return base_lat, base_lon
+    hash_int = int(hashlib.md5(str(store_name).encode()).hexdigest(), 16)
+    random.seed(hash_int)
+    lat_offset = random.uniform(-0.003, 0.003)
+    lon_offset = random.uniform(-0.003, 0.003)
+    return base_lat + lat_offset, base_lon + lon_offset
+
+
+def old_coordinate(text, base_lat, base_lon):
+    if pd.isna(text): return base_lat, base_lon
+    text = str(text)
+    for name, coords in NEIGHBORHOOD_COORDS.items():
+        if name in text: return old_jitter(text, coords[0], coords[1])
+    for name, coords in DISTRICT_CENTERS.items():
+        if name in text: return old_jitter(text, coords[0], coords[1])
+    return old_jitter(text, base_lat, base_lon)
+
+
+def old_enrich(df, boyu_col):
+    # 변경 전 load_data_optimized 의 가공 부분
+    df = df.copy()
+    df[boyu_col] = df[boyu_col].astype(str).str.strip()
+    df.loc[df[boyu_col].str.contains("반추", na=False), boyu_col] = "반추정보통신"
+    lats, lons = [], []
+    for _, row in df.iterrows():
+        f_lat, f_lon = old_coordinate(row[boyu_col], 37.5665, 126.9780)
+        lats.append(f_lat)
+        lons.append(f_lon)
+    df['cached_lat'] = lats
+    df['cached_lon'] = lons
+    clean_names = df[boyu_col].str.replace(r'^[^-\s]*\d[^-\s]*-', '', regex=True)
+    df['cached_region'] = clean_names.apply(old_region)
+    df['cached_city'] = clean_names.apply(old_city)
+    return df
+
+
+# 겹치는 키(반추/반추정보통신, 일산/일산동, 중구/중동, 강변TM/테크노), 매장 코드 접두어, 결측/빈 값
+STORES = [
+    "반추정보통신", "반추", " 반추 본사 ", "1234-반추정보통신", "일산동구점", "일산점", "일산서구 탄현점", "고양 일산",
+    "중구 명동점", "부천 중동점", "중동", "중구", "서울 중구 중동", "A12-강남점", "12B-서남 구로점", "AB-동남 잠실점",
+    "동북-노원점", "7-신도림TM", "신도림TM", "강변TM 테크노", "테크노마트", "인천 송도점", "송도 인천", "강원 원주점",
+    "수원 영통점", "영통 수원", "동탄 화성", "무명 매장", "1234-", "-", "", "  ", "N/A", "nan",
+    "서남-", "12-34-동남", "남부 안양 동안점", "판교 분당", "분당 판교", "덕양 화정", "삼송 덕양",
+]
+
+
+def test_priority_matcher_matches_first_key_in_list_order():
+    table = list(NEIGHBORHOOD_COORDS) + list(DISTRICT_CENTERS)
+    matcher = PriorityMatcher(table)
+    for text in STORES:
+        expected = next((k for k in table if k in text), None)
+        assert matcher.first_key(text) == expected, text
+    # 중복 키는 처음 위치의 순위만 유지
+    dup = PriorityMatcher(["중동", "중구", "중동"])
+    assert dup.keys == ["중동", "중구"]
+    assert dup.first_key("중구 중동") == "중동"
+    assert PriorityMatcher([]).first_key("아무거나") is None
+
+
+def test_matchers_use_table_order():
+    assert COORD_MATCHER.first_key("반추정보통신") == "반추"
+    assert COORD_MATCHER.first_key("일산동구") == "일산동"
+    assert COORD_MATCHER.first_key("부천 중동 중구") == "중동"
+    assert REGION_MATCHER.first_key("강변TM 신도림TM") == "강변TM"
+    assert REGION_MATCHER.keys == REGION_KEYS
+
+
+@pytest.mark.parametrize("text", STORES + [np.nan, None])
+def test_single_value_functions_match_old(text):
+    assert get_region_category(text) == old_region(text)
+    assert get_city_only(text) == old_city(text)
+    assert get_coordinate_priority(text, *DEFAULT_BASE) == old_coordinate(text, *DEFAULT_BASE)
+
+
+def test_jitter_does_not_touch_global_random_state():
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    get_coordinate_priority("강남점", *DEFAULT_BASE)
+    assert random.random() == expected
+
+
+def test_series_functions_match_old_per_row():
+    values = pd.Series((STORES * 3)[::-1] + [np.nan] * 4, dtype=object)
+    lat, lon = geocode_series(values, *DEFAULT_BASE)
+    expected = [old_coordinate(v, *DEFAULT_BASE) for v in values]
+    assert lat.tolist() == [e[0] for e in expected]
+    assert lon.tolist() == [e[1] for e in expected]
+
+    stripped = values.str.replace(r'^[^-\s]*\d[^-\s]*-', '', regex=True)
+    region = classify_series(values, region_of_store)
+    city = classify_series(values, city_of_store)
+    assert list(region.astype(object)) == [old_region(v) for v in stripped]
+    assert list(city.astype(object)) == [old_city(v) for v in stripped]
+
+    # 범주형 입력도 같은 결과
+    cat_lat, _ = geocode_series(values.astype("category"), *DEFAULT_BASE)
+    assert cat_lat.tolist() == lat.tolist()
+
+
+def test_enrich_inventory_matches_old_load():
+    rng = np.random.default_rng(3)
+    owners = [STORES[i] for i in rng.integers(0, len(STORES), 400)]
+    df = pd.DataFrame({"모델명": ["SM-S928N"] * len(owners), "보유처▼": owners})
+    expected = old_enrich(df, "보유처▼")
+    got = enrich_inventory(df.copy())
+    assert list(got["보유처▼"].astype(object)) == expected["보유처▼"].tolist()
+    assert got["cached_lat"].tolist() == expected["cached_lat"].tolist()
+    assert got["cached_lon"].tolist() == expected["cached_lon"].tolist()
+    assert list(got["cached_region"].astype(object)) == expected["cached_region"].tolist()
+    assert list(got["cached_city"].astype(object)) == expected["cached_city"].tolist()
+
+
+def test_missing_owner_gets_base_coordinates():
+    # 빈 보유처 셀은 (예전의 "nan" 문자열 대신) 결측으로 남고, 기존 함수의 결측 처리와 같은 값을 받음
+    df = pd.DataFrame({"보유처": ["강남점", np.nan, None, "반추"]}, dtype=object)
+    got = enrich_inventory(df)
+    assert got["보유처"].isna().tolist() == [False, True, True, False]
+    assert got["cached_lat"].tolist()[1:3] == [DEFAULT_BASE[0]] * 2
+    assert got["cached_lon"].tolist()[1:3] == [DEFAULT_BASE[1]] * 2
+    assert list(got["cached_region"].astype(object))[1:3] == [old_region(np.nan)] * 2
+    assert list(got["cached_city"].astype(object))[1:3] == [old_city(np.nan)] * 2
+    assert got["cached_lat"].iloc[3] == NEIGHBORHOOD_COORDS["반추"][0]
@@ -0,0 +1,308 @@
+"""xlsx 스트리밍 리더(ingest.read_xlsx_projected)와 pd.read_excel(dtype=str) 결과 비교, 출고일 파싱 확인
+
+openpyxl 로 날짜 / 공유 문자열 / 빈 셀·빈 행 / 중복 머리글이 섞인 통합 문서를 만들어 두 경로의 결과가 같은지 확인합니다.
+openpyxl 이 쓰지 않는 형태(인라인 문자열, 1904 날짜 체계, 오류 셀, 헤더보다 넓은 행)는 시트 XML 을 직접 써서 확인합니다.
+
+사용법:
+    python -m pytest -q tests
+"""
+import datetime
+import logging
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from ingest import (UnsupportedWorkbook, _read_part, load_inventory, needed_columns, parse_ship_dates,
+                    read_xlsx_projected, workbook_parts)
+
+HEADER = ["모델명", "색상", "보유처▼", "재고상태", "일련번호", "비고", "비고", "수량", "단가", "확인",
+          "", "메모", "담당", "출고일"]
+MODELS = ["SM-S928N", "SM-F956N", "iPhone 15", "NA", ""]
+COLORS = ["블랙", "화이트", "티타늄 그레이", None]
+STORES = ["1234-강남점", "반추정보통신", "5678-부평점", "신도림TM", None]
+
+
+def _rows(n):
+    rng = np.random.default_rng(7)
+    base = datetime.datetime(2023, 1, 1)
+    for i in range(n):
+        if i % 97 == 50:
+            yield []  # 중간의 빈 행
+            continue
+        shipped = base + datetime.timedelta(days=int(rng.integers(0, 600)))
+        if i % 5 == 0: shipped = shipped.replace(hour=13, minute=30)  # 시각이 있는 날짜
+        if i % 11 == 0: shipped = None  # 출고일 없음 (사무실 재고 등)
+        yield [
+            MODELS[i % len(MODELS)],
+            COLORS[i % len(COLORS)],
+            STORES[i % len(STORES)],
+            "정상" if i % 3 else "불량",
+            f"35{i:09d}",
+            None if i % 4 else "확인 필요",
+            "null" if i % 13 == 0 else None,
+            int(rng.integers(1, 5)),
+            float(rng.integers(100, 2000)) / 10,
+            bool(i % 2),
+            None,
+            None if i % 7 else f"메모 {i}",
+            "김담당" if i % 2 else "",
+            shipped,
+        ]
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    path = tmp_path_factory.mktemp("ingest") / "inventory.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADER)
+    for row in _rows(500): ws.append(row)
+    # 마지막 데이터 뒤의 서식만 있는 빈 셀 (pandas 는 끝의 빈 행을 버림)
+    ws.cell(row=ws.max_row + 3, column=2).number_format = "yyyy-mm-dd"
+    for row in ws.iter_rows(min_row=2, min_col=14, max_col=14):
+        row[0].number_format = "yyyy-mm-dd"
+    wb.save(path)
+    return path
+
+
+def _as_text(df):
+    # 범주형으로 읽은 역할 컬럼도 문자열(결측은 NaN)로 맞춰 비교
+    return pd.DataFrame({c: df[c].astype(object).where(df[c].notna(), np.nan) for c in df.columns}, columns=df.columns)
+
+
+def test_full_read_matches_read_excel(workbook):
+    expected = pd.read_excel(workbook, dtype=str)
+    df, _ = read_xlsx_projected(workbook, project=False)
+    assert list(df.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(_as_text(df), _as_text(expected))
+
+
+def test_projected_read_matches_read_excel(workbook):
+    expected = pd.read_excel(workbook, dtype=str)
+    keep, roles = needed_columns(list(expected.columns))
+    df, got_roles = read_xlsx_projected(workbook)
+    assert got_roles == roles
+    assert list(df.columns) == keep
+    pd.testing.assert_frame_equal(_as_text(df), _as_text(expected[keep]))
+    assert isinstance(df[roles["보유처"]].dtype, pd.CategoricalDtype)
+
+
+def test_fallback_is_logged(tmp_path, workbook, caplog):
+    # 스트리밍 리더가 못 읽는 파일(zip 이 아님)은 pandas 로 다시 읽고 그 사실을 남김
+    bad = tmp_path / "csv.xlsx"
+    bad.write_bytes(b"not a zip file")
+    with caplog.at_level(logging.WARNING, logger="inventory.ingest"), pytest.raises(Exception):
+        _read_part(str(bad), True, None, "csv.xlsx")
+    assert any("csv.xlsx" in r.getMessage() for r in caplog.records)
+
+    reader, df, _ = _read_part(str(workbook), True, None)
+    assert reader == "xlsx_stream"
+    assert len(df) == len(pd.read_excel(workbook, dtype=str))
+
+
+def test_unexpected_errors_are_not_swallowed(monkeypatch, workbook):
+    # 파싱 오류가 아닌 예외는 pandas 경로로 숨기지 않음
+    import ingest
+
+    def broken(*args, **kwargs): raise RuntimeError("boom")
+    monkeypatch.setattr(ingest, "read_xlsx_projected", broken)
+    with pytest.raises(RuntimeError):
+        ingest._read_part(str(workbook), True, None)
+
+
+# ------------------------------------------------------------------------------
+# 출고일 파싱
+# ------------------------------------------------------------------------------
+@pytest.mark.parametrize("text, expected", [
+    ("2025-07-18", "2025-07-18"), ("20250718", "2025-07-18"), ("2025.07.18", "2025-07-18"), ("2025/7/18", "2025-07-18"),
+    ("2025년 7월 18일", "2025-07-18"), ("25.07.18", "2025-07-18"), ("2025-07-18 00:00:00", "2025-07-18"),
+    ("2025-07-18 13:30:00", "2025-07-18"), (" 2025-7-8 ", "2025-07-08"),
+    # 날짜 서식이 빠진 엑셀 일련값
+    ("45856", "2025-07-18"), ("45856.0", "2025-07-18"),
+    # 못 읽거나 범위 밖 (1990~2099) -> NaT
+    ("미정", None), ("", None), (None, None), (np.nan, None), ("2025-13-01", None), ("2025-02-30", None),
+    ("1899-01-01", None), ("12345", None), ("2025", None), ("A20250718", None),
+])
+def test_parse_ship_dates_formats(text, expected):
+    parsed = parse_ship_dates(pd.Series([text, "2024-01-02"], dtype=object))
+    assert parsed.dtype == np.dtype("datetime64[s]")
+    assert parsed[1] == np.datetime64("2024-01-02")
+    if expected is None: assert np.isnat(parsed[0])
+    else: assert parsed[0] == np.datetime64(expected)
+
+
+def test_parse_ship_dates_keeps_row_order_for_repeated_values():
+    values = pd.Series(["20250718", "미정", "2025-07-18", None, "20250718", "45000"] * 50, dtype=object)
+    parsed = parse_ship_dates(values.astype("category"))
+    expected = [np.datetime64(v) if v else None for v in ["2025-07-18", None, "2025-07-18", None, "2025-07-18", "2023-03-15"]] * 50
+    assert [None if np.isnat(p) else p for p in parsed] == expected
+
+
+# ------------------------------------------------------------------------------
+# 직접 쓴 통합 문서 (공유 / 인라인 문자열, 1904 날짜, 오류 셀, 넓은 행, 여러 시트)
+# ------------------------------------------------------------------------------
+_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+_R_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+_PKG_NS = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+# 셀 서식: 0 = 일반, 1 = 날짜 (내장 서식 14)
+_STYLES = (f'<styleSheet {_NS}><fonts count="1"><font/></fonts><fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+           '<borders count="1"><border/></borders><cellStyleXfs count="1"><xf/></cellStyleXfs>'
+           '<cellXfs count="2"><xf numFmtId="0"/><xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+           '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles></styleSheet>')
+
+
+def s(i): return f'<c t="s"><v>{i}</v></c>'
+def inline(text): return f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+def rich(*texts): return '<c t="inlineStr"><is>' + "".join(f"<r><t>{escape(t)}</t></r>" for t in texts) + '</is></c>'
+def num(value, style=0): return f'<c s="{style}"><v>{value}</v></c>'
+def err(code): return f'<c t="e"><v>{escape(code)}</v></c>'
+def row(*cells): return "<row>" + "".join(cells) + "</row>"
+
+
+def raw_workbook(path, sheets, shared=(), date1904=False):
+    # sheets: [(시트 이름, [행 XML])], shared: 공유 문자열 (문자열 또는 서식 run 목록)
+    def si(v):
+        if isinstance(v, str): return f"<si><t>{escape(v)}</t></si>"
+        return "<si>" + "".join(f"<r><t>{escape(t)}</t></r>" for t in v) + "</si>"
+    names = [f"xl/worksheets/sheet{i + 1}.xml" for i in range(len(sheets))]
+    types = "".join(f'<Override PartName="/{n}" ContentType="application/vnd.openxmlformats-officedocument.'
+                    f'spreadsheetml.worksheet+xml"/>' for n in names)
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            f'{types}</Types>'))
+        zf.writestr("_rels/.rels", f'<Relationships {_PKG_NS}><Relationship Id="rId1" '
+                    f'Type="{_DOC_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        pr = '<workbookPr date1904="1"/>' if date1904 else ""
+        entries = "".join(f'<sheet name="{escape(name)}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                          for i, (name, _) in enumerate(sheets))
+        zf.writestr("xl/workbook.xml", f"<workbook {_NS} {_R_NS}>{pr}<sheets>{entries}</sheets></workbook>")
+        rels = "".join(f'<Relationship Id="rId{i + 1}" Type="{_DOC_REL}/worksheet" Target="worksheets/sheet{i + 1}.xml"/>'
+                       for i in range(len(sheets)))
+        rels += (f'<Relationship Id="rId{len(sheets) + 1}" Type="{_DOC_REL}/styles" Target="styles.xml"/>'
+                 f'<Relationship Id="rId{len(sheets) + 2}" Type="{_DOC_REL}/sharedStrings" Target="sharedStrings.xml"/>')
+        zf.writestr("xl/_rels/workbook.xml.rels", f"<Relationships {_PKG_NS}>{rels}</Relationships>")
+        zf.writestr("xl/styles.xml", _STYLES)
+        zf.writestr("xl/sharedStrings.xml", f'<sst {_NS}>' + "".join(si(v) for v in shared) + "</sst>")
+        for name, (_, rows) in zip(names, sheets):
+            zf.writestr(name, f"<worksheet {_NS}><sheetData>" + "".join(rows) + "</sheetData></worksheet>")
+    return path
+
+
+def assert_matches_read_excel(path, sheet=None):
+    # 전체 컬럼 / 필요한 컬럼 두 경로 모두 pd.read_excel(dtype=str) 와 같음
+    expected = pd.read_excel(path, dtype=str, sheet_name=0 if sheet is None else sheet)
+    df, _ = read_xlsx_projected(path, project=False, sheet=sheet)
+    pd.testing.assert_frame_equal(_as_text(df), _as_text(expected))
+    keep, roles = needed_columns(list(expected.columns))
+    df, got_roles = read_xlsx_projected(path, sheet=sheet)
+    assert got_roles == roles
+    pd.testing.assert_frame_equal(_as_text(df), _as_text(expected[keep]))
+    return expected
+
+
+HEADER_CELLS = [inline("모델명"), inline("색상"), inline("보유처"), inline("재고상태"), inline("일련번호"), inline("출고일")]
+
+
+def test_shared_and_inline_strings(tmp_path):
+    shared = ["SM-S928N", "블랙", ["강남", "점"], "", "NA"]
+    path = raw_workbook(tmp_path / "strings.xlsx", [("재고", [
+        row(*HEADER_CELLS),
+        row(s(0), s(1), s(2), inline("정상"), inline("R3186")),
+        # 같은 값을 인라인으로 / 서식 run 으로 나뉜 인라인 / 빈 공유 문자열 / 결측 문자열
+        row(inline("SM-S928N"), rich("블", "랙"), inline("강남점"), s(3), s(4)),
+        row(s(4), inline(""), rich("부평", "점"), inline("불량"), num(350000000001)),
+        # 셀 위치가 있는 행 (가운데 컬럼 생략)
+        '<row r="5"><c r="A5" t="s"><v>0</v></c><c r="C5" t="inlineStr"><is><t>강남점</t></is></c></row>',
+    ])], shared=shared)
+    expected = assert_matches_read_excel(path)
+    df, _ = read_xlsx_projected(path)
+    assert df["보유처"].tolist() == ["강남점", "강남점", "부평점", "강남점"]
+    assert df["모델명"].astype(object).tolist()[:2] == ["SM-S928N", "SM-S928N"]
+    assert expected["일련번호"].tolist()[2] == "350000000001"
+
+
+@pytest.mark.parametrize("date1904", [False, True])
+def test_date_system(tmp_path, date1904):
+    serials = [45000, 45000.5, 0, 1462]
+    path = raw_workbook(tmp_path / "dates.xlsx", [("재고", [row(*HEADER_CELLS)] + [
+        row(inline("SM-S928N"), inline("블랙"), inline("강남점"), inline("정상"), inline(f"S{i}"), num(v, style=1))
+        for i, v in enumerate(serials)
+    ])], date1904=date1904)
+    assert_matches_read_excel(path)
+    df, roles = read_xlsx_projected(path)
+    epoch = datetime.datetime(1904, 1, 1) if date1904 else datetime.datetime(1899, 12, 30)
+    assert df[roles["target"]].tolist()[:2] == [str(epoch + datetime.timedelta(days=45000)),
+                                               str(epoch + datetime.timedelta(days=45000.5))]
+    # 1904 체계의 일련값은 같은 숫자라도 1462일 뒤
+    shipped = np.datetime64("2023-03-15") + np.timedelta64(1462 if date1904 else 0, "D")
+    assert parse_ship_dates(df[roles["target"]])[0] == shipped
+
+
+def test_error_cells_are_missing(tmp_path):
+    path = raw_workbook(tmp_path / "errors.xlsx", [("재고", [
+        row(*HEADER_CELLS),
+        row(inline("SM-S928N"), err("#N/A"), inline("강남점"), err("#DIV/0!"), inline("S1"), err("#VALUE!")),
+        row(err("#REF!"), inline("블랙"), err("#NAME?"), inline("정상"), inline("S2"), num(45000, style=1)),
+    ])])
+    expected = assert_matches_read_excel(path)
+    assert expected.isna().sum().sum() == 5
+    df, _ = read_xlsx_projected(path)
+    assert df["보유처"].isna().tolist() == [False, True]
+
+
+def test_rows_wider_than_header(tmp_path):
+    # 헤더는 5칸인데 데이터 행이 14칸 이상: 14번째 컬럼(Unnamed: 13)이 출고일 역할
+    short = HEADER_CELLS[:5]
+    wide = [inline("SM-S928N"), inline("블랙"), inline("강남점"), inline("정상"), inline("S1")] + \
+        [inline(f"x{i}") for i in range(5, 13)] + [num(45000, style=1), inline("끝")]
+    path = raw_workbook(tmp_path / "wide.xlsx", [("재고", [
+        row(*short),
+        row(*wide),
+        row(inline("SM-F956N"), inline("화이트"), inline("부평점"), inline("불량"), inline("S2")),
+        row(*wide[:7]),
+    ])])
+    expected = assert_matches_read_excel(path)
+    assert len(expected.columns) == 15
+    df, roles = read_xlsx_projected(path)
+    assert roles["target"] == "Unnamed: 13"
+    assert df["Unnamed: 13"].tolist()[0] == "2023-03-15 00:00:00"
+    reader, _, _ = _read_part(str(path), True, None)
+    assert reader == "xlsx_stream"
+
+
+def test_multiple_sheets(tmp_path):
+    # 재고 시트 두 개 + 보유처 컬럼이 없는 요약 시트
+    def inventory(n, owner):
+        return [row(*HEADER_CELLS)] + [
+            row(inline("SM-S928N"), inline("블랙"), inline(owner), inline("정상"), inline(f"{owner}-{i}")) for i in range(n)]
+    path = raw_workbook(tmp_path / "sheets.xlsx", [
+        ("강남", inventory(3, "강남점")),
+        ("요약", [row(inline("구분"), inline("수량")), row(inline("합계"), num(7))]),
+        ("부평", inventory(4, "부평점")),
+    ])
+    for sheet in ("강남", "요약", "부평"): assert_matches_read_excel(path, sheet)
+    # 시트를 지정하지 않으면 첫 시트
+    assert len(read_xlsx_projected(path)[0]) == 3
+    with pytest.raises(UnsupportedWorkbook):
+        read_xlsx_projected(path, sheet="없는 시트")
+
+    parts = workbook_parts(str(path))
+    assert [p.label for p in parts] == ["sheets.xlsx / 강남", "sheets.xlsx / 요약", "sheets.xlsx / 부평"]
+    df = load_inventory(str(path), max_workers=1)
+    # 요약 시트는 빼고 재고 시트만 순서대로 합침
+    assert df["보유처"].astype(object).tolist() == ["강남점"] * 3 + ["부평점"] * 4
+    assert [p['reader'] for p in df.attrs['load_stats']['parts']] == ["xlsx_stream"] * 3
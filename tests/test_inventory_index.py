@@ -0,0 +1,265 @@
+"""조회 인덱스(InventoryIndex)가 기존 조회 과정(isin / str.contains / sort_values)과 같은 행을 같은 순서로 돌려주는지,
+조회 결과 캐시(SearchCache)가 용량 한도 / 최근 사용 순서 / 데이터 버전별로 동작하는지, 출고 후 경과일 조건 확인"""
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_store import DatasetStore
+from ingest import enrich_inventory, resolve_columns
+from inventory_index import InventoryIndex, SearchCache, age_cutoff, local_today
+
+MODELS = ["SM-S928N", "SM-F956N", "SM-A356N", "iPhone 15"]
+COLORS = ["블랙", "화이트", "티타늄 그레이", None]
+OWNERS = ["반추정보통신", "1234-강남점", "12B-서남 구로점", "AB-동남 잠실점", "동북-노원점", "도매-서남 유통", "도매-인천 상사",
+          "인천 송도점", "강원 원주점", "7-신도림TM", "강변TM 테크노", "남부 안양 동안점", "반추 본사", None]
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(11)
+    n = 2000
+    raw = pd.DataFrame({
+        "모델명": rng.choice(MODELS, n),
+        "색상": [COLORS[i] for i in rng.integers(0, len(COLORS), n)],
+        "보유처": [OWNERS[i] for i in rng.integers(0, len(OWNERS), n)],
+    }, dtype=object)
+    df = enrich_inventory(raw)
+    df.attrs['col_roles'] = resolve_columns(df.columns)
+    return df, InventoryIndex(df)
+
+
+def old_search(df, models, colors, owners, regions):
+    # 변경 전 app.py 의 조회하기 처리 (필터 후 보유처 오름차순)
+    temp_df = df.copy()
+    temp_df["보유처"] = temp_df["보유처"].astype(object)
+    if models:
+        temp_df = temp_df[temp_df["모델명"].isin(models)]
+    if colors and "전체" not in colors:
+        temp_df = temp_df[temp_df["색상"].isin(colors)]
+    if owners and "전체" not in owners:
+        temp_df = temp_df[temp_df["보유처"].isin(owners)]
+    if regions and "전체" not in regions:
+        if "사무실" in regions:
+            office_mask = temp_df["보유처"].astype(str).str.contains("반추", na=False)
+            other_regions = [r for r in regions if r != "사무실"]
+            if other_regions:
+                region_mask = temp_df['cached_region'].isin(other_regions)
+                temp_df = temp_df[office_mask | region_mask]
+            else:
+                temp_df = temp_df[office_mask]
+        else:
+            temp_df = temp_df[temp_df['cached_region'].isin(regions)]
+    return temp_df.sort_values(by="보유처", ascending=True, kind="stable")
+
+
+REGION_CASES = [[], ["전체"], ["사무실"], ["사무실", "서남"], ["서남", "인천"], ["사무실", "전체"], ["강변TM", "신도림TM"], ["서북"]]
+FILTER_CASES = [
+    (["SM-S928N"], [], []),
+    (["SM-S928N", "iPhone 15"], ["블랙", "화이트"], []),
+    (MODELS, ["전체"], []),
+    (["SM-F956N"], ["티타늄 그레이"], ["1234-강남점", "반추정보통신"]),
+    ([], [], ["도매-서남 유통", "7-신도림TM"]),
+    ([], [], ["전체"]),
+    (["없는 모델"], [], []),
+]
+
+
+@pytest.mark.parametrize("regions", REGION_CASES)
+@pytest.mark.parametrize("models, colors, owners", FILTER_CASES)
+def test_search_matches_old_filter_chain(data, models, colors, owners, regions):
+    df, index = data
+    expected = old_search(df, models, colors, owners, regions)
+    positions = index.search(models=models, colors=colors, owners=owners, regions=regions)
+    assert positions.tolist() == expected.index.tolist()
+
+
+def test_office_region_is_or_with_other_regions(data):
+    df, index = data
+    office = set(index.search(models=MODELS, regions=["사무실"]).tolist())
+    west = set(index.search(models=MODELS, regions=["서남"]).tolist())
+    both = set(index.search(models=MODELS, regions=["사무실", "서남"]).tolist())
+    assert office and west and both == office | west
+    assert all("반추" in str(df["보유처"].iloc[p]) for p in office)
+
+
+def test_all_means_no_region_filter(data):
+    _, index = data
+    everything = index.search(models=MODELS).tolist()
+    for regions in (["전체"], ["전체", "사무실"], ["서남", "전체"]):
+        assert index.search(models=MODELS, regions=regions).tolist() == everything
+
+
+def test_map_positions_exclude_wholesale(data):
+    df, index = data
+    positions = index.search(models=MODELS)
+    expected = old_search(df, MODELS, [], [], [])
+    expected = expected[~expected["보유처"].astype(str).str.startswith('도매-', na=False)]
+    assert index.without_wholesale(positions).tolist() == expected.index.tolist()
+    assert not any(str(df["보유처"].iloc[p]).startswith("도매-") for p in index.without_wholesale(positions))
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+def test_order_by_owner_matches_sort_values(data, ascending):
+    # 목록 정렬: 기존 결과(보유처 오름차순)를 다시 sort_values. 같은 보유처는 원본 순서, 결측은 맨 뒤
+    df, index = data
+    for models, regions in itertools.product([MODELS, ["SM-S928N"]], [[], ["사무실", "동남"]]):
+        positions = index.search(models=models, regions=regions)
+        listed = old_search(df, models, [], [], regions)
+        expected = listed.sort_values(by="보유처", ascending=ascending, kind="stable", na_position="last")
+        got = index.order_by_owner(positions, ascending=ascending)
+        assert df["보유처"].astype(object).iloc[got].tolist() == expected["보유처"].tolist()
+        assert sorted(got.tolist()) == sorted(expected.index.tolist())
+        missing = df["보유처"].iloc[got].isna().to_numpy()
+        if not regions: assert missing.any()
+        assert not missing[:len(missing) - missing.sum()].any()
+
+
+def test_order_by_owner_keeps_row_order_within_owner(data):
+    df, index = data
+    got = index.order_by_owner(index.search(models=MODELS), ascending=False)
+    owners = df["보유처"].astype(object).iloc[got].fillna("").tolist()
+    for owner in set(owners):
+        rows = [p for p, o in zip(got.tolist(), owners) if o == owner]
+        assert rows == sorted(rows)
+
+
+# ------------------------------------------------------------------------------
+# 조회 결과 캐시 (SearchCache)
+# ------------------------------------------------------------------------------
+def _entry_bytes(result):
+    return result.positions.nbytes + result.map_positions.nbytes
+
+
+def test_search_cache_hits_share_one_result(data):
+    _, index = data
+    cache = SearchCache(index)
+    first = cache.search(models=["SM-S928N", "iPhone 15"], colors=["블랙"], regions=["서남", "사무실"])
+    # 순서/중복/"전체" 가 달라도 같은 조건이면 같은 결과 객체
+    again = cache.search(models=["iPhone 15", "SM-S928N", "SM-S928N"], colors=["블랙"], regions=["사무실", "서남"])
+    assert again is first
+    assert cache.search(models=MODELS, colors=["전체"]) is cache.search(models=MODELS, colors=[])
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+    assert not first.positions.flags.writeable
+
+
+def test_search_cache_evicts_least_recently_used(data):
+    _, index = data
+    sizes = {m: _entry_bytes(SearchCache(index).search(models=[m])) for m in MODELS}
+    # 세 개까지만 들어가는 크기
+    budget = sizes["SM-S928N"] + sizes["SM-F956N"] + sizes["SM-A356N"]
+    cache = SearchCache(index, max_bytes=budget)
+    for m in ["SM-S928N", "SM-F956N", "SM-A356N"]: cache.search(models=[m])
+    assert len(cache) == 3 and cache.nbytes == budget
+
+    cache.search(models=["SM-S928N"])  # 최근 사용으로
+    cache.search(models=["iPhone 15"])  # 가장 오래 안 쓴 SM-F956N 부터 버림
+    keys = [k[0] for k in cache._entries]
+    assert ("SM-F956N",) not in keys
+    assert keys[-2:] == [("SM-S928N",), ("iPhone 15",)]
+    assert cache.nbytes == sum(_entry_bytes(r) for r in cache._entries.values())
+    assert cache.nbytes <= budget
+
+
+def test_search_cache_respects_byte_bound(data):
+    _, index = data
+    cache = SearchCache(index, max_bytes=20000)
+    for models in itertools.permutations(MODELS, 2):
+        cache.search(models=list(models), colors=["블랙"])
+        cache.search(models=list(models))
+        assert cache.nbytes <= cache.max_bytes or len(cache) == 1
+        assert cache.nbytes == sum(_entry_bytes(r) for r in cache._entries.values())
+    # 한도보다 큰 결과 하나는 (바로 다시 쓰이도록) 혼자 남김
+    tiny = SearchCache(index, max_bytes=1)
+    big = tiny.search(models=MODELS)
+    assert len(tiny) == 1 and tiny.search(models=MODELS) is big
+
+
+def test_new_dataset_gets_a_fresh_cache(tmp_path, inventory_workbook):
+    # 새 버전이 올라오면 새 인덱스와 빈 캐시로 조회 (이전 버전의 결과를 돌려주지 않음)
+    store = DatasetStore(str(tmp_path / "snapshots"))
+    assert store.submit(inventory_workbook([("SM-S928N", "블랙", "강남점", "정상", f"A{i}") for i in range(10)]), "v1.xlsx")
+    _wait(store)
+    first = store.get()
+    assert len(first.search_cache.search(models=["SM-S928N"]).positions) == 10
+    assert len(first.search_cache) == 1
+
+    assert store.submit(inventory_workbook([("SM-S928N", "블랙", "강남점", "정상", f"A{i}") for i in range(4)]), "v2.xlsx")
+    _wait(store)
+    second = store.get()
+    assert second.key != first.key
+    assert second.search_cache is not first.search_cache and len(second.search_cache) == 0
+    assert len(second.search_cache.search(models=["SM-S928N"]).positions) == 4
+
+
+def _wait(store, timeout=60):
+    deadline = time.time() + timeout
+    while store.busy:
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert store.job.error is None
+
+
+# ------------------------------------------------------------------------------
+# 출고 후 경과일
+# ------------------------------------------------------------------------------
+@pytest.mark.parametrize("now, today", [
+    ("2026-10-17T14:59:59Z", "2026-10-17"),
+    ("2026-10-17T15:00:00Z", "2026-10-18"),  # UTC 로는 아직 17일이지만 한국은 18일 0시
+    ("2026-10-18T08:59:00+09:00", "2026-10-18"),
+    ("2026-12-31T23:30:00Z", "2027-01-01"),
+])
+def test_local_today_uses_korean_date(now, today):
+    assert local_today(pd.Timestamp(now)) == np.datetime64(today)
+
+
+def test_age_cutoff():
+    today = np.datetime64("2026-10-18")
+    day = lambda s: int(np.datetime64(s, "D").astype(np.int64))
+    assert age_cutoff(0, today) == day("2026-10-18")
+    assert age_cutoff(90, today) == day("2026-07-20")
+    assert age_cutoff(365, "2026-03-01") == day("2025-03-01")
+
+
+@pytest.fixture(scope="module")
+def dated():
+    raw = pd.DataFrame({
+        "모델명": ["SM-S928N"] * 6,
+        "보유처": ["강남점", "강남점", "반추정보통신", "1234-서남 구로점", "인천 송도점", "인천 송도점"],
+        "출고일": ["2026-01-01", "2026-10-18", "2025-01-01", "미정", None, "20260601"],
+    }, dtype=object)
+    df = enrich_inventory(raw, roles=resolve_columns(raw.columns))
+    df.attrs['col_roles'] = resolve_columns(df.columns)
+    return df, InventoryIndex(df)
+
+
+def test_age_search_excludes_rows_without_date(dated):
+    _, index = dated
+    today = np.datetime64("2026-10-18")
+    # 출고일을 모르는 행(미정 / 빈 칸)과 출고일이 없는 것으로 보는 사무실 재고는 경과일 조건에 걸리지 않음
+    assert index.search(models=["SM-S928N"], shipped_by=age_cutoff(0, today)).tolist() == [0, 1, 5]
+    assert index.search(models=["SM-S928N"], shipped_by=age_cutoff(100, today)).tolist() == [0, 5]
+    assert index.search(models=["SM-S928N"], shipped_by=age_cutoff(200, today)).tolist() == [0]
+    assert index.search(models=["SM-S928N"], shipped_by=age_cutoff(2000, today)).tolist() == []
+    assert index.dated.tolist() == [True, True, False, False, False, True]
+    # 조건이 없으면 출고일과 무관하게 전체
+    assert len(index.search(models=["SM-S928N"])) == 6
+
+
+def test_oldest_first_and_age_days(dated):
+    _, index = dated
+    positions = index.search(models=["SM-S928N"])
+    ordered = index.order_by_shipped(positions)
+    assert ordered[:3].tolist() == [0, 5, 1]
+    assert sorted(ordered[3:].tolist()) == [2, 3, 4]
+    assert index.age_days(np.arange(6), today="2026-10-18").tolist() == [290, 0, -1, -1, -1, 139]
+
+
+def test_search_cache_keys_include_cutoff(dated):
+    _, index = dated
+    cache = SearchCache(index)
+    older = cache.search(models=["SM-S928N"], shipped_by=age_cutoff(100, "2026-10-18"))
+    newer = cache.search(models=["SM-S928N"], shipped_by=age_cutoff(100, "2026-10-19"))
+    assert older is not newer and len(cache) == 2
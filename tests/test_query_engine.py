@@ -0,0 +1,78 @@
+"""조회 엔진 로컬 HTTP API 의 응답 코드 (정상 200 / 잘못된 조건 400 / 데이터 없음 503 / 예상하지 못한 오류 500)"""
+import json
+import logging
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dataset_store import DatasetStore
+from query_engine import QueryEngine, serve
+
+
+@pytest.fixture
+def api(tmp_path, inventory_workbook):
+    store = DatasetStore(str(tmp_path))
+    rows = [("SM-S928N", "블랙", "강남점", "정상", f"S{i:05d}") for i in range(5)]
+    assert store.submit(inventory_workbook(rows), "a.xlsx")
+    while store.busy: threading.Event().wait(0.02)
+    engine = QueryEngine(store.get)
+    server = serve(engine, port=0)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield engine, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(base, path):
+    try:
+        with urllib.request.urlopen(base + path, timeout=10) as r: return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_query_ok(api):
+    _, base = api
+    status, body = get(base, "/query?model=SM-S928N&view=stores")
+    assert status == 200 and body['total'] == 5
+
+
+@pytest.mark.parametrize("path", [
+    "/query?model=SM-S928N&min_age=-5", "/query?model=SM-S928N&min_age=abc", "/query?limit=-1", "/query?offset=x",
+    "/query?sort=newest", "/query?view=map", "/nearby?lat=nan&lon=127", "/nearby?lat=37.5&lon=127&radius_km=-1",
+    "/nearby?lat=37.5&lon=127&count=-2", "/nearby?lat=abc&lon=127",
+])
+def test_bad_parameters_are_400(api, path):
+    _, base = api
+    status, body = get(base, path)
+    assert status == 400 and body['error']
+
+
+def test_unknown_path_is_404(api):
+    _, base = api
+    assert get(base, "/nope")[0] == 404
+
+
+def test_no_data_is_503(tmp_path):
+    server = serve(QueryEngine(DatasetStore(str(tmp_path / "empty")).get), port=0)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        status, body = get(f"http://127.0.0.1:{server.server_address[1]}", "/query?model=SM-S928N")
+        assert status == 503 and body['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unexpected_error_is_logged_500(api, monkeypatch, caplog):
+    engine, base = api
+
+    def broken(*args, **kwargs): raise KeyError("boom")
+    monkeypatch.setattr(engine, "serial", broken)
+    with caplog.at_level(logging.ERROR, logger="inventory.query"):
+        status, body = get(base, "/serial?q=S0001")
+    assert status == 500 and body == {'error': "서버 오류: KeyError"}
+    assert any(r.exc_info and "/serial?q=S0001" in r.getMessage() for r in caplog.records)
+    # 연결이 끊기지 않고 다음 요청도 처리
+    assert get(base, "/health")[0] == 200
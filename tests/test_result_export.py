@@ -0,0 +1,109 @@
+"""조회 결과 내보내기(result_export)의 XLSX / CSV 파일을 openpyxl / pandas 로 다시 읽어 원본 행과 비교"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ingest import resolve_columns
+from result_export import export_columns, export_rows
+
+N_ROWS = 2500
+
+
+@pytest.fixture(scope="module")
+def df():
+    # 범주 / 문자열 / 결측 / XML 특수문자 / 제어문자가 섞인 데이터 + 파생 컬럼(지역, 시군구, 출고일)
+    rng = np.random.default_rng(3)
+    owners = ["1234-강남점", "반추정보통신", "A&B <도매>", '따옴표"점', None]
+    shipped = pd.Series(pd.to_datetime("2023-01-01") + pd.to_timedelta(rng.integers(0, 900, N_ROWS), unit="D"))
+    shipped[::7] = pd.NaT
+    frame = pd.DataFrame({
+        "보유처▼": pd.Categorical([owners[i % len(owners)] for i in range(N_ROWS)]),
+        "모델명": [f"SM-S92{i % 9}N" for i in range(N_ROWS)],
+        "색상": [None if i % 5 == 0 else "블랙\x01" if i % 11 == 0 else " 화이트 " for i in range(N_ROWS)],
+        "일련번호": [f"35{i:09d}" for i in range(N_ROWS)],
+        "cached_region": pd.Categorical(["서울" if i % 2 else "경기" for i in range(N_ROWS)]),
+        "cached_city": ["강남" if i % 3 else None for i in range(N_ROWS)],
+        "cached_lat": rng.normal(37.5, 0.1, N_ROWS),
+        "cached_shipped": shipped.to_numpy().astype("datetime64[s]"),
+    })
+    frame.attrs['col_roles'] = resolve_columns(frame.columns)
+    return frame
+
+
+@pytest.fixture(scope="module")
+def positions():
+    # 결과 순서(정렬 등)대로의 행 위치 - 원본 순서와 다름
+    return np.random.default_rng(4).permutation(N_ROWS)[:1800]
+
+
+def expected_frame(df, positions):
+    # 기대값: 내보내는 컬럼을 머리글 이름으로, 제어문자는 XLSX 에 쓸 수 없으므로 빠짐
+    columns = export_columns(df)
+    clean = lambda v: v.replace("\x01", "") if isinstance(v, str) else v  # noqa: E731
+    return pd.DataFrame({h: df[c].iloc[positions].to_numpy() if df[c].dtype.kind == "M" else
+                         [clean(v) for v in df[c].iloc[positions].astype(object)] for c, h in columns})
+
+
+def test_export_columns(df):
+    # cached_ 컬럼 중 파생 컬럼만 뒤에, 좌표는 제외
+    assert export_columns(df) == [("보유처▼", "보유처▼"), ("모델명", "모델명"), ("색상", "색상"), ("일련번호", "일련번호"),
+                                  ("cached_region", "지역"), ("cached_city", "시군구"), ("cached_shipped", "출고일(정리)")]
+
+
+@pytest.mark.parametrize("chunk_rows", [10000, 333])
+def test_xlsx_reads_back_with_openpyxl(df, positions, chunk_rows):
+    data = export_rows(df, positions, "xlsx", chunk_rows=chunk_rows)
+    ws = load_workbook(io.BytesIO(data), read_only=True).active
+    # <dimension> 이 있어 읽기 전용에서도 크기를 바로 알 수 있음
+    assert (ws.max_row, ws.max_column) == (len(positions) + 1, len(export_columns(df)))
+    rows = list(ws.iter_rows(values_only=True))
+    expected = expected_frame(df, positions)
+    assert rows[0] == tuple(expected.columns)
+    assert len(rows) == len(positions) + 1
+
+    want = expected.astype(object).where(expected.notna(), None)
+    for got, row in zip(rows[1:], want.itertuples(index=False)):
+        # 끝의 빈 셀은 읽을 때 잘릴 수 있음
+        got = got + (None,) * (len(row) - len(got))
+        # 날짜는 문자열이 아닌 엑셀 날짜 셀
+        assert got[:-1] == tuple(row)[:-1]
+        assert got[-1] == (None if row[-1] is None else pd.Timestamp(row[-1]).to_pydatetime())
+
+
+def test_date_cells_use_date_format(df, positions):
+    data = export_rows(df, positions[:50], "xlsx")
+    ws = load_workbook(io.BytesIO(data)).active
+    dates = [c for c in ws["G"][1:] if c.value is not None]
+    assert dates and all(c.is_date and c.number_format == "yyyy-mm-dd" for c in dates)
+
+
+def test_xlsx_reads_back_with_pandas(df, positions):
+    data = export_rows(df, positions, "xlsx")
+    expected = expected_frame(df, positions)
+    # 문자열 컬럼은 문자열로, 날짜 컬럼은 pandas 가 날짜로 알아봄
+    got = pd.read_excel(io.BytesIO(data), dtype={h: str for h in expected.columns[:-1]})
+    assert got["출고일(정리)"].dtype.kind == "M"
+    pd.testing.assert_frame_equal(got.astype(object).where(got.notna(), None),
+                                  expected.astype(object).where(expected.notna(), None))
+
+
+def test_csv_matches_xlsx(df, positions):
+    # 같은 결과를 CSV 로 내보내면 같은 값 (날짜는 YYYY-MM-DD, 제어문자는 그대로)
+    text = pd.read_csv(io.BytesIO(export_rows(df, positions, "csv", chunk_rows=777)), dtype=str, encoding="utf-8-sig",
+                       keep_default_na=False)
+    expected = expected_frame(df, positions)
+    assert list(text.columns) == list(expected.columns)
+    assert text["출고일(정리)"].tolist() == [d.strftime("%Y-%m-%d") if pd.notna(d) else "" for d in expected["출고일(정리)"]]
+    colors = df["색상"].iloc[positions].fillna("").tolist()
+    assert text["색상"].tolist() == colors
+    assert text["보유처▼"].tolist() == expected["보유처▼"].astype(object).fillna("").tolist()
+
+
+def test_empty_result(df):
+    data = export_rows(df, np.array([], dtype=np.int64), "xlsx")
+    ws = load_workbook(io.BytesIO(data), read_only=True).active
+    assert (ws.max_row, ws.max_column) == (1, len(export_columns(df)))
+    assert pd.read_excel(io.BytesIO(data)).empty
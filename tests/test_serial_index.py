@@ -0,0 +1,87 @@
+"""일련번호 조회(SerialIndex.lookup)의 전체 / 앞자리 / 뒷자리 일치와 빈 조회 / 여러 건 일치 확인"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import resolve_columns
+from serial_index import SerialIndex, normalize_serial
+
+SERIALS = ["R3186ABC", "r3186abd", " R3186ABC ", "R3186", "R31860001", "X9R3186", "350000000001", "350000000002",
+           "350000000011", "A-1", "a-1", None, "", "   ", "ZZ0001", "YZ0001", "0001"]
+
+
+@pytest.fixture(scope="module")
+def df():
+    frame = pd.DataFrame({"모델명": ["SM-S928N"] * len(SERIALS), "일련번호": pd.Series(SERIALS, dtype=object)})
+    frame.attrs['col_roles'] = resolve_columns(frame.columns)
+    return frame
+
+
+def scan(df, match):
+    # 기대값: 전체 행을 훑어 match(번호) 인 행 위치를 (번호, 행) 순으로
+    keys = [normalize_serial(v) if v is not None else "" for v in df["일련번호"]]
+    hits = sorted((k, i) for i, k in enumerate(keys) if k and match(k))
+    return [i for _, i in hits]
+
+
+@pytest.mark.parametrize("query, kind, match", [
+    ("R3186ABC", "exact", lambda k: k == "R3186ABC"),
+    ("  r3186abc", "exact", lambda k: k == "R3186ABC"),
+    ("a-1", "exact", lambda k: k == "A-1"),
+    # 전체 일치가 있으면 앞자리 일치(R31860001 등)보다 우선
+    ("R3186", "exact", lambda k: k == "R3186"),
+    ("R3186A", "prefix", lambda k: k.startswith("R3186A")),
+    ("3500000000", "prefix", lambda k: k.startswith("3500000000")),
+    ("ABD", "suffix", lambda k: k.endswith("ABD")),
+    ("0001", "exact", lambda k: k == "0001"),
+    ("Z0001", "suffix", lambda k: k.endswith("Z0001")),
+    ("0011", "suffix", lambda k: k.endswith("0011")),
+])
+def test_lookup_matches_scan(df, query, kind, match):
+    result = SerialIndex(df).lookup(query)
+    expected = scan(df, match)
+    assert result.kind == kind
+    assert result.positions.tolist() == expected
+    assert result.total == len(expected)
+
+
+@pytest.mark.parametrize("query", ["", "   ", None, "NOPE", "R3186ABCD", "1A-"])
+def test_lookup_without_match(df, query):
+    result = SerialIndex(df).lookup("" if query is None else query)
+    assert result.kind is None and result.total == 0 and len(result.positions) == 0
+
+
+def test_duplicate_serials_return_every_row(df):
+    result = SerialIndex(df).lookup("R3186ABC")
+    assert result.positions.tolist() == [0, 2]
+    assert SerialIndex(df).lookup("A-1").positions.tolist() == [9, 10]
+
+
+def test_ambiguous_prefix_is_limited_but_counted():
+    serials = [f"35{i:010d}" for i in range(1200)] + ["36X"]
+    frame = pd.DataFrame({"일련번호": serials[::-1]})
+    frame.attrs['col_roles'] = resolve_columns(frame.columns)
+    index = SerialIndex(frame)
+    result = index.lookup("35", limit=100)
+    assert result.kind == "prefix" and result.total == 1200
+    # 번호순 앞의 100건
+    assert frame["일련번호"].iloc[result.positions].tolist() == sorted(serials[:-1])[:100]
+
+    suffix = index.lookup("9", limit=30)
+    ends = sorted(s for s in serials if s.endswith("9"))
+    assert suffix.kind == "suffix" and suffix.total == len(ends)
+    assert frame["일련번호"].iloc[suffix.positions].tolist() == ends[:30]
+
+
+def test_blank_serials_are_not_indexed(df):
+    index = SerialIndex(df)
+    assert "" not in index.exact
+    assert len(index) == len({normalize_serial(v) for v in SERIALS if v is not None and v.strip()})
+
+
+def test_missing_serial_column():
+    frame = pd.DataFrame({"모델명": ["SM-S928N"], "보유처": ["강남점"]})
+    index = SerialIndex(frame, roles=resolve_columns(frame.columns))
+    assert not index.available and len(index) == 0
+    assert index.lookup("R3186").kind is None
+    assert isinstance(index.lookup("R3186").positions, np.ndarray)
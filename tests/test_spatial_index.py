@@ -0,0 +1,121 @@
+"""보유처 공간 인덱스(StoreSpatialIndex)의 반경 / 가까운 N곳 조회를 전체 보유처 거리 계산(brute force)과 비교"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import resolve_columns
+from inventory_index import InventoryIndex
+from spatial_index import DIRECT_SCAN_STORES, UNLOCATED_CITY, StoreSpatialIndex, haversine_km
+
+N_STORES = 700
+
+
+@pytest.fixture(scope="module")
+def stores():
+    # 수도권에 몰린 보유처 + 전국에 흩어진 보유처 + 지도 제외 대상(도매 / 위치 모름)
+    rng = np.random.default_rng(5)
+    dense = np.column_stack([rng.normal(37.52, 0.08, 500), rng.normal(126.98, 0.1, 500)])
+    sparse = np.column_stack([rng.uniform(34.8, 38.3, N_STORES - 500), rng.uniform(126.2, 129.4, N_STORES - 500)])
+    points = np.vstack([dense, sparse])
+    names = [f"매장{i:04d}" for i in range(N_STORES)]
+    cities = ["강남"] * N_STORES
+    names[3], names[4] = "도매-서남 유통", "반추정보통신"
+    cities[5] = UNLOCATED_CITY
+    rows = np.repeat(np.arange(N_STORES), 2)
+    df = pd.DataFrame({
+        "모델명": ["SM-S928N", "SM-F956N"] * N_STORES,
+        "보유처": pd.Categorical([names[i] for i in rows]),
+        "cached_lat": points[rows, 0], "cached_lon": points[rows, 1],
+        "cached_city": [cities[i] for i in rows],
+    })
+    df.attrs['col_roles'] = resolve_columns(df.columns)
+    return df
+
+
+def _spatial(df, cell_deg):
+    return StoreSpatialIndex(df, InventoryIndex(df), cell_deg=cell_deg)
+
+
+def brute(spatial, lat, lon, allowed=None):
+    # 위치를 아는 (허용된) 보유처 전체의 거리, 가까운 순 (같은 거리는 코드순)
+    codes = np.flatnonzero(spatial.located if allowed is None else spatial.located & allowed)
+    dist = haversine_km(lat, lon, spatial.lat[codes], spatial.lon[codes])
+    order = np.lexsort((codes, dist))
+    return codes[order], dist[order]
+
+
+def assert_same(got, expected):
+    codes, dist = got
+    e_codes, e_dist = expected
+    np.testing.assert_allclose(dist, e_dist, rtol=0, atol=1e-9)
+    # 거리가 같은 보유처끼리는 순서를 따지지 않음
+    assert sorted(zip(np.round(dist, 9), codes.tolist())) == sorted(zip(np.round(e_dist, 9), e_codes.tolist()))
+
+
+# 격자 안 / 칸 경계 위 / 격자 가장자리 / 격자 밖(바다, 먼 곳)
+QUERY_POINTS = [
+    (37.5665, 126.9780), (37.50, 127.00), (37.55, 126.95), (37.5, 126.5),
+    (38.3, 129.4), (34.8, 126.2), (33.2, 126.5), (36.0, 131.0), (39.5, 125.0), (37.52, 129.9),
+]
+
+
+@pytest.mark.parametrize("cell_deg", [0.01, 0.05, 0.5])
+@pytest.mark.parametrize("lat, lon", QUERY_POINTS)
+def test_within_matches_brute_force(stores, cell_deg, lat, lon):
+    spatial = _spatial(stores, cell_deg)
+    for radius in (0.0, 0.5, 3.0, 25.0, 150.0, 2000.0):
+        codes, dist = brute(spatial, lat, lon)
+        keep = dist <= radius
+        assert_same(spatial.within(lat, lon, radius), (codes[keep], dist[keep]))
+
+
+@pytest.mark.parametrize("cell_deg", [0.01, 0.05, 0.5])
+@pytest.mark.parametrize("lat, lon", QUERY_POINTS)
+def test_nearest_matches_brute_force(stores, cell_deg, lat, lon):
+    spatial = _spatial(stores, cell_deg)
+    codes, dist = brute(spatial, lat, lon)
+    for k in (1, 3, 10, 50, N_STORES + 10):
+        assert_same(spatial.nearest(lat, lon, k), (codes[:k], dist[:k]))
+        for max_km in (1.0, 10.0, 80.0):
+            keep = dist <= max_km
+            assert_same(spatial.nearest(lat, lon, k, max_km=max_km), (codes[keep][:k], dist[keep][:k]))
+
+
+@pytest.mark.parametrize("share", [0.05, 0.8])
+def test_allowed_stores_direct_and_grid(stores, share):
+    # 허용 보유처가 적으면 바로 계산, 많으면 격자 - 두 경로 모두 brute force 와 같음
+    spatial = _spatial(stores, 0.05)
+    allowed = np.random.default_rng(9).random(len(spatial.located)) < share
+    assert (np.count_nonzero(allowed & spatial.located) <= DIRECT_SCAN_STORES) == (share < 0.5)
+    for lat, lon in QUERY_POINTS:
+        codes, dist = brute(spatial, lat, lon, allowed)
+        assert_same(spatial.nearest(lat, lon, 10, allowed=allowed), (codes[:10], dist[:10]))
+        keep = dist <= 20.0
+        assert_same(spatial.within(lat, lon, 20.0, allowed=allowed), (codes[keep], dist[keep]))
+
+
+def test_excluded_and_empty_cases(stores):
+    spatial = _spatial(stores, 0.05)
+    owner = spatial.index.owner
+    # 도매 / 위치 모름은 제외, 사무실(반추)은 포함
+    assert not spatial.located[owner.lookup["도매-서남 유통"]]
+    assert not spatial.located[owner.lookup["매장0005"]]
+    assert spatial.located[owner.lookup["반추정보통신"]]
+    assert spatial.store_point("매장0005") is None
+    assert spatial.n_located == N_STORES - 2
+
+    assert len(spatial.nearest(37.5, 127.0, 0)[0]) == 0
+    none = np.zeros(len(spatial.located), dtype=bool)
+    assert len(spatial.nearest(37.5, 127.0, 5, allowed=none)[0]) == 0
+    assert len(spatial.within(37.5, 127.0, 50.0, allowed=none)[0]) == 0
+    # 격자 범위를 완전히 벗어난 반경
+    assert len(spatial.within(20.0, 100.0, 10.0)[0]) == 0
+
+
+def test_rows_of_stores_follow_store_order(stores):
+    spatial = _spatial(stores, 0.05)
+    index = spatial.index
+    positions = index.search(models=["SM-S928N", "SM-F956N"])
+    codes, _ = spatial.nearest(37.5665, 126.9780, 5)
+    rows = spatial.rows_of_stores(positions, codes)
+    assert index.owner.codes[rows].tolist() == np.repeat(codes, 2).tolist()